@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.utils.functional import SimpleLazyObject
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from backend.apps.players.models import Player
+from .tokens import check_not_revoked
+
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    Usuario respaldado por los claims del token. `id`, `is_staff`,
+    `player_id` y `player` (perezoso, por id) no consultan la base de datos;
+    cualquier otro atributo carga la fila de auth_user en el primer acceso.
+    """
+
+    def __init__(self, token):
+        user_id = token[api_settings.USER_ID_CLAIM]
+        super().__init__(lambda: get_user_model()._default_manager.get(pk=user_id))
+        player_id = token.get('player_id')
+        self.__dict__.update(
+            id=user_id,
+            pk=user_id,
+            is_staff=token.get('is_staff', False),
+            is_active=True,
+            is_authenticated=True,
+            is_anonymous=False,
+            player_id=player_id,
+        )
+        if player_id is not None:
+            self.__dict__['player'] = SimpleLazyObject(lambda: Player.objects.get(pk=player_id))
+
+    def __bool__(self):
+        # IsAuthenticated evalúa bool(request.user): no debe cargar la fila
+        return True
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Autenticación JWT sin leer al usuario en cada petición: usa los claims
+    del token y comprueba la revocación en la caché. Los tokens emitidos antes
+    de incluir los claims siguen el camino normal de simplejwt.
+    """
+
+    def get_user(self, validated_token):
+        if 'token_version' not in validated_token:
+            return super().get_user(validated_token)
+        check_not_revoked(validated_token)
+        return ClaimsUser(validated_token)
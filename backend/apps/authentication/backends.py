@@ -1,21 +1,78 @@
+from django.conf import settings
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.core.cache import cache
+from django.db.models.functions import Lower
+import hashlib
+
+
+def negative_cache_key(identifier):
+    """Clave del caché negativo de un identificador (username o email)"""
+    digest = hashlib.sha256(identifier.strip().lower().encode()).hexdigest()
+    return f'login:unknown:{digest}'
+
+
+def forget_unknown(*identifiers):
+    """Quita identificadores del caché negativo (p. ej. al registrarse un usuario)"""
+    cache.delete_many([negative_cache_key(i) for i in identifiers if i])
+
 
 class EmailOrUsernameModelBackend(ModelBackend):
     """
     Permite autenticar usuarios usando 'username' o 'email'.
+
+    Las búsquedas comparan LOWER(username) / LOWER(email), servidas por los
+    índices funcionales de auth_user (migración 0001 de esta app). Un
+    identificador inexistente cuesta lo mismo que uno existente (se calcula
+    un hash de relleno) y se recuerda unos segundos en un caché negativo para
+    que las ráfagas de intentos no lleguen a la base de datos.
     """
     def authenticate(self, request, username=None, password=None, **kwargs):
         UserModel = get_user_model()
-        try:
-            # Busca un usuario cuyo username O email coincida con el input
-            user = UserModel.objects.get(
-                Q(username__iexact=username) | Q(email__iexact=username)
-            )
-        except UserModel.DoesNotExist:
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        user = self.get_user_by_identifier(username)
+        if user is None:
+            # Igualar el tiempo de respuesta con el de un usuario existente
+            UserModel().set_password(password)
             return None
 
-        if user.check_password(password) and self.user_can_authenticate(user):
+        # check_password vuelve a hashear si cambió el perfil del hasher; la
+        # marca le indica a signals.py que es la misma contraseña
+        user._login_rehash = True
+        try:
+            valid = user.check_password(password)
+        finally:
+            user._login_rehash = False
+        if valid and self.user_can_authenticate(user):
             return user
-        return None
\ No newline at end of file
+        return None
+
+    def get_user_by_identifier(self, identifier):
+        """Usuario por username o email (sin distinguir mayúsculas), o None"""
+        key = negative_cache_key(identifier)
+        if cache.get(key):
+            return None
+
+        UserModel = get_user_model()
+        normalized = identifier.strip().lower()
+        user = UserModel._default_manager.alias(
+            username_lower=Lower('username')
+        ).filter(username_lower=normalized).first()
+
+        if user is None and '@' in normalized:
+            # El email no es único: si hay más de una cuenta no se puede elegir
+            matches = list(UserModel._default_manager.alias(
+                email_lower=Lower('email')
+            ).filter(email_lower=normalized)[:2])
+            if len(matches) == 1:
+                user = matches[0]
+            elif matches:
+                return None
+
+        if user is None:
+            cache.set(key, True, timeout=settings.LOGIN_NEGATIVE_CACHE_TTL)
+        return user
@@ -0,0 +1,66 @@
+"""
+Hashers de contraseñas con costo configurable.
+
+Mantienen el nombre de algoritmo de los hashers de Django, así que los hashes
+existentes se siguen verificando; solo cambia el costo con el que se generan
+los nuevos. Los parámetros salen de settings (ver PASSWORD_HASHER y
+PASSWORD_*), normalmente fijados con el comando `calibrate_hasher`.
+
+Como `must_update` compara los parámetros guardados en cada hash con los
+actuales, `User.check_password` vuelve a hashear la contraseña en el primer
+login correcto después de cambiar el perfil.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+)
+
+
+def _setting(name, default):
+    value = getattr(settings, name, None)
+    return default if value is None else value
+
+
+class CalibratedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    @property
+    def iterations(self):
+        return _setting('PASSWORD_PBKDF2_ITERATIONS', PBKDF2PasswordHasher.iterations)
+
+
+class CalibratedScryptPasswordHasher(ScryptPasswordHasher):
+    @property
+    def work_factor(self):
+        return _setting('PASSWORD_SCRYPT_WORK_FACTOR', ScryptPasswordHasher.work_factor)
+
+    @property
+    def block_size(self):
+        return _setting('PASSWORD_SCRYPT_BLOCK_SIZE', ScryptPasswordHasher.block_size)
+
+    @property
+    def parallelism(self):
+        return _setting('PASSWORD_SCRYPT_PARALLELISM', ScryptPasswordHasher.parallelism)
+
+    @property
+    def maxmem(self):
+        # OpenSSL limita la memoria a 32 MiB por defecto; se reserva la que
+        # necesita el perfil (128 * r * N * p) con margen
+        return 2 * 128 * self.block_size * self.work_factor * self.parallelism
+
+
+class CalibratedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Requiere el paquete opcional argon2-cffi"""
+
+    @property
+    def time_cost(self):
+        return _setting('PASSWORD_ARGON2_TIME_COST', Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self):
+        return _setting('PASSWORD_ARGON2_MEMORY_COST', Argon2PasswordHasher.memory_cost)
+
+    @property
+    def parallelism(self):
+        return _setting('PASSWORD_ARGON2_PARALLELISM', Argon2PasswordHasher.parallelism)
+
@@ -0,0 +1,62 @@
+import statistics
+import time
+import uuid
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.test import override_settings
+from backend.apps.players.registration import bronze_plan_id, register_player
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el alta de jugadores (usuario, jugador y membresía) en consultas y '
+        'latencia; todo se revierte al terminar'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=200, help='Altas a medir')
+        parser.add_argument(
+            '--with-hasher', action='store_true',
+            help='Incluir el hasher configurado (por defecto se usa MD5 para medir solo la base de datos)'
+        )
+
+    def handle(self, *args, **options):
+        if options['count'] < 1:
+            raise CommandError('--count debe ser mayor que 0')
+        hashers = None if options['with_hasher'] else [
+            'django.contrib.auth.hashers.MD5PasswordHasher'
+        ]
+        bronze_plan_id()  # calentar la caché del plan, como en producción
+        prefix = uuid.uuid4().hex[:8]
+        timings = []
+        queries = []
+        try:
+            with override_settings(**({'PASSWORD_HASHERS': hashers} if hashers else {})):
+                with transaction.atomic():
+                    for i in range(options['count']):
+                        username = f'bench_{prefix}_{i}'
+                        with CaptureQueriesContext(connection) as captured:
+                            start = time.perf_counter()
+                            register_player(username, 'Benchmark-2024!', f'{username}@example.com')
+                            timings.append(time.perf_counter() - start)
+                        # Fuera de esta transacción de medición el alta no usa SAVEPOINT
+                        queries.append(sum(
+                            1 for q in captured.captured_queries if 'SAVEPOINT' not in q['sql']
+                        ))
+                    raise _Rollback
+        except _Rollback:
+            pass
+
+        timings.sort()
+        p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+        self.stdout.write(f'Altas: {len(timings)}')
+        self.stdout.write(f'Consultas por alta: {statistics.median(queries):g} (máx. {max(queries)})')
+        self.stdout.write(
+            f'Latencia: mediana {statistics.median(timings) * 1000:.2f} ms, p95 {p95 * 1000:.2f} ms'
+        )
+        self.stdout.write(self.style.SUCCESS('Datos de prueba revertidos'))
@@ -0,0 +1,135 @@
+import statistics
+import time
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    PBKDF2PasswordHasher,
+    ScryptPasswordHasher,
+)
+from django.core.management.base import BaseCommand, CommandError
+
+PASSWORD = 'calibracion-Casino-2024!'
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el hasher de contraseñas en esta máquina y propone los parámetros '
+        'que dan la latencia objetivo por hash (variables PASSWORD_*)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--algorithm', choices=['pbkdf2', 'scrypt', 'argon2'],
+            help='Algoritmo a calibrar (por defecto PASSWORD_HASHER)'
+        )
+        parser.add_argument(
+            '--target-ms', type=float, default=100.0,
+            help='Latencia objetivo de un hash en milisegundos'
+        )
+        parser.add_argument(
+            '--samples', type=int, default=5,
+            help='Mediciones por punto (se usa la mediana)'
+        )
+        parser.add_argument(
+            '--memory-kib', type=int, default=65536,
+            help='Memoria de argon2 en KiB'
+        )
+        parser.add_argument(
+            '--parallelism', type=int, default=1,
+            help='Paralelismo de argon2/scrypt (1 = un núcleo por login)'
+        )
+        parser.add_argument(
+            '--block-size', type=int, default=8,
+            help='Tamaño de bloque (r) de scrypt'
+        )
+
+    def handle(self, *args, **options):
+        algorithm = options['algorithm'] or settings.PASSWORD_HASHER
+        self.target = options['target_ms'] / 1000
+        self.samples = options['samples']
+
+        if algorithm == 'pbkdf2':
+            params, seconds = self.calibrate_pbkdf2()
+        elif algorithm == 'scrypt':
+            params, seconds = self.calibrate_scrypt(options['block_size'], options['parallelism'])
+        else:
+            params, seconds = self.calibrate_argon2(options['memory_kib'], options['parallelism'])
+
+        self.stdout.write(f'Latencia medida: {seconds * 1000:.1f} ms por hash '
+                          f'(~{1 / seconds:.1f} logins/s por núcleo)')
+        self.stdout.write('Agregue al entorno:')
+        self.stdout.write(f'PASSWORD_HASHER={algorithm}')
+        for name, value in params.items():
+            self.stdout.write(f'{name}={value}')
+        self.stdout.write(self.style.SUCCESS(
+            'Los usuarios existentes se rehashean con estos parámetros en su siguiente login'
+        ))
+
+    def measure(self, hasher):
+        """Mediana de segundos que tarda un hash con `hasher`"""
+        salt = hasher.salt()
+        hasher.encode(PASSWORD, salt)  # calentamiento
+        timings = []
+        for _ in range(self.samples):
+            start = time.perf_counter()
+            hasher.encode(PASSWORD, salt)
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings)
+
+    def calibrate_pbkdf2(self):
+        # El costo de PBKDF2 es lineal en las iteraciones: se mide una base y se escala
+        hasher = PBKDF2PasswordHasher()
+        hasher.iterations = 100_000
+        base = self.measure(hasher)
+        iterations = max(1000, round(hasher.iterations * self.target / base, -3))
+        hasher.iterations = int(iterations)
+        return {'PASSWORD_PBKDF2_ITERATIONS': hasher.iterations}, self.measure(hasher)
+
+    def calibrate_scrypt(self, block_size, parallelism):
+        # N debe ser potencia de 2: se duplica mientras el hash quede dentro del objetivo
+        hasher = ScryptPasswordHasher()
+        hasher.block_size = block_size
+        hasher.parallelism = parallelism
+        best = None
+        work_factor = 2 ** 10
+        while work_factor <= 2 ** 22:
+            hasher.work_factor = work_factor
+            hasher.maxmem = 2 * 128 * block_size * work_factor * parallelism
+            seconds = self.measure(hasher)
+            if seconds > self.target and best is not None:
+                break
+            best = (work_factor, seconds)
+            if seconds > self.target:
+                break
+            work_factor *= 2
+        return {
+            'PASSWORD_SCRYPT_WORK_FACTOR': best[0],
+            'PASSWORD_SCRYPT_BLOCK_SIZE': block_size,
+            'PASSWORD_SCRYPT_PARALLELISM': parallelism,
+        }, best[1]
+
+    def calibrate_argon2(self, memory_kib, parallelism):
+        try:
+            import argon2  # noqa: F401
+        except ImportError:
+            raise CommandError('argon2 requiere el paquete argon2-cffi (pip install argon2-cffi)')
+
+        # Memoria y paralelismo fijos; se sube time_cost hasta el objetivo
+        hasher = Argon2PasswordHasher()
+        hasher.memory_cost = memory_kib
+        hasher.parallelism = parallelism
+        best = None
+        for time_cost in range(1, 33):
+            hasher.time_cost = time_cost
+            seconds = self.measure(hasher)
+            if seconds > self.target and best is not None:
+                break
+            best = (time_cost, seconds)
+            if seconds > self.target:
+                self.stderr.write('Con time_cost=1 ya se supera el objetivo: reduzca --memory-kib')
+                break
+        return {
+            'PASSWORD_ARGON2_TIME_COST': best[0],
+            'PASSWORD_ARGON2_MEMORY_COST': memory_kib,
+            'PASSWORD_ARGON2_PARALLELISM': parallelism,
+        }, best[1]
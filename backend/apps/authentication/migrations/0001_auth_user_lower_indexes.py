@@ -0,0 +1,37 @@
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+# Índices funcionales sobre auth_user para el login sin distinguir mayúsculas
+# (ver backends.EmailOrUsernameModelBackend). auth_user pertenece a
+# django.contrib.auth, por eso se crean con el schema editor.
+INDEXES = [
+    models.Index(Lower('username'), name='auth_user_username_lower_idx'),
+    models.Index(Lower('email'), name='auth_user_email_lower_idx'),
+]
+
+
+def add_indexes(apps, schema_editor):
+    if not schema_editor.connection.features.supports_expression_indexes:
+        return
+    User = apps.get_model('auth', 'User')
+    for index in INDEXES:
+        schema_editor.add_index(User, index)
+
+
+def remove_indexes(apps, schema_editor):
+    if not schema_editor.connection.features.supports_expression_indexes:
+        return
+    User = apps.get_model('auth', 'User')
+    for index in INDEXES:
+        schema_editor.remove_index(User, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_indexes, remove_indexes),
+    ]
@@ -0,0 +1,51 @@
+from django.db import migrations, models
+from django.db.models import Count, Value
+from django.db.models.functions import Lower, NullIf
+
+# Email único sin distinguir mayúsculas. Los emails vacíos se convierten en
+# NULL, que no choca con otros NULL, así que los usuarios sin email siguen
+# permitidos. El registro (players/registration.py) se apoya en esta
+# restricción en lugar de consultar antes si el email existe.
+CONSTRAINT = models.UniqueConstraint(
+    NullIf(Lower('email'), Value('')), name='auth_user_email_ci_uniq'
+)
+
+
+def add_constraint(apps, schema_editor):
+    # Sin la restricción el registro no detectaría emails duplicados en
+    # concurrencia: mejor fallar que omitirla en silencio
+    if not schema_editor.connection.features.supports_expression_indexes:
+        raise RuntimeError(
+            'La base de datos no admite índices de expresión (se requiere MySQL '
+            '>= 8.0.13, PostgreSQL o SQLite); no se puede crear auth_user_email_ci_uniq'
+        )
+    User = apps.get_model('auth', 'User')
+    duplicated = list(
+        User.objects.exclude(email='').annotate(email_lower=Lower('email'))
+        .values('email_lower').annotate(total=Count('id')).filter(total__gt=1)
+        .values_list('email_lower', flat=True)[:10]
+    )
+    if duplicated:
+        raise RuntimeError(
+            'Hay cuentas que comparten email y deben unificarse antes de migrar: '
+            + ', '.join(duplicated)
+        )
+    schema_editor.add_constraint(User, CONSTRAINT)
+
+
+def remove_constraint(apps, schema_editor):
+    if not schema_editor.connection.features.supports_expression_indexes:
+        return
+    User = apps.get_model('auth', 'User')
+    schema_editor.remove_constraint(User, CONSTRAINT)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_token_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_constraint, remove_constraint),
+    ]
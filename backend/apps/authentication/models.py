@@ -1,3 +1,14 @@
+from django.contrib.auth.models import User
 from django.db import models
 
-# Create your models here.
+
+class TokenVersion(models.Model):
+    """
+    Versión de los tokens JWT de un usuario. Los tokens llevan la versión
+    vigente al emitirse; incrementarla revoca todos los anteriores.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id} v{self.version}"
@@ -0,0 +1,39 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+from .backends import forget_unknown
+from .tokens import revoke_user_tokens
+
+# Campos que viajan en los claims del token o que deben invalidarlo
+TOKEN_FIELDS = ('password', 'is_staff', 'is_active')
+
+
+@receiver(pre_save, sender=User)
+def detect_token_changes(sender, instance, update_fields=None, **kwargs):
+    instance._revoke_tokens = False
+    if instance.pk is None:
+        return
+    fields = set(TOKEN_FIELDS)
+    if update_fields is not None:
+        fields &= set(update_fields)
+    # El rehash del login (backends.py) guarda la misma contraseña en claro
+    if getattr(instance, '_login_rehash', False):
+        fields.discard('password')
+    if not fields:
+        return
+    previous = User.objects.filter(pk=instance.pk).values(*fields).first()
+    instance._revoke_tokens = previous is not None and any(
+        previous[field] != getattr(instance, field) for field in fields
+    )
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    if getattr(instance, '_revoke_tokens', False):
+        revoke_user_tokens(instance.pk)
+    # Un usuario nuevo (o que cambia username/email) deja de ser desconocido
+    if update_fields is not None and set(update_fields) <= {'last_login', 'password'}:
+        return
+    username, email = instance.username, instance.email
+    transaction.on_commit(lambda: forget_unknown(username, email))
@@ -1,3 +1,215 @@
-from django.test import TestCase
+from unittest import mock
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIRequestFactory, APITestCase
+from backend.apps.players import registration
+from backend.apps.players.models import Player
+from backend.apps.players.registration import register_player
+from backend.apps.players.serializers import PlayerSerializer
+from .backends import negative_cache_key
+from .views import RegisterView
 
-# Create your tests here.
+PASSWORD = 'Casino-test-1'
+
+# Hash barato para los tests (ver hashers.CalibratedPBKDF2PasswordHasher)
+FAST_HASH = override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+
+
+@FAST_HASH
+class LoginTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        # La invalidación de player_cache espera al commit: no dejar saldos cacheados a otros tests
+        self.addCleanup(cache.clear)
+        User.objects.create_user('Alice', 'Alice@Example.com', PASSWORD)
+
+    def test_login_ignores_case_of_username_and_email(self):
+        for identifier in ('alice', 'ALICE', ' Alice ', 'alice@example.com', 'ALICE@EXAMPLE.COM'):
+            user = authenticate(username=identifier, password=PASSWORD)
+            self.assertIsNotNone(user, identifier)
+            self.assertEqual(user.username, 'Alice')
+        self.assertIsNone(authenticate(username='alice', password='incorrecta'))
+
+    def test_token_endpoint_accepts_email(self):
+        response = self.client.post(
+            '/api/token/', {'username': 'ALICE@example.com', 'password': PASSWORD},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.json())
+
+    def test_signup_clears_negative_cache(self):
+        self.assertIsNone(authenticate(username='Bob', password=PASSWORD))
+        self.assertTrue(cache.get(negative_cache_key('bob')))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            register_player('bob', PASSWORD, 'bob@example.com')
+
+        self.assertIsNone(cache.get(negative_cache_key('bob')))
+        self.assertIsNotNone(authenticate(username='BOB', password=PASSWORD))
+
+
+class HasherProfileTests(TestCase):
+    def test_login_rehashes_with_new_profile(self):
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=1000):
+            user = User.objects.create_user('carol', 'carol@example.com', PASSWORD)
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=1500):
+            self.assertIsNotNone(authenticate(username='carol', password=PASSWORD))
+            user.refresh_from_db()
+            self.assertTrue(user.password.startswith('pbkdf2_sha256$1500$'))
+            # El hash nuevo sigue verificando la misma contraseña
+            self.assertIsNotNone(authenticate(username='carol', password=PASSWORD))
+
+
+@FAST_HASH
+class TokenRevocationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        # La invalidación de player_cache espera al commit: no dejar saldos cacheados a otros tests
+        self.addCleanup(cache.clear)
+        self.player = register_player('dave', PASSWORD, 'dave@example.com')
+        self.user = self.player.user
+        self.access, self.refresh = self.login()
+
+    def login(self):
+        response = self.client.post('/api/token/', {'username': 'dave', 'password': PASSWORD}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['access'], response.json()['refresh']
+
+    def balance_status(self, access):
+        return self.client.get('/api/players/my/balance/', HTTP_AUTHORIZATION=f'Bearer {access}').status_code
+
+    def refresh_status(self, refresh):
+        return self.client.post('/api/token/refresh/', {'refresh': refresh}, format='json').status_code
+
+    def test_claims_request_does_not_read_auth_user(self):
+        self.assertEqual(self.balance_status(self.access), 200)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.balance_status(self.access), 200)
+        self.assertFalse([q['sql'] for q in queries if 'auth_user' in q['sql']])
+
+    def test_logout_revokes_access_and_refresh(self):
+        response = self.client.post(
+            '/api/auth/logout/', {'refresh': self.refresh}, format='json',
+            HTTP_AUTHORIZATION=f'Bearer {self.access}'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.balance_status(self.access), 401)
+        self.assertEqual(self.refresh_status(self.refresh), 401)
+
+    def test_rotated_refresh_is_rejected(self):
+        response = self.client.post('/api/token/refresh/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.balance_status(response.json()['access']), 200)
+        self.assertEqual(self.refresh_status(self.refresh), 401)
+        self.assertEqual(self.refresh_status(response.json()['refresh']), 200)
+
+    def test_password_change_revokes_tokens(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.set_password('Otra-clave-2')
+            self.user.save(update_fields=['password'])
+        self.assertEqual(self.balance_status(self.access), 401)
+        self.assertEqual(self.refresh_status(self.refresh), 401)
+
+    def test_staff_change_revokes_tokens(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_staff = True
+            self.user.save()
+        self.assertEqual(self.balance_status(self.access), 401)
+        access, _ = self.login()
+        self.assertEqual(self.balance_status(access), 200)
+
+    def test_login_rehash_keeps_tokens(self):
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=1500):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.login()
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1500$'))
+        self.assertEqual(self.balance_status(self.access), 200)
+
+
+@FAST_HASH
+class RegistrationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        register_player('erin', PASSWORD, 'Erin@Example.com')
+
+    def data(self, username, email):
+        return {'username': username, 'password': PASSWORD, 'email': email}
+
+    def register_view(self, username, email):
+        request = APIRequestFactory().post('/api/auth/register/', self.data(username, email), format='json')
+        return RegisterView.as_view()(request)
+
+    def register_endpoint(self, username, email):
+        return self.client.post('/api/auth/register/', self.data(username, email), format='json')
+
+    def test_register_view(self):
+        response = self.register_view('frank', 'frank@example.com')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Player.objects.filter(user__username='frank', player_membership__is_active=True).exists())
+
+        response = self.register_view('erin', 'otro@example.com')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': registration.USERNAME_TAKEN})
+
+        response = self.register_view('gus', 'ERIN@example.com')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': registration.EMAIL_TAKEN})
+
+    def test_register_endpoint(self):
+        response = self.register_endpoint('frank', 'frank@example.com')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['username'], 'frank')
+
+        response = self.register_endpoint('erin', 'otro@example.com')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': registration.USERNAME_TAKEN})
+
+        response = self.register_endpoint('gus', 'erin@EXAMPLE.com')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': registration.EMAIL_TAKEN})
+
+    def test_player_serializer_create(self):
+        serializer = PlayerSerializer(data={
+            'user': self.data('frank', 'frank@example.com'), 'name': 'Frank', 'last_name': 'Test'
+        })
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        player = serializer.save()
+        self.assertEqual((player.user.username, player.name), ('frank', 'Frank'))
+
+        for username, email, field, message in (
+            ('erin', 'otro@example.com', 'username', registration.USERNAME_TAKEN),
+            ('gus', 'ERIN@example.com', 'email', registration.EMAIL_TAKEN),
+        ):
+            serializer = PlayerSerializer(data={'user': self.data(username, email), 'name': 'Gus', 'last_name': 'Test'})
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+            with self.assertRaises(ValidationError) as raised:
+                serializer.save()
+            self.assertEqual(raised.exception.detail, {'user': {field: [message]}})
+
+    def test_conflict_error_mapping(self):
+        for message, field in (
+            ('UNIQUE constraint failed: auth_user.username', 'username'),
+            ('duplicate key value violates unique constraint "auth_user_username_key"', 'username'),
+            ("(1062, \"Duplicate entry 'erin' for key 'auth_user.username'\")", 'username'),
+            ("(1062, \"Duplicate entry 'erin' for key 'username'\")", 'username'),
+            ("UNIQUE constraint failed: index 'auth_user_email_ci_uniq'", 'email'),
+        ):
+            self.assertEqual(registration.conflict_error(IntegrityError(message)).field, field, message)
+        self.assertIsNone(registration.conflict_error(IntegrityError('FOREIGN KEY constraint failed')))
+
+    def test_unexpected_integrity_error_is_raised(self):
+        error = IntegrityError('FOREIGN KEY constraint failed')
+        with mock.patch.object(Player.objects, 'create', side_effect=error):
+            with self.assertRaises(IntegrityError):
+                register_player('gus', PASSWORD, 'gus@example.com')
+        self.assertFalse(User.objects.filter(username='gus').exists())
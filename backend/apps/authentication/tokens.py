@@ -0,0 +1,92 @@
+"""
+Claims propios de los JWT y revocación sin consultas por petición.
+
+Los tokens incluyen `player_id`, `is_staff` y `token_version`, de modo que
+ClaimsJWTAuthentication puede autenticar sin leer auth_user. La revocación
+se comprueba en la caché compartida:
+
+- `auth:revoked:<jti>`: tokens revocados uno a uno (logout, refresh rotado),
+  hasta que expiran.
+- `auth:token_version:<user_id>`: versión vigente del usuario (TokenVersion);
+  los tokens con una versión anterior quedan revocados.
+"""
+import time
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from backend.apps.players.models import Player
+from .models import TokenVersion
+
+
+def _version_key(user_id):
+    return f'auth:token_version:{user_id}'
+
+
+def _revoked_key(jti):
+    return f'auth:revoked:{jti}'
+
+
+def current_token_version(user_id):
+    """Versión vigente de los tokens del usuario (caché, con la base de datos como respaldo)"""
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        version = TokenVersion.objects.filter(user_id=user_id).values_list('version', flat=True).first() or 0
+        cache.set(_version_key(user_id), version, timeout=None)
+    return version
+
+
+def revoke_user_tokens(user_id):
+    """Revoca todos los tokens emitidos hasta ahora para el usuario"""
+    with transaction.atomic():
+        if not TokenVersion.objects.filter(user_id=user_id).update(version=F('version') + 1):
+            TokenVersion.objects.create(user_id=user_id, version=1)
+        version = TokenVersion.objects.values_list('version', flat=True).get(user_id=user_id)
+    transaction.on_commit(lambda: cache.set(_version_key(user_id), version, timeout=None))
+
+
+def revoke_token(token):
+    """Revoca un token concreto hasta su expiración"""
+    remaining = int(token['exp'] - time.time())
+    if remaining > 0:
+        cache.set(_revoked_key(token[api_settings.JTI_CLAIM]), True, timeout=remaining)
+
+
+def check_not_revoked(token):
+    """Lanza InvalidToken si el token fue revocado (una lectura de caché en el caso común)"""
+    user_id = token[api_settings.USER_ID_CLAIM]
+    revoked_key, version_key = _revoked_key(token[api_settings.JTI_CLAIM]), _version_key(user_id)
+    values = cache.get_many([revoked_key, version_key])
+    if values.get(revoked_key):
+        raise InvalidToken('El token fue revocado')
+    version = values.get(version_key)
+    if version is None:
+        version = current_token_version(user_id)
+    if token.get('token_version', 0) < version:
+        raise InvalidToken('El token fue revocado')
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['player_id'] = Player.objects.filter(user_id=user.id).values_list('id', flat=True).first()
+        token['is_staff'] = user.is_staff
+        token['token_version'] = current_token_version(user.id)
+        return token
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs['refresh'])
+        if 'token_version' in refresh:
+            check_not_revoked(refresh)
+        # El refresh rotado deja de servir (sin la app token_blacklist)
+        previous = {'exp': refresh['exp'], api_settings.JTI_CLAIM: refresh[api_settings.JTI_CLAIM]}
+        data = super().validate(attrs)
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            revoke_token(previous)
+        return data
@@ -12,4 +12,5 @@ urlpatterns = [
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('password-reset/', views.PasswordResetRequestView.as_view(), name='password_reset_request'),
     path('register/', views.register, name='auth_register'),
+    path('logout/', views.LogoutView.as_view(), name='auth_logout'),
 ]
@@ -3,91 +3,46 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from django.contrib.auth.models import User
-from backend.apps.players.models import Player
+from backend.apps.players.registration import RegistrationError, register_player
 from backend.apps.players.serializers import PlayerSerializer
-from backend.apps.memberships.models import MembershipPlan, Membership
-from django.utils import timezone
-from datetime import timedelta
 from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import RefreshToken
+from .tokens import revoke_token, revoke_user_tokens
 
 class RegisterView(generics.CreateAPIView):
     authentication_classes = []
     permission_classes = [permissions.AllowAny]
 
     def post(self, request):
-        try:
-            username = request.data.get('username')
-            password = request.data.get('password')
-            email = request.data.get('email')
-            name = request.data.get('name')
-            last_name = request.data.get('last_name')
-            
-            # 1. Validaciones
-            if not username or not password or not email:
-                return Response(
-                    {'error': 'Usuario, contraseña y correo son obligatorios'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+        username = request.data.get('username')
+        password = request.data.get('password')
+        email = request.data.get('email')
 
-            if User.objects.filter(username=username).exists():
-                return Response(
-                    {'error': 'El nombre de usuario ya existe'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            if User.objects.filter(email=email).exists():
-                return Response(
-                    {'error': 'Este correo electrónico ya está registrado'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # 2. Crear usuario con email
-            user = User.objects.create_user(
-                username=username, 
-                email=email,
-                password=password
-            )
-            
-            # Obtener plan Free (bronze)
-            free_plan = MembershipPlan.objects.filter(tier='bronze').first()
-            if not free_plan:
-                free_plan = MembershipPlan.objects.create(
-                    name="Plan Básico",
-                    tier="bronze",
-                    description="Plan gratuito",
-                    benefits={"juegos_basicos": True},
-                    min_balance=0,
-                    min_monthly_volume=0,
-                    valid_from=timezone.now(),
-                    is_active=True
-                )
-            
-            # Crear jugador
-            player = Player.objects.create(
-                user=user,
-                name=name,
-                last_name=last_name
+        if not username or not password or not email:
+            return Response(
+                {'error': 'Usuario, contraseña y correo son obligatorios'}, 
+                status=status.HTTP_400_BAD_REQUEST
             )
-            
-            # Crear membresía
-            Membership.objects.create(
-                player=player,
-                plan=free_plan,
-                expires_at=timezone.now() + timedelta(days=30),
-                is_active=True
+
+        # Usuario, jugador y membresía bronce en una sola transacción
+        try:
+            player = register_player(
+                username, password, email,
+                name=request.data.get('name'),
+                last_name=request.data.get('last_name')
             )
-            
-            serializer = PlayerSerializer(player)
-            return Response({
-                'message': 'Usuario registrado exitosamente',
-                'player': serializer.data,
-                'player_id': player.id,
-                'username': player.user.username,
-                'email': player.user.email
-            }, status=status.HTTP_201_CREATED)
-            
-        except Exception as e:
-            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except RegistrationError as e:
+            return Response({'error': e.message}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = PlayerSerializer(player)
+        return Response({
+            'message': 'Usuario registrado exitosamente',
+            'player': serializer.data,
+            'player_id': player.id,
+            'username': player.user.username,
+            'email': player.user.email
+        }, status=status.HTTP_201_CREATED)
 
 class PasswordResetRequestView(APIView):
     permission_classes = [permissions.AllowAny]
@@ -120,52 +75,53 @@ class PasswordResetRequestView(APIView):
 @permission_classes([AllowAny])
 def register(request):
     """Endpoint de registro alternativo"""
-    try:
-        username = request.data.get('username')
-        password = request.data.get('password')
-        email = request.data.get('email')
-        name = request.data.get('name')
-        last_name = request.data.get('last_name')
-        
-        if not username or not password or not email:
-            return Response(
-                {'error': 'Usuario, contraseña y correo son obligatorios'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
+    username = request.data.get('username')
+    password = request.data.get('password')
+    email = request.data.get('email')
 
-        if User.objects.filter(username=username).exists():
-            return Response(
-                {'error': 'El nombre de usuario ya existe'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        if User.objects.filter(email=email).exists():
-            return Response(
-                {'error': 'Este correo electrónico ya está registrado'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        user = User.objects.create_user(
-            username=username, 
-            email=email,
-            password=password
-        )
-        
-        player = Player.objects.create(
-            user=user,
-            name=name,
-            last_name=last_name
-        )
-        
-        return Response({
-            'message': 'Usuario registrado exitosamente',
-            'player_id': player.id,
-            'username': player.user.username,
-            'email': player.user.email
-        }, status=status.HTTP_201_CREATED)
-        
-    except Exception as e:
+    if not username or not password or not email:
         return Response(
-            {'error': f'Error durante el registro: {str(e)}'},
+            {'error': 'Usuario, contraseña y correo son obligatorios'}, 
             status=status.HTTP_400_BAD_REQUEST
-        )
\ No newline at end of file
+        )
+
+    try:
+        player = register_player(
+            username, password, email,
+            name=request.data.get('name'),
+            last_name=request.data.get('last_name')
+        )
+    except RegistrationError as e:
+        return Response({'error': e.message}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'message': 'Usuario registrado exitosamente',
+        'player_id': player.id,
+        'username': player.user.username,
+        'email': player.user.email
+    }, status=status.HTTP_201_CREATED)
+
+class LogoutView(APIView):
+    """
+    Revoca el token de acceso actual y, si se envía, el refresh token.
+    Con {"all": true} revoca todos los tokens del usuario (todas las sesiones).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        if request.data.get('all'):
+            revoke_user_tokens(request.user.id)
+            return Response({'message': 'Se cerraron todas las sesiones'})
+
+        refresh = request.data.get('refresh')
+        if refresh:
+            try:
+                revoke_token(RefreshToken(refresh))
+            except TokenError:
+                return Response(
+                    {'error': 'Refresh token inválido'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        if request.auth is not None:
+            revoke_token(request.auth)
+        return Response({'message': 'Sesión cerrada'})
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class GamesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'backend.apps.games'
+
+    def ready(self):
+        from casinoChill.catalog_cache import register
+        register(self.get_model('Game'), 'games')
@@ -0,0 +1,20 @@
+"""
+Motor de juegos del servidor.
+
+    definition = engine.get_definition(game.engine)
+    round = definition.play(bet_type)        # Round(outcome, multiplier, result)
+    amount_won = engine.payout(bet_amount, round.multiplier)
+"""
+from .definitions import DEFAULT_ENGINE, DEFINITIONS, ENGINE_CHOICES
+from .tables import CENT, AliasTable, GameDefinition, InvalidBet, Round, payout
+
+
+def get_definition(key):
+    """Definición del juego; los juegos sin motor conocido usan el predeterminado"""
+    return DEFINITIONS.get(key) or DEFINITIONS[DEFAULT_ENGINE]
+
+
+__all__ = [
+    'CENT', 'AliasTable', 'DEFAULT_ENGINE', 'DEFINITIONS', 'ENGINE_CHOICES', 'GameDefinition',
+    'InvalidBet', 'Round', 'get_definition', 'payout',
+]
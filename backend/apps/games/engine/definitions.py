@@ -0,0 +1,148 @@
+# backend/apps/games/engine/definitions.py
+"""
+Definiciones de los juegos del catálogo (ver load_games).
+
+Todas las apuestas son de monto fijo: la ronda nunca cobra más que lo
+apostado. Por eso los juegos con decisiones del jugador (blackjack, póker)
+se modelan con la distribución de resultados de la estrategia óptima, con
+las dobladas y divisiones absorbidas en los pesos. Ruleta, dados, baccarat y
+video póker usan sus probabilidades exactas; las tragamonedas se derivan de
+sus rodillos.
+"""
+from itertools import product
+from .tables import GameDefinition
+
+RED_NUMBERS = frozenset({1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23, 25, 27, 30, 32, 34, 36})
+
+
+def _roulette(key, name, zeros):
+    pockets = list(zeros) + [str(n) for n in range(1, 37)]
+
+    def numbered(predicate, multiplier):
+        return [multiplier if p not in zeros and predicate(int(p)) else 0 for p in pockets]
+
+    payouts = {
+        'red': numbered(lambda n: n in RED_NUMBERS, 2),
+        'black': numbered(lambda n: n not in RED_NUMBERS, 2),
+        'odd': numbered(lambda n: n % 2 == 1, 2),
+        'even': numbered(lambda n: n % 2 == 0, 2),
+        'low': numbered(lambda n: n <= 18, 2),
+        'high': numbered(lambda n: n >= 19, 2),
+    }
+    for i in range(3):
+        payouts[f'dozen_{i + 1}'] = numbered(lambda n, i=i: 12 * i < n <= 12 * (i + 1), 3)
+        payouts[f'column_{i + 1}'] = numbered(lambda n, i=i: n % 3 == (i + 1) % 3, 3)
+    for pocket in pockets:
+        payouts[f'straight_{pocket}'] = [36 if p == pocket else 0 for p in pockets]
+    return GameDefinition(
+        key, name, [(p, 1) for p in pockets], payouts, default_bet='red'
+    )
+
+
+def _slots(key, name, reel, three_of_a_kind, cherries, notes=''):
+    """Tres rodillos iguales; cada combinación pesa el producto de sus apariciones"""
+    outcomes = []
+    multipliers = []
+    for symbols in product(reel, repeat=3):
+        weight = reel[symbols[0]] * reel[symbols[1]] * reel[symbols[2]]
+        first, second, third = symbols
+        if first == second == third and first in three_of_a_kind:
+            multiplier = three_of_a_kind[first]
+        elif first == second == 'cherry':
+            multiplier = cherries[2]
+        elif first == 'cherry':
+            multiplier = cherries[1]
+        else:
+            multiplier = 0
+        outcomes.append(('-'.join(symbols), weight))
+        multipliers.append(multiplier)
+    return GameDefinition(key, name, outcomes, {'spin': multipliers}, default_bet='spin', notes=notes)
+
+
+def _fixed(key, name, outcomes, payouts, default_bet, notes=''):
+    return GameDefinition(key, name, outcomes, payouts, default_bet, notes)
+
+
+CLASSIC_REEL = {'cherry': 7, 'lemon': 7, 'orange': 6, 'plum': 5, 'bell': 4, 'bar': 2, 'seven': 1}
+PROGRESSIVE_REEL = {'cherry': 7, 'lemon': 7, 'orange': 6, 'plum': 5, 'bell': 4, 'bar': 2, 'diamond': 1}
+
+_DEFINITIONS = [
+    _roulette('european_roulette', 'Ruleta Europea', zeros=('0',)),
+    _roulette('american_roulette', 'Ruleta Americana', zeros=('0', '00')),
+    _slots(
+        'classic_slots', 'Tragamonedas Clásicas', CLASSIC_REEL,
+        three_of_a_kind={'seven': 400, 'bar': 150, 'bell': 60, 'plum': 30,
+                         'orange': 15, 'lemon': 10, 'cherry': 12},
+        cherries={1: 1, 2: 5},
+    ),
+    _slots(
+        'progressive_slots', 'Tragamonedas Progresivas', PROGRESSIVE_REEL,
+        three_of_a_kind={'diamond': 2000, 'bar': 120, 'bell': 50, 'plum': 25,
+                         'orange': 12, 'lemon': 8, 'cherry': 10},
+        cherries={1: 1, 2: 5},
+        notes='El premio mayor es un multiplicador fijo; el pozo acumulado no se modela',
+    ),
+    # Estrategia básica, 6 mazos, blackjack 3:2; pesos por millón
+    _fixed(
+        'blackjack', 'Blackjack',
+        [('blackjack', 45300), ('win', 398475), ('push', 84800), ('lose', 471425)],
+        {'main': [2.5, 2, 1, 0]}, default_bet='main',
+    ),
+    # Texas Hold'em contra la casa; pesos por millón
+    _fixed(
+        'holdem', "Póker Texas Hold'em",
+        [('win', 480000), ('push', 20000), ('lose', 500000)],
+        {'ante': [2, 1, 0]}, default_bet='ante',
+    ),
+    # 8 mazos, probabilidades exactas por millón; banca paga 5 % de comisión
+    _fixed(
+        'baccarat', 'Baccarat',
+        [('banker', 458597), ('player', 446247), ('tie', 95156)],
+        {
+            'banker': [1.95, 0, 1],
+            'player': [0, 2, 1],
+            'tie': [0, 0, 9],
+        },
+        default_bet='banker',
+    ),
+    # Línea de pase y no pase sobre 1980 (el 12 del tiro de salida empata el no pase)
+    _fixed(
+        'craps', 'Dados (Craps)',
+        [('pass', 976), ('bar_12', 55), ('dont_pass', 949)],
+        {
+            'pass_line': [2, 0, 0],
+            'dont_pass': [0, 1, 2],
+        },
+        default_bet='pass_line',
+    ),
+    # Jacks or Better 9/6 con estrategia óptima; pesos por 10 millones
+    _fixed(
+        'video_poker', 'Video Póker',
+        [
+            ('royal_flush', 248), ('straight_flush', 1093), ('four_of_a_kind', 23625),
+            ('full_house', 115123), ('flush', 110148), ('straight', 112339),
+            ('three_of_a_kind', 744494), ('two_pair', 1292789),
+            ('jacks_or_better', 2145978), ('nothing', 5454163),
+        ],
+        {'jacks_or_better': [800, 50, 25, 9, 6, 4, 3, 2, 1, 0]},
+        default_bet='jacks_or_better',
+    ),
+    # Gana 1:1 menos 5 % de comisión; el empate de manos es lo más frecuente
+    _fixed(
+        'pai_gow', 'Pai Gow Poker',
+        [('win', 286000), ('push', 415000), ('lose', 299000)],
+        {'main': [1.95, 1, 0]}, default_bet='main',
+    ),
+    # Comportamiento histórico de `play`: ganar paga el doble
+    _fixed(
+        'coin_flip', 'Cara o cruz',
+        [('won', 1), ('lost', 1)],
+        {'even': [2, 0]}, default_bet='even',
+    ),
+]
+
+DEFINITIONS = {definition.key: definition for definition in _DEFINITIONS}
+
+DEFAULT_ENGINE = 'coin_flip'
+
+ENGINE_CHOICES = [(key, definition.name) for key, definition in DEFINITIONS.items()]
@@ -0,0 +1,72 @@
+# backend/apps/games/engine/rng.py
+"""
+Generador de números aleatorios del motor de juegos.
+
+Los resultados salen de os.urandom (CSPRNG del sistema operativo), nunca del
+módulo `random`. Para no pagar una llamada al sistema por ronda, cada hilo
+lee un bloque de bytes de una vez y lo consume como enteros de 32 bits. El
+búfer se descarta al hacer fork, así dos workers nunca comparten aleatoriedad.
+"""
+import os
+import threading
+from array import array
+
+# Bytes que se piden al sistema en cada recarga (16 384 enteros de 32 bits)
+BUFFER_BYTES = 64 * 1024
+
+WORD_RANGE = 1 << 32
+
+# Código de array con elementos de 4 bytes en esta plataforma
+WORD_TYPECODE = 'I' if array('I').itemsize == 4 else 'L'
+
+
+class CSPRNGStream:
+    """Flujo de enteros uniformes a partir de bloques de os.urandom"""
+
+    def __init__(self, buffer_bytes=BUFFER_BYTES):
+        self.buffer_bytes = buffer_bytes
+        self._words = array(WORD_TYPECODE)
+        self._position = 0
+
+    def _refill(self):
+        words = array(WORD_TYPECODE)
+        words.frombytes(os.urandom(self.buffer_bytes))
+        self._words = words
+        self._position = 0
+
+    def word(self):
+        """Entero uniforme en [0, 2**32)"""
+        if self._position >= len(self._words):
+            self._refill()
+        value = self._words[self._position]
+        self._position += 1
+        return value
+
+    def below(self, n):
+        """Entero uniforme en [0, n), sin sesgo de módulo (n <= 2**32)"""
+        # Se descartan las palabras del último tramo incompleto
+        limit = WORD_RANGE - WORD_RANGE % n
+        value = self.word()
+        while value >= limit:
+            value = self.word()
+        return value % n
+
+
+_local = threading.local()
+
+
+def stream():
+    """Flujo del hilo actual"""
+    rng = getattr(_local, 'stream', None)
+    if rng is None:
+        rng = _local.stream = CSPRNGStream()
+    return rng
+
+
+def _reset_after_fork():
+    global _local
+    _local = threading.local()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
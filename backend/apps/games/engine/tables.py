@@ -0,0 +1,127 @@
+# backend/apps/games/engine/tables.py
+"""
+Tablas precalculadas del motor: muestreo de resultados y pagos por apuesta.
+
+Cada juego es una distribución discreta de resultados con pesos enteros. El
+muestreo usa el método alias de Vose en aritmética entera (exacto, sin
+redondeos de punto flotante): elegir un resultado cuesta una o dos palabras
+del CSPRNG y dos accesos a tuplas, sin importar cuántos resultados tenga el
+juego. El pago de cada tipo de apuesta también es una tupla indexada por el
+resultado, con la ronda ya construida.
+"""
+from collections import namedtuple
+from decimal import Decimal, ROUND_DOWN
+from . import rng as rng_module
+
+CENT = Decimal('0.01')
+
+Round = namedtuple('Round', ['outcome', 'multiplier', 'result'])
+
+
+class InvalidBet(ValueError):
+    """Tipo de apuesta que el juego no ofrece"""
+
+
+def _result(multiplier):
+    if multiplier > 1:
+        return 'won'
+    if multiplier == 1:
+        return 'push'
+    return 'lost'
+
+
+class AliasTable:
+    """Muestreo O(1) de índices con pesos enteros (método alias de Vose)"""
+
+    def __init__(self, weights):
+        weights = [int(w) for w in weights]
+        if not weights or any(w < 0 for w in weights) or sum(weights) <= 0:
+            raise ValueError('Se necesitan pesos no negativos con suma positiva')
+        self.size = n = len(weights)
+        self.total = total = sum(weights)
+        if total > rng_module.WORD_RANGE:
+            raise ValueError('La suma de pesos no puede superar 2**32')
+
+        # Cada columna tiene capacidad `total`; los pesos escalados suman n * total
+        scaled = [w * n for w in weights]
+        threshold = [total] * n
+        alias = list(range(n))
+        small = [i for i, w in enumerate(scaled) if w < total]
+        large = [i for i, w in enumerate(scaled) if w >= total]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            threshold[s] = scaled[s]
+            alias[s] = l
+            scaled[l] -= total - scaled[s]
+            (small if scaled[l] < total else large).append(l)
+
+        self.threshold = tuple(threshold)
+        self.alias = tuple(alias)
+        # Si columna y umbral caben en una palabra, se sacan de un solo sorteo
+        self.single_draw = n * total <= rng_module.WORD_RANGE
+
+    def draw(self, rng):
+        if self.single_draw:
+            value = rng.below(self.size * self.total)
+            column, r = divmod(value, self.total)
+        else:
+            column = rng.below(self.size)
+            r = rng.below(self.total)
+        return column if r < self.threshold[column] else self.alias[column]
+
+
+class GameDefinition:
+    """
+    Reglas de un juego: resultados posibles con su peso y, por cada tipo de
+    apuesta, el multiplicador que paga cada resultado (retorno total por
+    unidad apostada: 2 es ganar lo apostado, 1 es devolverlo, 0 es perderlo).
+    """
+
+    def __init__(self, key, name, outcomes, payouts, default_bet, notes=''):
+        self.key = key
+        self.name = name
+        self.notes = notes
+        self.labels = tuple(label for label, _ in outcomes)
+        self.weights = tuple(int(weight) for _, weight in outcomes)
+        self.table = AliasTable(self.weights)
+        self.default_bet = default_bet
+        self.multipliers = {}
+        self.rounds = {}
+        for bet_type, multipliers in payouts.items():
+            multipliers = tuple(Decimal(str(m)) for m in multipliers)
+            if len(multipliers) != len(self.labels):
+                raise ValueError(f'{key}/{bet_type}: un multiplicador por resultado')
+            self.multipliers[bet_type] = multipliers
+            self.rounds[bet_type] = tuple(
+                Round(label, m, _result(m)) for label, m in zip(self.labels, multipliers)
+            )
+        if default_bet not in self.rounds:
+            raise ValueError(f'{key}: la apuesta por defecto no existe')
+
+    @property
+    def bet_types(self):
+        return tuple(self.rounds)
+
+    def play(self, bet_type=None, rng=None):
+        """Resuelve una ronda: un sorteo en la tabla alias y una búsqueda en la de pagos"""
+        try:
+            rounds = self.rounds[bet_type or self.default_bet]
+        except KeyError:
+            raise InvalidBet(bet_type) from None
+        return rounds[self.table.draw(rng or rng_module.stream())]
+
+    def rtp(self, bet_type=None):
+        """Retorno teórico al jugador de la apuesta (fracción de lo apostado)"""
+        multipliers = self.multipliers[bet_type or self.default_bet]
+        return sum(w * m for w, m in zip(self.weights, multipliers)) / Decimal(self.table.total)
+
+    def hit_frequency(self, bet_type=None):
+        """Probabilidad teórica de que la ronda devuelva algo"""
+        multipliers = self.multipliers[bet_type or self.default_bet]
+        hits = sum(w for w, m in zip(self.weights, multipliers) if m > 0)
+        return Decimal(hits) / Decimal(self.table.total)
+
+
+def payout(bet_amount, multiplier):
+    """Monto devuelto por la ronda, truncado al centavo"""
+    return (bet_amount * multiplier).quantize(CENT, rounding=ROUND_DOWN)
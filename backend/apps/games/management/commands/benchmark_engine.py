@@ -0,0 +1,32 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from backend.apps.games import engine
+from backend.apps.games.engine import rng
+
+
+class Command(BaseCommand):
+    help = 'Mide cuántas rondas por segundo resuelve el motor en un núcleo, por juego'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--engine', action='append', choices=sorted(engine.DEFINITIONS),
+            help='Juego a medir (repetible; por defecto todos)'
+        )
+        parser.add_argument('--rounds', type=int, default=500_000, help='Rondas por juego')
+
+    def handle(self, *args, **options):
+        if options['rounds'] < 1:
+            raise CommandError('--rounds debe ser mayor que 0')
+        stream = rng.stream()
+        for key in options['engine'] or engine.DEFINITIONS:
+            definition = engine.DEFINITIONS[key]
+            play = definition.play
+            bet_type = definition.default_bet
+            start = time.perf_counter()
+            for _ in range(options['rounds']):
+                play(bet_type, stream)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'{key:<20} {options["rounds"] / elapsed:>12,.0f} rondas/s '
+                f'(RTP teórico {float(definition.rtp()):.2%})'
+            )
@@ -10,52 +10,62 @@ class Command(BaseCommand):
             {
                 'name': 'Ruleta Europea',
                 'description': 'Ruleta clásica con un solo cero',
-                'game_type': 'Mesa'
+                'game_type': 'Mesa',
+                'engine': 'european_roulette'
             },
             {
                 'name': 'Tragamonedas Clásicas',
                 'description': 'Máquina tragamonedas con frutas y símbolos clásicos',
-                'game_type': 'Máquina'
+                'game_type': 'Máquina',
+                'engine': 'classic_slots'
             },
             {
                 'name': 'Blackjack',
                 'description': 'Juego de cartas contra el crupier, objetivo llegar a 21',
-                'game_type': 'Mesa'
+                'game_type': 'Mesa',
+                'engine': 'blackjack'
             },
             {
                 'name': 'Póker Texas Hold\'em',
                 'description': 'Variante de póker donde cada jugador recibe dos cartas y comparte cinco comunitarias',
-                'game_type': 'Mesa'
+                'game_type': 'Mesa',
+                'engine': 'holdem'
             },
             {
                 'name': 'Baccarat',
                 'description': 'Juego de cartas donde se apuesta por la mano del jugador, la del banquero o un empate',
-                'game_type': 'Mesa'
+                'game_type': 'Mesa',
+                'engine': 'baccarat'
             },
             {
                 'name': 'Dados (Craps)',
                 'description': 'Juego de dados donde se apuesta por el resultado de los lanzamientos',
-                'game_type': 'Mesa'
+                'game_type': 'Mesa',
+                'engine': 'craps'
             },
             {
                 'name': 'Ruleta Americana',
                 'description': 'Ruleta con doble cero (0 y 00)',
-                'game_type': 'Mesa'
+                'game_type': 'Mesa',
+                'engine': 'american_roulette'
             },
             {
                 'name': 'Video Póker',
                 'description': 'Máquina de video póker con distintas variantes',
-                'game_type': 'Máquina'
+                'game_type': 'Máquina',
+                'engine': 'video_poker'
             },
             {
                 'name': 'Pai Gow Poker',
                 'description': 'Variante de póker que combina elementos del juego chino Pai Gow',
-                'game_type': 'Mesa'
+                'game_type': 'Mesa',
+                'engine': 'pai_gow'
             },
             {
                 'name': 'Tragamonedas Progresivas',
                 'description': 'Máquinas tragamonedas con jackpots acumulativos que aumentan con cada apuesta',
-                'game_type': 'Máquina'
+                'game_type': 'Máquina',
+                'engine': 'progressive_slots'
             }
         ]
 
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import time
+import urllib.request
+from collections import Counter
+from urllib.parse import urlsplit
+from django.core.management.base import BaseCommand, CommandError
+
+# Variantes sync (DRF) y async (casinoChill/async_api.py) de cada endpoint caliente
+ENDPOINTS = {
+    'balance': {
+        'method': 'GET',
+        'sync': '/api/players/my/balance/',
+        'async': '/api/players/my/balance/async/',
+    },
+    'play': {
+        'method': 'POST',
+        'sync': '/api/games/games/{game}/play/',
+        'async': '/api/games/games/{game}/play/async/',
+    },
+    'deposit': {
+        'method': 'POST',
+        'sync': '/api/transactions/transactions/create_deposit/',
+        'async': '/api/transactions/transactions/create_deposit/async/',
+    },
+}
+
+
+async def _read_response(reader):
+    """Lee una respuesta HTTP/1.1 (Content-Length o chunked) y devuelve el status"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('El servidor cerró la conexión')
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    return status, headers.get('connection', '').lower() == 'close'
+
+
+class Command(BaseCommand):
+    help = (
+        'Prueba de carga de los endpoints calientes (saldo, jugar, depósito) contra un '
+        'servidor ASGI en marcha: compara la variante sync (DRF) con la async en '
+        'peticiones por segundo y latencia p50/p99 con N conexiones concurrentes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help='URL base del servidor')
+        parser.add_argument('--endpoint', choices=sorted(ENDPOINTS), default='balance')
+        parser.add_argument(
+            '--mode', choices=['sync', 'async', 'both'], default='both',
+            help='Variante a medir (both = sync y luego async, con los mismos parámetros)'
+        )
+        parser.add_argument('--connections', type=int, default=1000, help='Conexiones concurrentes')
+        parser.add_argument('--duration', type=float, default=30, help='Segundos de medición por variante')
+        parser.add_argument('--username', required=True, help='Jugador con el que se autentica la carga')
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--game', type=int, default=1, help='Id del juego (endpoint play)')
+        parser.add_argument('--amount', default='0.01', help='Apuesta o depósito por petición')
+
+    def handle(self, *args, **options):
+        if options['connections'] < 1 or options['duration'] <= 0:
+            raise CommandError('--connections y --duration deben ser mayores que 0')
+        base = urlsplit(options['url'])
+        if base.scheme != 'http' or not base.hostname:
+            raise CommandError('--url debe ser http://host[:puerto]')
+        token = self._token(options)
+
+        endpoint = ENDPOINTS[options['endpoint']]
+        body = b''
+        if options['endpoint'] == 'play':
+            body = json.dumps({'bet_amount': options['amount']}).encode()
+        elif options['endpoint'] == 'deposit':
+            body = json.dumps({'amount': options['amount'], 'origin': 'loadtest', 'channel': 'api'}).encode()
+
+        modes = ['sync', 'async'] if options['mode'] == 'both' else [options['mode']]
+        for mode in modes:
+            path = endpoint[mode].format(game=options['game'])
+            request = (
+                f'{endpoint["method"]} {path} HTTP/1.1\r\n'
+                f'Host: {base.netloc}\r\n'
+                f'Authorization: Bearer {token}\r\n'
+                'Content-Type: application/json\r\n'
+                f'Content-Length: {len(body)}\r\n'
+                '\r\n'
+            ).encode() + body
+            result = asyncio.run(self._run(
+                base.hostname, base.port or 80, request,
+                options['connections'], options['duration']
+            ))
+            self._report(mode, path, options['connections'], result)
+
+    def _token(self, options):
+        request = urllib.request.Request(
+            options['url'].rstrip('/') + '/api/token/',
+            data=json.dumps({
+                'username': options['username'], 'password': options['password']
+            }).encode(),
+            headers={'Content-Type': 'application/json'},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                return json.loads(response.read())['access']
+        except Exception as e:
+            raise CommandError(f'No se pudo obtener el token: {e}')
+
+    async def _run(self, host, port, request, connections, duration):
+        latencies = []
+        statuses = Counter()
+        errors = Counter()
+        started = asyncio.Event()
+        deadline = [None]
+
+        async def client():
+            reader = writer = None
+            await started.wait()
+            while time.monotonic() < deadline[0]:
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.open_connection(host, port)
+                    start = time.perf_counter()
+                    writer.write(request)
+                    await writer.drain()
+                    status, close = await _read_response(reader)
+                    latencies.append(time.perf_counter() - start)
+                    statuses[status] += 1
+                except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError) as e:
+                    errors[type(e).__name__] += 1
+                    close = True
+                    await asyncio.sleep(0.05)
+                if close and writer is not None:
+                    writer.close()
+                    reader = writer = None
+            if writer is not None:
+                writer.close()
+
+        tasks = [asyncio.ensure_future(client()) for _ in range(connections)]
+        begin = time.monotonic()
+        deadline[0] = begin + duration
+        started.set()
+        await asyncio.gather(*tasks)
+        return latencies, statuses, errors, time.monotonic() - begin
+
+    def _report(self, mode, path, connections, result):
+        latencies, statuses, errors, elapsed = result
+        latencies.sort()
+
+        def percentile(p):
+            if not latencies:
+                return float('nan')
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+        self.stdout.write(f'{mode:<5} {path}  ({connections} conexiones, {elapsed:.1f} s)')
+        self.stdout.write(
+            f'      {len(latencies) / elapsed:,.0f} req/s   p50 {percentile(0.50):.1f} ms   '
+            f'p99 {percentile(0.99):.1f} ms   máx {percentile(1.0):.1f} ms'
+        )
+        self.stdout.write(
+            '      status: ' + ', '.join(f'{code}×{count}' for code, count in sorted(statuses.items()))
+            + (('   errores: ' + ', '.join(f'{name}×{count}' for name, count in errors.items()))
+               if errors else '')
+        )
@@ -0,0 +1,70 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from backend.apps.games import engine
+from backend.apps.games.engine import simulator
+from backend.apps.games.models import Game
+
+
+class Command(BaseCommand):
+    help = (
+        'Simulación Monte-Carlo de un juego: RTP, frecuencia de acierto, varianza '
+        'e intervalo de confianza (requiere NumPy)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('game', help='Clave del motor (p. ej. classic_slots) o id del juego')
+        parser.add_argument('--rounds', type=int, default=100_000_000, help='Rondas a simular')
+        parser.add_argument('--bet-type', help='Tipo de apuesta (por defecto la del juego)')
+        parser.add_argument('--seed', type=int, help='Semilla para reproducir la simulación')
+        parser.add_argument('--workers', type=int, help='Procesos (por defecto uno por núcleo)')
+        parser.add_argument(
+            '--batch-size', type=int, default=simulator.DEFAULT_BATCH_SIZE,
+            help='Rondas por lote vectorizado'
+        )
+        parser.add_argument('--confidence', type=float, default=0.95, help='Nivel del intervalo de confianza')
+        parser.add_argument('--outcomes', action='store_true', help='Mostrar el conteo por resultado')
+
+    def handle(self, *args, **options):
+        key = options['game']
+        if key.isdigit():
+            try:
+                key = Game.objects.values_list('engine', flat=True).get(pk=int(key))
+            except Game.DoesNotExist:
+                raise CommandError(f'No existe el juego {options["game"]}')
+        if not 0 < options['confidence'] < 1:
+            raise CommandError('--confidence debe estar entre 0 y 1')
+
+        start = time.perf_counter()
+        try:
+            result = simulator.simulate(
+                key, options['rounds'],
+                bet_type=options['bet_type'],
+                seed=options['seed'],
+                workers=options['workers'],
+                batch_size=options['batch_size'],
+                confidence=options['confidence'],
+            )
+        except simulator.SimulationError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - start
+
+        low, high = result['rtp_interval']
+        definition = engine.DEFINITIONS[result['engine']]
+        self.stdout.write(f'Juego: {definition.name} ({result["engine"]}), apuesta {result["bet_type"]}')
+        self.stdout.write(f'Rondas: {result["rounds"]:,} en {elapsed:.1f} s '
+                          f'({result["rounds"] / elapsed:,.0f} rondas/s)')
+        self.stdout.write(f'Semilla: {result["seed"]}')
+        self.stdout.write(f'RTP: {result["rtp"]:.6%} (teórico {result["expected_rtp"]:.6%})')
+        self.stdout.write(f'IC {result["confidence"]:.0%}: [{low:.6%}, {high:.6%}]')
+        self.stdout.write(f'Frecuencia de acierto: {result["hit_frequency"]:.4%} '
+                          f'(teórica {result["expected_hit_frequency"]:.4%})')
+        self.stdout.write(f'Varianza: {result["variance"]:.4f} (desv. típica {result["std_dev"]:.4f})')
+        self.stdout.write(f'Multiplicador máximo: {result["max_multiplier"]:g}')
+        if options['outcomes']:
+            for label, count in sorted(result['outcomes'].items(), key=lambda item: -item[1]):
+                self.stdout.write(f'  {label:<30} {count:>15,} ({count / result["rounds"]:.6%})')
+
+        if result['within_interval']:
+            self.stdout.write(self.style.SUCCESS('El RTP teórico está dentro del intervalo'))
+        else:
+            self.stdout.write(self.style.WARNING('El RTP teórico queda fuera del intervalo'))
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0001_initial'),
+        ('players', '0003_player_daily_stats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gamesession',
+            index=models.Index(fields=['player', 'start_time', 'id'], name='games_games_player__cad682_idx'),
+        ),
+    ]
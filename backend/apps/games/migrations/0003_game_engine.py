@@ -0,0 +1,39 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:18
+
+from django.db import migrations, models
+
+# Juegos que carga load_games y el motor que les corresponde
+ENGINES_BY_NAME = {
+    'Ruleta Europea': 'european_roulette',
+    'Ruleta Americana': 'american_roulette',
+    'Tragamonedas Clásicas': 'classic_slots',
+    'Tragamonedas Progresivas': 'progressive_slots',
+    'Blackjack': 'blackjack',
+    "Póker Texas Hold'em": 'holdem',
+    'Baccarat': 'baccarat',
+    'Dados (Craps)': 'craps',
+    'Video Póker': 'video_poker',
+    'Pai Gow Poker': 'pai_gow',
+}
+
+
+def assign_engines(apps, schema_editor):
+    Game = apps.get_model('games', 'Game')
+    for name, engine in ENGINES_BY_NAME.items():
+        Game.objects.filter(name=name).update(engine=engine)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('games', '0002_game_session_history_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='engine',
+            field=models.CharField(choices=[('european_roulette', 'Ruleta Europea'), ('american_roulette', 'Ruleta Americana'), ('classic_slots', 'Tragamonedas Clásicas'), ('progressive_slots', 'Tragamonedas Progresivas'), ('blackjack', 'Blackjack'), ('holdem', "Póker Texas Hold'em"), ('baccarat', 'Baccarat'), ('craps', 'Dados (Craps)'), ('video_poker', 'Video Póker'), ('pai_gow', 'Pai Gow Poker'), ('coin_flip', 'Cara o cruz')], default='coin_flip', max_length=30),
+        ),
+        migrations.RunPython(assign_engines, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,14 @@
 from django.db import models
 from backend.apps.players.models import Player
 from backend.apps.memberships.models import Membership
+from .engine import DEFAULT_ENGINE, ENGINE_CHOICES
 
 class Game(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField()
     game_type = models.CharField(max_length=50)
+    # Reglas y tabla de pagos con las que se resuelve cada ronda (ver engine/)
+    engine = models.CharField(max_length=30, choices=ENGINE_CHOICES, default=DEFAULT_ENGINE)
 
     def __str__(self):
         return self.name
@@ -19,5 +22,11 @@ class GameSession(models.Model):
     bet_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     amount_won = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
 
+    class Meta:
+        indexes = [
+            # Historial del jugador ordenado por (start_time, id)
+            models.Index(fields=['player', 'start_time', 'id']),
+        ]
+
     def __str__(self):
         return f"{self.player} - {self.game} ({self.start_time})"
\ No newline at end of file
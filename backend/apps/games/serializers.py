@@ -70,6 +70,21 @@ class GameSessionSerializer(serializers.ModelSerializer):
         
         return data
 
+class GameSessionHistorySerializer(serializers.ModelSerializer):
+    """
+    Representación ligera para el historial del jugador: sin el jugador anidado
+    (siempre es el autenticado) ni el juego completo
+    """
+    game_name = serializers.CharField(source='game.name', read_only=True)
+
+    class Meta:
+        model = GameSession
+        fields = [
+            'id', 'game', 'game_name', 'bet_amount', 'amount_won',
+            'result', 'start_time', 'end_time'
+        ]
+        read_only_fields = fields
+
 # Serializer alternativo para creación (si se necesita)
 class GameSessionCreateSerializer(serializers.ModelSerializer):
     """
@@ -1,3 +1,307 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from unittest import mock, skipIf
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from casinoChill.testing import QueryCountMixin
+from backend.apps.authentication.tokens import ClaimsTokenObtainPairSerializer
+from backend.apps.players import ledger, rollups
+from backend.apps.players.models import BalanceEntry, PlayerDailyStats
+from backend.apps.players.tests import create_player
+from . import engine
+from .engine import simulator
+from .models import Game, GameSession
+from .views import HISTORY_MAX_PAGE_SIZE
 
-# Create your tests here.
+
+class GameSessionQueryCountTests(QueryCountMixin, APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create(username='staff', is_staff=True)
+        self.client.force_authenticate(self.staff)
+        self.game = Game.objects.create(name='Blackjack', description='', game_type='Mesa')
+        self.counter = 0
+
+    def add_sessions(self, count):
+        for _ in range(count):
+            self.counter += 1
+            player = create_player(f'player{self.counter}')
+            GameSession.objects.create(player=player, game=self.game, bet_amount=Decimal('5'))
+
+    def test_game_session_list(self):
+        # Sesiones con juego + una consulta para los jugadores anidados
+        self.assertConstantQueries(
+            '/api/games/game-sessions/', self.add_sessions, expected=2
+        )
+
+
+class GameSessionRollupTests(APITestCase):
+    """Las estadísticas del historial (PlayerDailyStats) siguen a las sesiones editadas"""
+
+    def setUp(self):
+        self.player = create_player('sessions')
+        self.client.force_authenticate(self.player.user)
+        self.game = Game.objects.create(name='Blackjack', description='', game_type='Mesa')
+
+    def add_session(self, bet, won, result=None):
+        session = GameSession.objects.create(
+            player=self.player, game=self.game, bet_amount=Decimal(bet),
+            amount_won=Decimal(won), result=result
+        )
+        rollups.record_change({}, rollups.game_contribution(session))
+        return session
+
+    def assertStatisticsMatchSessions(self):
+        statistics = self.client.get('/api/games/player/history/').json()['statistics']
+        sessions = GameSession.objects.filter(player=self.player)
+        self.assertEqual(statistics['total_games'], sessions.count())
+        self.assertEqual(statistics['games_won'], sessions.filter(result='won').count())
+        self.assertEqual(
+            Decimal(statistics['total_wagered']), sum((s.bet_amount for s in sessions), Decimal('0'))
+        )
+        self.assertEqual(
+            Decimal(statistics['total_won']), sum((s.amount_won for s in sessions), Decimal('0'))
+        )
+
+    def test_update_and_destroy_keep_statistics_in_sync(self):
+        kept = self.add_session('10', '0')
+        removed = self.add_session('5', '12', result='won')
+        self.assertStatisticsMatchSessions()
+
+        response = self.client.patch(
+            f'/api/games/game-sessions/{kept.id}/', {'bet_amount': '20.00', 'amount_won': '35.00'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertStatisticsMatchSessions()
+
+        response = self.client.delete(f'/api/games/game-sessions/{removed.id}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertStatisticsMatchSessions()
+
+
+class EngineTests(SimpleTestCase):
+    def test_alias_table_is_exact(self):
+        # Recorrer todas las (columna, umbral) reproduce los pesos exactamente
+        weights = [976, 55, 949, 0, 3]
+        table = engine.AliasTable(weights)
+        counts = [0] * len(weights)
+        for column in range(table.size):
+            counts[column] += table.threshold[column]
+            counts[table.alias[column]] += table.total - table.threshold[column]
+        self.assertEqual(counts, [w * table.size for w in weights])
+
+    def test_definitions_rtp(self):
+        expected = {
+            'european_roulette': Decimal('36') / 37,
+            'craps': Decimal('1952') / 1980,
+            'coin_flip': Decimal('1'),
+        }
+        for key, rtp in expected.items():
+            self.assertEqual(engine.DEFINITIONS[key].rtp(), rtp)
+        for key, definition in engine.DEFINITIONS.items():
+            for bet_type in definition.bet_types:
+                self.assertLessEqual(definition.rtp(bet_type), 1, f'{key}/{bet_type}')
+
+    def test_payout_truncates_to_cents(self):
+        self.assertEqual(engine.payout(Decimal('0.99'), Decimal('1.95')), Decimal('1.93'))
+
+
+@skipIf(simulator.np is None, 'NumPy no está instalado')
+class SimulatorTests(SimpleTestCase):
+    def test_reproducible_by_seed(self):
+        kwargs = {'rounds': 300_000, 'seed': 11, 'batch_size': 100_000}
+        first = simulator.simulate('craps', workers=1, **kwargs)
+        second = simulator.simulate('craps', workers=2, **kwargs)
+        self.assertEqual(first['outcomes'], second['outcomes'])
+        self.assertEqual(first['rounds'], 300_000)
+        self.assertTrue(first['within_interval'])
+
+
+class PlayTests(APITestCase):
+    def setUp(self):
+        self.player = create_player('gambler')
+        self.client.force_authenticate(self.player.user)
+        ledger.adjust(self.player.id, Decimal('100'), 'deposit')
+        self.game = Game.objects.create(
+            name='Ruleta Europea', description='', game_type='Mesa', engine='european_roulette'
+        )
+
+    def test_play_settles_round_from_engine(self):
+        response = self.client.post(
+            f'/api/games/games/{self.game.id}/play/',
+            {'bet_amount': '10', 'bet_type': 'straight_17'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(response.data['outcome'], engine.DEFINITIONS['european_roulette'].labels)
+        expected = '360.00' if response.data['outcome'] == '17' else '0.00'
+        self.assertEqual(response.data['amount_won'], expected)
+        self.assertEqual(
+            Decimal(response.data['new_balance']), Decimal('90') + Decimal(expected)
+        )
+
+    def test_unknown_bet_type(self):
+        response = self.client.post(
+            f'/api/games/games/{self.game.id}/play/',
+            {'bet_amount': '10', 'bet_type': 'straight_99'}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(GameSession.objects.exists())
+
+    def test_invalid_bet_amount(self):
+        for bet_amount in ('abc', 'NaN', 'Infinity', '0', '-5', '0.001', '10.005'):
+            response = self.client.post(
+                f'/api/games/games/{self.game.id}/play/',
+                {'bet_amount': bet_amount, 'bet_type': 'straight_17'}, format='json'
+            )
+            self.assertEqual(response.status_code, 400, bet_amount)
+        self.assertFalse(GameSession.objects.exists())
+        self.assertEqual(ledger.get_balance(self.player.id), Decimal('100'))
+
+    def test_play_batch_settles_every_round(self):
+        definition = engine.DEFINITIONS['european_roulette']
+        rounds_17 = definition.rounds['straight_17']
+        losing, winning = rounds_17[definition.labels.index('0')], rounds_17[definition.labels.index('17')]
+        bets = [{'bet_amount': '10', 'bet_type': 'straight_17'}] * 4
+        with mock.patch.object(definition, 'play', side_effect=[losing, winning, losing, losing]):
+            with mock.patch.object(ledger, 'hold', wraps=ledger.hold) as hold:
+                response = self.client.post(
+                    f'/api/games/games/{self.game.id}/play_batch/', {'bets': bets}, format='json'
+                )
+        self.assertEqual(response.status_code, 200)
+        hold.assert_called_once_with(self.player.id)
+
+        rounds = response.data['rounds']
+        self.assertEqual(response.data['rounds_played'], 4)
+        self.assertIsNone(response.data['stopped'])
+        self.assertEqual([r['balance'] for r in rounds], ['90.00', '440.00', '430.00', '420.00'])
+        self.assertEqual(response.data['final_balance'], '420.00')
+        session_ids = [r['game_session_id'] for r in rounds]
+        self.assertEqual(
+            sorted(session_ids), list(GameSession.objects.order_by('id').values_list('id', flat=True))
+        )
+
+        # Un asiento por ronda, en orden, con el mismo saldo que informa la respuesta
+        entries = BalanceEntry.objects.filter(player=self.player, kind='game_round').order_by('seq')
+        self.assertEqual([e.reference for e in entries], [f'game_session:{i}' for i in session_ids])
+        balance = Decimal('100')
+        for entry, round_ in zip(entries, rounds):
+            balance += entry.amount
+            self.assertEqual(balance, Decimal(round_['balance']))
+        self.assertEqual(ledger.get_balance(self.player.id), Decimal('420'))
+
+        stats = PlayerDailyStats.objects.get(player=self.player)
+        self.assertEqual((stats.games_played, stats.games_won), (4, 1))
+        self.assertEqual((stats.total_wagered, stats.total_won), (Decimal('40'), Decimal('360')))
+
+    def test_play_batch_stops_when_funds_run_out(self):
+        definition = engine.DEFINITIONS['european_roulette']
+        losing_round = definition.rounds['straight_0'][definition.labels.index('17')]
+        with mock.patch.object(definition, 'play', return_value=losing_round) as play:
+            response = self.client.post(
+                f'/api/games/games/{self.game.id}/play_batch/',
+                {'bets': [{'bet_amount': '60', 'bet_type': 'straight_0'}] * 3}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        # Perdida la primera ronda quedan 40: la segunda apuesta ya no alcanza
+        play.assert_called_once_with('straight_0')
+        rounds = response.data['rounds']
+        self.assertEqual(len(rounds), 1)
+        self.assertEqual(rounds[0]['outcome'], '17')
+        self.assertEqual(response.data['stopped'], 'insufficient_funds')
+        self.assertEqual(response.data['final_balance'], '40.00')
+        self.assertEqual(GameSession.objects.count(), 1)
+        self.assertEqual(ledger.get_balance(self.player.id), Decimal('40'))
+
+
+class PlayerHistoryTests(APITestCase):
+    url = '/api/games/player/history/'
+
+    def setUp(self):
+        self.player = create_player('historian')
+        self.client.force_authenticate(self.player.user)
+        self.game = Game.objects.create(name='Blackjack', description='', game_type='Mesa')
+
+    def add_sessions(self, count, start_time=None):
+        sessions = GameSession.objects.bulk_create([
+            GameSession(player=self.player, game=self.game, bet_amount=Decimal('5')) for _ in range(count)
+        ])
+        if start_time is not None:
+            GameSession.objects.filter(pk__in=[s.pk for s in sessions]).update(start_time=start_time)
+
+    def walk(self, page_size):
+        pages, cursor = [], None
+        while True:
+            params = {'page_size': page_size}
+            if cursor:
+                params['cursor'] = cursor
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, 200)
+            pages.append([session['id'] for session in response.json()['game_sessions']])
+            cursor = response.json()['next_cursor']
+            if cursor is None:
+                return pages
+
+    def test_cursor_walks_ties_without_gaps(self):
+        tied = timezone.now() - timedelta(hours=1)
+        self.add_sessions(3, start_time=tied)
+        self.add_sessions(1, start_time=tied - timedelta(hours=1))
+        self.add_sessions(1)
+
+        pages = self.walk(page_size=2)
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        expected = list(
+            GameSession.objects.order_by('-start_time', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual([session_id for page in pages for session_id in page], expected)
+
+    def test_malformed_cursor(self):
+        for cursor in ('no-es-base64!', 'eA==', 'MjAyNi0wMS0wMXwxfDI=', 'bWFsfGFiYw=='):
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+
+    def test_page_size_is_capped(self):
+        self.add_sessions(HISTORY_MAX_PAGE_SIZE + 1)
+        response = self.client.get(self.url, {'page_size': 1000})
+        self.assertEqual(len(response.json()['game_sessions']), HISTORY_MAX_PAGE_SIZE)
+        self.assertIsNotNone(response.json()['next_cursor'])
+
+
+@override_settings(ASYNC_DB_THREADS=0)
+class AsyncPlayTests(APITestCase):
+    def setUp(self):
+        self.player = create_player('async_gambler')
+        ledger.adjust(self.player.id, Decimal('100'), 'deposit')
+        self.game = Game.objects.create(
+            name='Cara o cruz', description='', game_type='Mesa', engine='coin_flip'
+        )
+        token = ClaimsTokenObtainPairSerializer.get_token(self.player.user).access_token
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+    def test_play_async_matches_sync_response(self):
+        response = self.client.post(
+            f'/api/games/games/{self.game.id}/play/async/',
+            {'bet_amount': '10'}, format='json', **self.auth
+        )
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body['bet_type'], 'even')
+        self.assertEqual(Decimal(body['new_balance']), Decimal('90') + Decimal(body['amount_won']))
+        self.assertEqual(ledger.get_balance(self.player.id), Decimal(body['new_balance']))
+        self.assertTrue(GameSession.objects.filter(pk=body['game_session_id']).exists())
+
+        balance = self.client.get('/api/players/my/balance/async/', **self.auth)
+        self.assertEqual(balance.status_code, 200)
+        self.assertEqual(balance.json()['balance'], body['new_balance'])
+
+    def test_async_endpoints_require_token(self):
+        response = self.client.post(
+            f'/api/games/games/{self.game.id}/play/async/', {'bet_amount': '10'}, format='json'
+        )
+        self.assertEqual(response.status_code, 401)
+        response = self.client.get(
+            '/api/players/my/balance/async/', HTTP_AUTHORIZATION='Bearer invalid'
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(GameSession.objects.exists())
@@ -8,6 +8,7 @@ router.register(r'game-sessions', views.GameSessionViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('games/<int:pk>/play/async/', views.play_async, name='game-play-async'),
     path('list/', views.GameListView.as_view(), name='game-list'),
     #path('game-sessions/create/', views.GameSessionCreateView.as_view(), name='game-session-create'),
     path('game-sessions/<int:session_id>/end/', views.end_game_session, name='end-game-session'),
@@ -1,19 +1,41 @@
 from rest_framework import viewsets, generics, status, permissions
 from rest_framework.response import Response
 from rest_framework.decorators import action, api_view, permission_classes
-from django.db import transaction, models
+from django.conf import settings
+from django.db import connection, transaction, models
 from django.db.models import F  # Added F expression
 from django.utils import timezone
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 from .models import Game, GameSession
-from .serializers import GameSerializer, GameSessionSerializer
+from .serializers import GameSerializer, GameSessionSerializer, GameSessionHistorySerializer
 from backend.apps.players.models import Player
-import random
+from backend.apps.players import ledger, player_cache, rollups
+from django.db.models import Prefetch
+from casinoChill.query_profiles import QueryProfile, QueryProfileMixin
+from casinoChill.catalog_cache import CatalogCacheMixin
+from casinoChill.pagination import OffsetPaginationMixin
+from casinoChill.replicas import ReplicaReadMixin, reads_from_replica
+from casinoChill import async_api, realtime
+from django.utils.dateparse import parse_datetime
+from . import engine
+import base64
+import binascii
 
-class GameViewSet(viewsets.ModelViewSet):
+ROUND_MESSAGES = {
+    'won': '¡Ganaste ${amount:.2f}!',
+    'lost': '¡Perdiste ${amount:.2f}!',
+    'push': 'Empate: se devuelven ${amount:.2f}',
+}
+
+class GameViewSet(ReplicaReadMixin, CatalogCacheMixin, viewsets.ModelViewSet):
     queryset = Game.objects.all()
     serializer_class = GameSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = None  # Catálogo acotado: se devuelve completo
+    catalog_name = 'games'
+    # El listado se cachea por versión: se llena desde el primario para no
+    # guardar datos de una réplica atrasada bajo la versión nueva
+    replica_actions = ('retrieve',)
 
     def get_permissions(self):
         if self.action in ['create', 'update', 'partial_update', 'destroy']:
@@ -21,72 +43,14 @@ class GameViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
-    @transaction.atomic
     def play(self, request, pk=None):
         try:
             game = self.get_object()
-            player = Player.objects.get(user=request.user)
-            
-            # Convertir a Decimal
-            bet_amount = Decimal(str(request.data.get('bet_amount', 0)))
-
-            if bet_amount <= Decimal('0'):
-                return Response(
-                    {'error': 'El monto de apuesta debe ser mayor a 0'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            # Verificar saldo de forma atómica
-            if not Player.objects.filter(id=player.id, balance__gte=bet_amount).exists():
-                return Response(
-                    {'error': 'Saldo insuficiente'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
-            # Lógica del juego
-            if random.choice([True, False]):
-                # Ganar: doble del monto apostado
-                amount_won = bet_amount * Decimal('2')
-                
-                # Actualizar balance de forma atómica (restar apuesta + sumar ganancia)
-                Player.objects.filter(id=player.id).update(
-                    balance=F('balance') - bet_amount + amount_won
-                )
-                result = 'won'
-            else:
-                amount_won = Decimal('0')
-                # Restar apuesta de forma atómica
-                Player.objects.filter(id=player.id).update(
-                    balance=F('balance') - bet_amount
-                )
-                result = 'lost'
-
-            # Obtener el jugador actualizado
-            player.refresh_from_db()
-
-            # Crear GameSession
-            game_session = GameSession.objects.create(
-                player=player,
-                game=game,
-                bet_amount=bet_amount,
-                amount_won=amount_won,
-                result=result,
-                end_time=timezone.now()
+            body, status_code = play_round(
+                player_cache.player_id_for(request.user), game, request.data
             )
+            return Response(body, status=status_code)
 
-            return Response({
-                'result': result,
-                'amount_won': str(amount_won),  # Mantener como string
-                'new_balance': str(player.balance),  # Mantener como string
-                'game_session_id': game_session.id,
-                'message': f'¡{"Ganaste" if result == "won" else "Perdiste"} ${amount_won:.2f}!'
-            })
-
-        except Player.DoesNotExist:
-            return Response(
-                {'error': 'Perfil de jugador no encontrado'}, 
-                status=status.HTTP_404_NOT_FOUND
-            )
         except Game.DoesNotExist:
             return Response(
                 {'error': 'Juego no encontrado'}, 
@@ -98,10 +62,259 @@ class GameViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-class GameSessionViewSet(viewsets.ModelViewSet):
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def play_batch(self, request, pk=None):
+        """
+        Resuelve varias rondas (auto-spin) en una petición y una transacción.
+
+        {"bets": [{"bet_amount": "1.00", "bet_type": "spin"}, ...]}
+
+        Las rondas se resuelven en orden contra el saldo bloqueado; si una
+        apuesta supera el saldo, el lote se detiene ahí y se devuelven las
+        rondas ya jugadas.
+        """
+        game = self.get_object()
+        player_id = player_cache.player_id_for(request.user)
+        if player_id is None:
+            return Response(
+                {'error': 'Perfil de jugador no encontrado'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        definition = engine.get_definition(game.engine)
+        bets, error = _parse_bets(request.data.get('bets'), definition)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+        played_at = timezone.now()
+        rounds = []
+        stopped = None
+        with ledger.hold(player_id) as account:
+            balance = account.balance
+            for bet_amount, bet_type in bets:
+                if balance < bet_amount:
+                    stopped = 'insufficient_funds'
+                    break
+                round_ = definition.play(bet_type)
+                amount_won = engine.payout(bet_amount, round_.multiplier)
+                balance += amount_won - bet_amount
+                rounds.append((bet_amount, bet_type, round_, amount_won, balance))
+
+            if rounds:
+                sessions = _create_batch_sessions(player_id, game, rounds, played_at)
+                for session, (bet_amount, _, _, amount_won, _) in zip(sessions, rounds):
+                    account.post(
+                        amount_won - bet_amount, 'game_round', f'game_session:{session.id}',
+                        require_funds=False
+                    )
+                rollups.record_game(
+                    player_id, played_at, played=len(rounds),
+                    won_round=sum(1 for r in rounds if r[2].result == 'won'),
+                    wagered=sum((r[0] for r in rounds), Decimal('0')),
+                    won=sum((r[3] for r in rounds), Decimal('0'))
+                )
+                realtime.publish(player_id, 'game_batch', {
+                    'game_id': game.id,
+                    'game_session_ids': [session.id for session in sessions],
+                    'rounds_played': len(rounds),
+                    'total_won': str(sum((r[3] for r in rounds), Decimal('0'))),
+                    'balance': str(account.balance),
+                })
+            final_balance = account.balance
+
+        if not rounds:
+            return Response(
+                {'error': 'Saldo insuficiente'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({
+            'rounds': [
+                {
+                    'game_session_id': session.id,
+                    'bet_type': bet_type,
+                    'bet_amount': str(bet_amount),
+                    'result': round_.result,
+                    'outcome': round_.outcome,
+                    'amount_won': str(amount_won),
+                    'balance': str(balance_after),
+                }
+                for session, (bet_amount, bet_type, round_, amount_won, balance_after)
+                in zip(sessions, rounds)
+            ],
+            'rounds_played': len(rounds),
+            'stopped': stopped,
+            'total_wagered': str(sum((r[0] for r in rounds), Decimal('0'))),
+            'total_won': str(sum((r[3] for r in rounds), Decimal('0'))),
+            'final_balance': str(final_balance),
+        })
+
+def _parse_amount(value):
+    """Monto de apuesta como Decimal; None si no es finito, > 0 y con hasta 2 decimales"""
+    try:
+        bet_amount = Decimal(str(value))
+        valid = bet_amount.is_finite() and bet_amount > 0 and bet_amount == bet_amount.quantize(engine.CENT)
+    except InvalidOperation:
+        valid = False
+    return bet_amount if valid else None
+
+def _parse_bets(bets, definition):
+    """Valida la lista de apuestas; devuelve ([(monto, tipo)], None) o (None, error)"""
+    max_rounds = settings.GAME_BATCH_MAX_ROUNDS
+    if not isinstance(bets, list) or not bets:
+        return None, 'Debe enviar una lista "bets" con al menos una apuesta'
+    if len(bets) > max_rounds:
+        return None, f'Se permiten como máximo {max_rounds} rondas por lote'
+    parsed = []
+    for position, bet in enumerate(bets, start=1):
+        if not isinstance(bet, dict):
+            return None, f'Apuesta {position}: formato inválido'
+        bet_amount = _parse_amount(bet.get('bet_amount', 0))
+        if bet_amount is None:
+            return None, f'Apuesta {position}: el monto debe ser mayor a 0 y con hasta 2 decimales'
+        bet_type = str(bet.get('bet_type') or definition.default_bet)
+        if bet_type not in definition.rounds:
+            return None, (
+                f'Apuesta {position}: tipo de apuesta inválido, '
+                f'use uno de: {", ".join(definition.bet_types)}'
+            )
+        parsed.append((bet_amount, bet_type))
+    return parsed, None
+
+def _create_batch_sessions(player_id, game, rounds, played_at):
+    """
+    Inserta las sesiones del lote en un solo INSERT. MySQL no devuelve los
+    ids de bulk_create: se releen por (jugador, juego, end_time del lote),
+    únicos mientras la cuenta del jugador está bloqueada.
+    """
+    sessions = [
+        GameSession(
+            player_id=player_id, game=game, bet_amount=bet_amount,
+            amount_won=amount_won, result=round_.result, end_time=played_at
+        )
+        for bet_amount, _, round_, amount_won, _ in rounds
+    ]
+    GameSession.objects.bulk_create(sessions)
+    if not connection.features.can_return_rows_from_bulk_insert:
+        ids = GameSession.objects.filter(
+            player_id=player_id, game=game, end_time=played_at
+        ).order_by('id').values_list('id', flat=True)
+        for session, session_id in zip(sessions, ids):
+            session.id = session_id
+    return sessions
+
+@transaction.atomic
+def play_round(player_id, game, data):
+    """
+    Resuelve una ronda de `game` para el jugador; devuelve (cuerpo, status).
+    La usan `play` y su variante async.
+    """
+    try:
+        player = Player.objects.get(pk=player_id)
+    except Player.DoesNotExist:
+        return {'error': 'Perfil de jugador no encontrado'}, status.HTTP_404_NOT_FOUND
+
+    bet_amount = _parse_amount(data.get('bet_amount', 0))
+    if bet_amount is None:
+        return (
+            {'error': 'El monto de apuesta debe ser mayor a 0 y con hasta 2 decimales'},
+            status.HTTP_400_BAD_REQUEST
+        )
+
+    definition = engine.get_definition(game.engine)
+    bet_type = str(data.get('bet_type') or definition.default_bet)
+    if bet_type not in definition.rounds:
+        return (
+            {'error': f'Tipo de apuesta inválido, use uno de: {", ".join(definition.bet_types)}'},
+            status.HTTP_400_BAD_REQUEST
+        )
+
+    # Bloquear la cuenta del jugador durante la ronda
+    with ledger.hold(player.id) as account:
+        if account.balance < bet_amount:
+            return {'error': 'Saldo insuficiente'}, status.HTTP_400_BAD_REQUEST
+
+        # Ronda resuelta por el motor: un sorteo del CSPRNG y una búsqueda en la tabla de pagos
+        round_ = definition.play(bet_type)
+        amount_won = engine.payout(bet_amount, round_.multiplier)
+        result = round_.result
+
+        # Crear GameSession
+        game_session = GameSession.objects.create(
+            player=player,
+            game=game,
+            bet_amount=bet_amount,
+            amount_won=amount_won,
+            result=result,
+            end_time=timezone.now()
+        )
+
+        # Un solo asiento con el neto de la ronda (ganancia - apuesta)
+        new_balance = account.post(
+            amount_won - bet_amount, 'game_round', f'game_session:{game_session.id}'
+        )
+        rollups.record_game(
+            player.id, game_session.start_time, played=1,
+            won_round=result == 'won', wagered=bet_amount, won=amount_won
+        )
+        realtime.publish(player.id, 'game_round', {
+            'game_session_id': game_session.id,
+            'game_id': game.id,
+            'result': result,
+            'outcome': round_.outcome,
+            'amount_won': str(amount_won),
+            'balance': str(new_balance),
+        })
+
+    return {
+        'result': result,
+        'outcome': round_.outcome,
+        'bet_type': bet_type,
+        'amount_won': str(amount_won),  # Mantener como string
+        'new_balance': str(new_balance),  # Mantener como string
+        'game_session_id': game_session.id,
+        'message': ROUND_MESSAGES[result].format(amount=amount_won)
+    }, status.HTTP_200_OK
+
+def _play_for_request(request, pk, data):
+    user = async_api.authenticated_user(request)
+    if user is None:
+        return async_api.NOT_AUTHENTICATED
+    try:
+        game = Game.objects.get(pk=pk)
+    except Game.DoesNotExist:
+        return {'error': 'Juego no encontrado'}, status.HTTP_404_NOT_FOUND
+    return play_round(player_cache.player_id_for(user), game, data)
+
+@async_api.endpoint('POST')
+async def play_async(request, pk, data):
+    """
+    Variante async de GameViewSet.play para ASGI: la ronda completa se
+    resuelve en un solo salto al pool de base de datos (ver casinoChill/async_api.py)
+    """
+    try:
+        return await async_api.run_db(_play_for_request, request, pk, data)
+    except Exception as e:
+        return (
+            {'error': f'Error interno del servidor: {str(e)}'},
+            status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+class GameSessionViewSet(OffsetPaginationMixin, QueryProfileMixin, viewsets.ModelViewSet):
     queryset = GameSession.objects.all()
     serializer_class = GameSessionSerializer
     permission_classes = [permissions.IsAuthenticated]
+    query_profiles = {
+        # GameSessionSerializer anida el PlayerSerializer completo: los jugadores
+        # se cargan en una sola consulta con su saldo, usuario, membresía y plan
+        '*': QueryProfile(
+            select=('game',),
+            prefetch=(
+                Prefetch('player', queryset=Player.objects.with_live_balance().select_related(
+                    'user', 'player_membership__plan'
+                )),
+            )
+        ),
+    }
 
     def create(self, request, *args, **kwargs):
         """
@@ -126,44 +339,114 @@ class GameSessionViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         user = self.request.user
+        queryset = self.apply_query_profile(GameSession.objects.all())
         if user.is_staff:
-            return GameSession.objects.all().order_by('-start_time')
+            return queryset.order_by('-start_time')
         
-        try:
-            player = Player.objects.get(user=user)
-            return GameSession.objects.filter(player=player).order_by('-start_time')
-        except Player.DoesNotExist:
+        player_id = player_cache.player_id_for(user)
+        if player_id is None:
             return GameSession.objects.none()
+        return queryset.filter(player_id=player_id).order_by('-start_time')
 
     def perform_create(self, serializer):
         try:
-            player = Player.objects.get(user=self.request.user)
-            serializer.save(player=player)
+            player = Player.objects.get(pk=player_cache.player_id_for(self.request.user))
+            session = serializer.save(player=player)
+            rollups.record_game(
+                player.id, session.start_time, played=1,
+                wagered=session.bet_amount, won=session.amount_won
+            )
         except Player.DoesNotExist:
             from rest_framework import serializers
             raise serializers.ValidationError("Perfil de jugador no encontrado")
 
-class GameListView(generics.ListAPIView):
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            before = rollups.game_contribution(serializer.instance)
+            session = serializer.save()
+            rollups.record_change(before, rollups.game_contribution(session))
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            before = rollups.game_contribution(instance)
+            instance.delete()
+            rollups.record_change(before, {})
+
+class GameListView(CatalogCacheMixin, generics.ListAPIView):
     queryset = Game.objects.all()
     serializer_class = GameSerializer
     permission_classes = [permissions.AllowAny]
+    pagination_class = None  # Catálogo acotado: se devuelve completo
+    catalog_name = 'games'
+
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 100
+
+def _encode_history_cursor(session):
+    """Cursor opaco con la posición (start_time, id) de la última fila de la página"""
+    raw = f'{session.start_time.isoformat()}|{session.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_history_cursor(cursor):
+    """Devuelve (start_time, id) o None; lanza ValueError si el cursor es inválido"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        start_time, session_id = raw.split('|')
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError('Cursor inválido') from e
+    parsed = parse_datetime(start_time)
+    if parsed is None:
+        raise ValueError('Cursor inválido')
+    return parsed, int(session_id)
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@reads_from_replica
 def player_game_history(request):
     try:
-        player = Player.objects.get(user=request.user)
-        game_sessions = GameSession.objects.filter(player=player).order_by('-start_time')
+        player = Player.objects.get(pk=player_cache.player_id_for(request.user))
         
-        serializer = GameSessionSerializer(game_sessions, many=True)
+        try:
+            page_size = min(int(request.query_params.get('page_size', HISTORY_PAGE_SIZE)), HISTORY_MAX_PAGE_SIZE)
+            position = _decode_history_cursor(request.query_params.get('cursor'))
+        except ValueError:
+            return Response(
+                {'error': 'Parámetros de paginación inválidos'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if page_size < 1:
+            page_size = HISTORY_PAGE_SIZE
+        
+        # Paginación por cursor sobre (start_time, id): cada página es un rango del índice
+        game_sessions = GameSession.objects.filter(player=player).select_related('game').only(
+            'id', 'game__id', 'game__name', 'bet_amount', 'amount_won', 'result', 'start_time', 'end_time'
+        ).order_by('-start_time', '-id')
+        if position:
+            start_time, session_id = position
+            game_sessions = game_sessions.filter(
+                models.Q(start_time__lt=start_time) | models.Q(start_time=start_time, id__lt=session_id)
+            )
+        
+        page = list(game_sessions[:page_size + 1])
+        next_cursor = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            next_cursor = _encode_history_cursor(page[-1])
         
-        total_games = game_sessions.count()
-        games_won = game_sessions.filter(result='won').count()
-        total_wagered = sum(session.bet_amount for session in game_sessions)
-        total_won = sum(session.amount_won for session in game_sessions)
+        serializer = GameSessionHistorySerializer(page, many=True)
+        
+        # Estadísticas desde los acumulados diarios
+        totals = rollups.summarize(player.id)
+        total_games = totals['games_played']
+        games_won = totals['games_won']
+        total_wagered = totals['total_wagered']
+        total_won = totals['total_won']
         
         return Response({
             'game_sessions': serializer.data,
+            'next_cursor': next_cursor,
             'statistics': {
                 'total_games': total_games,
                 'games_won': games_won,
@@ -192,7 +475,7 @@ def end_game_session(request, session_id):
     try:
         game_session = GameSession.objects.get(id=session_id)
         
-        player = Player.objects.get(user=request.user)
+        player = Player.objects.get(pk=player_cache.player_id_for(request.user))
         if game_session.player != player:
             return Response(
                 {'error': 'No tienes permiso para esta acción'}, 
@@ -208,20 +491,26 @@ def end_game_session(request, session_id):
         # Convertir a Decimal
         amount_won = Decimal(str(request.data.get('amount_won', 0)))
         
+        previous_won = game_session.amount_won
         game_session.end_time = timezone.now()
         game_session.result = request.data.get('result', 'completed')
         game_session.amount_won = amount_won
         
-        # Calcular cambio neto y actualizar balance de forma atómica
+        # Calcular cambio neto y registrarlo en el diario de saldo
         net_change = amount_won - game_session.bet_amount
-        Player.objects.filter(id=player.id).update(
-            balance=F('balance') + net_change
-        )
+        ledger.adjust(player.id, net_change, 'game_session', f'game_session:{game_session.id}')
         
         game_session.save()
-        
-        # Obtener jugador actualizado
-        player.refresh_from_db()
+        rollups.record_game(
+            player.id, game_session.start_time,
+            won_round=game_session.result == 'won', won=amount_won - previous_won
+        )
+        realtime.publish(player.id, 'game_round', {
+            'game_session_id': game_session.id,
+            'game_id': game_session.game_id,
+            'result': game_session.result,
+            'amount_won': str(amount_won),
+        })
         
         serializer = GameSessionSerializer(game_session)
         return Response(serializer.data)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MembershipsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'backend.apps.memberships'
+
+    def ready(self):
+        from casinoChill.catalog_cache import register
+        register(self.get_model('MembershipPlan'), 'membership_plans')
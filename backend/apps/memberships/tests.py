@@ -1,3 +1,42 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from casinoChill.testing import QueryCountMixin
+from backend.apps.players.tests import create_player
+from .models import MembershipPlan, MembershipHistory
 
-# Create your tests here.
+
+class MembershipQueryCountTests(QueryCountMixin, APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create(username='staff', is_staff=True)
+        self.client.force_authenticate(self.staff)
+        self.bronze = MembershipPlan.objects.create(
+            name='Free', tier='bronze', description='', valid_from=timezone.now()
+        )
+        self.silver = MembershipPlan.objects.create(
+            name='Silver', tier='silver', description='', valid_from=timezone.now()
+        )
+        self.counter = 0
+
+    def add_history(self, count):
+        for _ in range(count):
+            self.counter += 1
+            player = create_player(f'player{self.counter}', self.bronze)
+            MembershipHistory.objects.create(
+                player=player, from_plan=self.bronze, to_plan=self.silver
+            )
+
+    def add_memberships(self, count):
+        for _ in range(count):
+            self.counter += 1
+            create_player(f'player{self.counter}', self.bronze)
+
+    def test_membership_history_list(self):
+        self.assertConstantQueries(
+            '/api/memberships/history/', self.add_history, expected=1
+        )
+
+    def test_player_membership_list(self):
+        self.assertConstantQueries(
+            '/api/memberships/player-memberships/', self.add_memberships, expected=1
+        )
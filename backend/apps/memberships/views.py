@@ -10,27 +10,39 @@ from .serializers import *
 from backend.apps.games.models import GameSession
 from backend.apps.transactions.models import Transaction
 from backend.apps.memberships.models import Membership
+from backend.apps.players import player_cache, rollups
+from casinoChill.query_profiles import QueryProfile, QueryProfileMixin
+from casinoChill.catalog_cache import CatalogCacheMixin
+from casinoChill.replicas import ReplicaReadMixin
 
-class MembershipPlanViewSet(viewsets.ReadOnlyModelViewSet):
+class MembershipPlanViewSet(ReplicaReadMixin, CatalogCacheMixin, viewsets.ReadOnlyModelViewSet):
     queryset = MembershipPlan.objects.filter(is_active=True)
     serializer_class = MembershipPlanSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = None  # Catálogo acotado: se devuelve completo
+    catalog_name = 'membership_plans'
+    # El listado se cachea por versión: se llena desde el primario para no
+    # guardar datos de una réplica atrasada bajo la versión nueva
+    replica_actions = ('retrieve',)
 
-class PlayerMembershipViewSet(viewsets.ModelViewSet):
+class PlayerMembershipViewSet(ReplicaReadMixin, QueryProfileMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     serializer_class = PlayerMembershipSerializer
+    query_profiles = {'*': QueryProfile(select=('player__user', 'plan'))}
+    replica_actions = ('statistics',)
     
     def get_queryset(self):
         user = self.request.user
+        queryset = self.apply_query_profile(Membership.objects.all())
         if user.is_staff:
-            return Membership.objects.all()
-        return Membership.objects.filter(player=user.player)
+            return queryset
+        return queryset.filter(player_id=player_cache.player_id_for(user))
     
     @action(detail=False, methods=['get'])
     def my_membership(self, request):
         """Obtener la membresía del jugador actual"""
         try:
-            membership = Membership.objects.get(player=request.user.player)
+            membership = self.get_queryset().get(player_id=player_cache.player_id_for(request.user))
             serializer = self.get_serializer(membership)
             return Response(serializer.data)
         except Membership.DoesNotExist:
@@ -42,26 +54,15 @@ class PlayerMembershipViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def statistics(self, request):
         """Estadísticas del jugador para segmentación"""
-        player = request.user.player
-        thirty_days_ago = timezone.now() - timedelta(days=30)
+        player_id = player_cache.player_id_for(request.user)
+        thirty_days_ago = timezone.localdate() - timedelta(days=30)
         
-        # Estadísticas de juego
-        game_sessions = GameSession.objects.filter(
-            player=player, 
-            start_time__gte=thirty_days_ago
-        )
-        total_games = game_sessions.count()
-        total_wagered = sum(session.bet_amount for session in game_sessions)
-        total_won = sum(session.amount_won for session in game_sessions)
-        
-        # Estadísticas de transacciones
-        deposits = Transaction.objects.filter(
-            player=player,
-            transaction_type='deposit',
-            status='completed',
-            created_at__gte=thirty_days_ago
-        )
-        total_deposits = sum(deposit.amount for deposit in deposits)
+        # Estadísticas de juego y depósitos desde los acumulados diarios
+        totals = rollups.summarize(player_id, start_day=thirty_days_ago)
+        total_games = totals['games_played']
+        total_wagered = totals['total_wagered']
+        total_won = totals['total_won']
+        total_deposits = totals['deposits_total']
         
         return Response({
             'last_30_days': {
@@ -73,12 +74,14 @@ class PlayerMembershipViewSet(viewsets.ModelViewSet):
             }
         })
 
-class MembershipHistoryViewSet(viewsets.ReadOnlyModelViewSet):
+class MembershipHistoryViewSet(ReplicaReadMixin, QueryProfileMixin, viewsets.ReadOnlyModelViewSet):
     permission_classes = [IsAuthenticated]
     serializer_class = MembershipHistorySerializer
+    query_profiles = {'*': QueryProfile(select=('player__user', 'from_plan', 'to_plan'))}
     
     def get_queryset(self):
         user = self.request.user
+        queryset = self.apply_query_profile(MembershipHistory.objects.all())
         if user.is_staff:
-            return MembershipHistory.objects.all()
-        return MembershipHistory.objects.filter(player=user.player)
\ No newline at end of file
+            return queryset
+        return queryset.filter(player_id=player_cache.player_id_for(user))
\ No newline at end of file
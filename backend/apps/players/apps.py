@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class PlayersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'backend.apps.players'
+
+    def ready(self):
+        from . import signals  # noqa: F401
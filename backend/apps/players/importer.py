@@ -0,0 +1,284 @@
+# backend/apps/players/importer.py
+"""
+Importación masiva de jugadores (CSV o NDJSON).
+
+Las filas se leen en streaming y se procesan por lotes: una consulta por lote
+para detectar usernames/emails ya registrados, hash de contraseñas (en un
+pool de procesos desde el comando, en el mismo proceso desde el endpoint) y
+bulk_create de usuarios, jugadores y membresías bronce dentro de una
+transacción por lote. Las filas inválidas no detienen la importación:
+se reportan con su número de línea.
+
+Columnas: username, email, password (o password_hash con un hash de Django
+ya calculado, que se guarda tal cual), name, last_name.
+"""
+import csv
+import io
+import json
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+import django
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.contrib.auth.models import User
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import DataError, IntegrityError, connection, transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+from . import registration
+from .models import Player
+
+FORMATS = ('csv', 'ndjson')
+
+DEFAULT_CHUNK_SIZE = 1000
+
+TEXT_FIELDS = ('username', 'email', 'password', 'password_hash', 'name', 'last_name')
+
+username_validator = UnicodeUsernameValidator()
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def error(self, line, row, message):
+        self.errors.append({
+            'line': line,
+            'username': (row or {}).get('username', ''),
+            'error': message,
+        })
+
+    def as_dict(self):
+        return {'created': self.created, 'errors': self.errors}
+
+
+def read_rows(stream, file_format):
+    """Genera (número de línea, fila) desde un archivo de texto CSV o NDJSON"""
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for line_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_number, None
+            continue
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def text_stream(binary):
+    """Envuelve un archivo binario (p. ej. un upload) como texto UTF-8"""
+    return io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+
+
+def _text(value):
+    """Valor de una columna como texto; ValueError si no es un escalar"""
+    if value is None:
+        return ''
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError
+    return str(value)
+
+
+def _max_length(model, field):
+    return model._meta.get_field(field).max_length
+
+
+def _clean(line, row, result):
+    """Normaliza una fila; devuelve None (y registra el error) si es inválida"""
+    if row is None:
+        result.error(line, row, 'Fila ilegible')
+        return None
+    values = {}
+    for field in TEXT_FIELDS:
+        try:
+            values[field] = _text(row.get(field))
+        except ValueError:
+            result.error(line, row, f'Valor inválido en la columna {field}')
+            return None
+    username = values['username'].strip()
+    # Misma normalización que el registro (registration.register_player)
+    email = User.objects.normalize_email(values['email'].strip())
+    password = values['password']
+    password_hash = values['password_hash'].strip()
+    name = values['name'].strip()
+    last_name = values['last_name'].strip()
+    if not username or not email or not (password or password_hash):
+        result.error(line, row, 'Usuario, contraseña y correo son obligatorios')
+        return None
+    # Mismas reglas que el registro (UserSerializer): caracteres y longitud
+    try:
+        username_validator(username)
+    except ValidationError:
+        result.error(line, row, 'Nombre de usuario inválido')
+        return None
+    for field, value, model in (
+        ('username', username, User), ('email', email, User),
+        ('name', name, Player), ('last_name', last_name, Player),
+    ):
+        max_length = _max_length(model, field)
+        if len(value) > max_length:
+            result.error(line, row, f'La columna {field} supera los {max_length} caracteres')
+            return None
+    try:
+        validate_email(email)
+    except ValidationError:
+        result.error(line, row, 'Correo electrónico inválido')
+        return None
+    if password_hash:
+        try:
+            identify_hasher(password_hash)
+        except ValueError:
+            result.error(line, row, 'Hash de contraseña no reconocido')
+            return None
+    return {
+        'line': line,
+        'username': username,
+        'email': email,
+        'password': password,
+        'password_hash': password_hash,
+        'name': name,
+        'last_name': last_name,
+    }
+
+
+def _drop_duplicates(rows, result):
+    """Descarta filas cuyo username o email ya existe (en la base o antes en el lote)"""
+    usernames = {row['username'].lower() for row in rows}
+    emails = {row['email'].lower() for row in rows}
+    taken_usernames = set(
+        User.objects.annotate(username_lower=Lower('username'))
+        .filter(username_lower__in=usernames).values_list('username_lower', flat=True)
+    ) if usernames else set()
+    taken_emails = set(
+        User.objects.annotate(email_lower=Lower('email'))
+        .filter(email_lower__in=emails).values_list('email_lower', flat=True)
+    ) if emails else set()
+
+    unique = []
+    for row in rows:
+        username, email = row['username'].lower(), row['email'].lower()
+        if username in taken_usernames:
+            result.error(row['line'], row, 'El nombre de usuario ya existe')
+        elif email in taken_emails:
+            result.error(row['line'], row, 'Este correo electrónico ya está registrado')
+        else:
+            taken_usernames.add(username)
+            taken_emails.add(email)
+            unique.append(row)
+    return unique
+
+
+def _created_ids(model, objects, key_field, keys):
+    """
+    PKs de los objetos recién insertados. MySQL no los devuelve en
+    bulk_create, así que se releen por una columna única.
+    """
+    if connection.features.can_return_rows_from_bulk_insert:
+        return {getattr(obj, key_field): obj.pk for obj in objects}
+    return dict(
+        model.objects.filter(**{f'{key_field}__in': keys}).values_list(key_field, 'pk')
+    )
+
+
+def _insert(rows, hashes, plan_id):
+    """Inserta un lote ya validado; devuelve los usuarios creados"""
+    from backend.apps.memberships.models import Membership
+    now = timezone.now()
+    with transaction.atomic():
+        users = User.objects.bulk_create([
+            User(username=row['username'], email=row['email'], password=password_hash, date_joined=now)
+            for row, password_hash in zip(rows, hashes)
+        ])
+        user_ids = _created_ids(User, users, 'username', [row['username'] for row in rows])
+
+        players = Player.objects.bulk_create([
+            Player(user_id=user_ids[row['username']], name=row['name'], last_name=row['last_name'])
+            for row in rows
+        ])
+        player_ids = _created_ids(Player, players, 'user_id', list(user_ids.values()))
+
+        Membership.objects.bulk_create([
+            Membership(
+                player_id=player_id,
+                plan_id=plan_id,
+                expires_at=now + timedelta(days=registration.MEMBERSHIP_DAYS),
+                is_active=True
+            )
+            for player_id in player_ids.values()
+        ])
+    return users
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+@contextmanager
+def _password_hasher(workers):
+    """
+    Función que hashea una lista de contraseñas: en este proceso con
+    workers=0 (peticiones HTTP) o en un pool de procesos (comando).
+    """
+    if workers == 0:
+        yield lambda passwords: map(make_password, passwords)
+        return
+    # django.setup() deja listos los procesos hijos también con el método 'spawn'
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        yield lambda passwords: pool.map(make_password, passwords, chunksize=max(1, len(passwords) // 32))
+
+
+def import_players(rows, chunk_size=DEFAULT_CHUNK_SIZE, workers=None, on_chunk=None):
+    """
+    Importa las filas (pares (línea, dict) de `read_rows`) y devuelve un
+    ImportResult. `workers` es la cantidad de procesos que hashean
+    contraseñas (None = uno por núcleo, 0 = en este proceso).
+    `on_chunk(result)` se llama después de cada lote.
+    """
+    from backend.apps.authentication.backends import forget_unknown
+
+    result = ImportResult()
+    plan_id = registration.bronze_plan_id()
+    with _password_hasher(workers) as hash_passwords:
+        for chunk in _chunks(rows, chunk_size):
+            cleaned = [row for row in (_clean(line, row, result) for line, row in chunk) if row]
+            valid = _drop_duplicates(cleaned, result)
+            if not valid:
+                continue
+
+            to_hash = [row['password'] for row in valid if not row['password_hash']]
+            hashed = iter(hash_passwords(to_hash))
+            hashes = [row['password_hash'] or next(hashed) for row in valid]
+
+            try:
+                _insert(valid, hashes, plan_id)
+            except IntegrityError:
+                # Un registro concurrente ganó algún username o email: se informa el lote completo
+                for row in valid:
+                    result.error(row['line'], row, 'Conflicto al insertar el lote, reintente estas filas')
+            except DataError:
+                # Un valor que la base rechaza pese a la validación: el lote no se inserta
+                for row in valid:
+                    result.error(row['line'], row, 'La base de datos rechazó el lote, revise estas filas')
+            else:
+                result.created += len(valid)
+                forget_unknown(*[row['username'] for row in valid], *[row['email'] for row in valid])
+
+            if on_chunk:
+                on_chunk(result)
+    return result
@@ -0,0 +1,186 @@
+# backend/apps/players/ledger.py
+"""
+Diario de saldo (append-only) de los jugadores.
+
+El saldo de un jugador es su checkpoint (`Player.balance`, consolidado hasta
+el asiento `Player.balance_seq`) más la suma de los asientos posteriores.
+Ningún movimiento hace UPDATE del saldo: cada uno agrega un asiento con el
+siguiente número de secuencia del jugador.
+
+- Los abonos (`credit`) no bloquean al jugador; la unicidad de
+  (player, seq) resuelve las carreras reintentando con la siguiente secuencia.
+- Los cargos que exigen fondos (`hold`) bloquean la fila del jugador para
+  que la validación de saldo sea consistente entre cargos concurrentes.
+- `fold` consolida la cola de asientos en el checkpoint; se ejecuta cuando la
+  cola supera FOLD_THRESHOLD y desde el comando `snapshot_balances`.
+"""
+from contextlib import contextmanager
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from casinoChill import realtime
+from .models import Player, BalanceEntry
+from . import player_cache
+
+# Asientos sin consolidar a partir de los cuales se consolida en línea
+FOLD_THRESHOLD = 50
+
+CENT = Decimal('0.01')
+
+# Reintentos ante colisión de secuencia con otro abono concurrente
+MAX_SEQ_ATTEMPTS = 5
+
+
+class InsufficientFunds(Exception):
+    pass
+
+
+def get_balance(player_id):
+    """Saldo actual del jugador (checkpoint + cola) en una sola consulta"""
+    balance = Player.objects.with_live_balance().values_list(
+        'live_balance', flat=True
+    ).get(pk=player_id)
+    return Decimal(balance).quantize(CENT)
+
+
+def _locked_state(player_id):
+    """
+    Bloquea al jugador y su cola de asientos. Devuelve
+    (checkpoint, balance_seq, cola) donde cola es una lista de (seq, amount).
+    Las lecturas con bloqueo ven siempre los últimos asientos confirmados.
+    """
+    balance, balance_seq = Player.objects.select_for_update().values_list(
+        'balance', 'balance_seq'
+    ).get(pk=player_id)
+    tail = list(
+        BalanceEntry.objects.select_for_update().filter(
+            player_id=player_id, seq__gt=balance_seq
+        ).values_list('seq', 'amount')
+    )
+    return balance, balance_seq, tail
+
+
+def _last_seq(player_id):
+    """Última secuencia del jugador, con lectura bloqueante"""
+    last = BalanceEntry.objects.select_for_update().filter(
+        player_id=player_id
+    ).order_by('-seq').values_list('seq', flat=True).first()
+    return last or 0
+
+
+def _append(player_id, entries, last_seq):
+    """Inserta los asientos a partir de last_seq + 1, reintentando si otro abono ganó la secuencia"""
+    for attempt in range(MAX_SEQ_ATTEMPTS):
+        for offset, entry in enumerate(entries, start=1):
+            entry.seq = last_seq + offset
+        try:
+            with transaction.atomic():
+                BalanceEntry.objects.bulk_create(entries)
+            player_cache.invalidate(player_id)
+            return entries[-1].seq
+        except IntegrityError:
+            if attempt == MAX_SEQ_ATTEMPTS - 1:
+                raise
+            last_seq = _last_seq(player_id)
+
+
+def _notify(player_id, balance):
+    """Envía el saldo nuevo por WebSocket al confirmar la transacción"""
+    realtime.publish(player_id, 'balance', {'balance': str(Decimal(balance).quantize(CENT))})
+
+
+class Account:
+    """Cuenta de un jugador bloqueada dentro de `hold`"""
+
+    def __init__(self, player_id, balance):
+        self.player_id = player_id
+        self.balance = balance
+        self.entries = []
+
+    def post(self, amount, kind, reference='', require_funds=True):
+        """Registra un asiento y devuelve el saldo resultante"""
+        amount = Decimal(str(amount))
+        if require_funds and amount < 0 and self.balance + amount < 0:
+            raise InsufficientFunds('Saldo insuficiente')
+        self.balance += amount
+        self.entries.append(BalanceEntry(
+            player_id=self.player_id,
+            amount=amount,
+            kind=kind,
+            reference=reference
+        ))
+        return self.balance
+
+
+@contextmanager
+def hold(player_id):
+    """
+    Bloquea la cuenta del jugador para validar fondos y registrar asientos.
+    Los asientos se insertan en bloque al salir del contexto.
+    """
+    with transaction.atomic():
+        balance, balance_seq, tail = _locked_state(player_id)
+        account = Account(player_id, balance + sum((amount for _, amount in tail), Decimal('0')))
+        last_seq = max((seq for seq, _ in tail), default=balance_seq)
+
+        yield account
+
+        if account.entries:
+            _append(player_id, account.entries, last_seq)
+            _notify(player_id, account.balance)
+            if len(tail) + len(account.entries) >= FOLD_THRESHOLD:
+                fold(player_id)
+
+
+def debit(player_id, amount, kind, reference='', require_funds=True):
+    """Carga `amount` al jugador y devuelve el nuevo saldo"""
+    with hold(player_id) as account:
+        return account.post(-Decimal(str(amount)), kind, reference, require_funds)
+
+
+def adjust(player_id, amount, kind, reference=''):
+    """Aplica un ajuste con signo sin validar fondos (reversos, cierres de sesión)"""
+    amount = Decimal(str(amount))
+    if amount >= 0:
+        return credit(player_id, amount, kind, reference)
+    return debit(player_id, -amount, kind, reference, require_funds=False)
+
+
+def credit(player_id, amount, kind, reference=''):
+    """Abona `amount` al jugador sin bloquear su fila y devuelve el nuevo saldo"""
+    amount = Decimal(str(amount))
+    with transaction.atomic():
+        checkpoint, balance, balance_seq, tail_last_seq = Player.objects.with_live_balance().annotate(
+            tail_last_seq=Max('tail_entries__seq')
+        ).values_list('balance', 'live_balance', 'balance_seq', 'tail_last_seq').get(pk=player_id)
+        last_seq = tail_last_seq or balance_seq
+
+        entry = BalanceEntry(player_id=player_id, amount=amount, kind=kind, reference=reference)
+        seq = _append(player_id, [entry], last_seq)
+        if seq != last_seq + 1:
+            # Otro abono concurrente se adelantó: el saldo es el checkpoint leído
+            # más los asientos hasta el nuestro. La lectura bloqueante ve los
+            # confirmados (una lectura simple podría devolver la foto vieja de
+            # REPEATABLE READ)
+            amounts = BalanceEntry.objects.select_for_update().filter(
+                player_id=player_id, seq__gt=balance_seq, seq__lte=seq
+            ).values_list('amount', flat=True)
+            new_balance = (Decimal(checkpoint) + sum(amounts, Decimal('0'))).quantize(CENT)
+        else:
+            new_balance = (Decimal(balance) + amount).quantize(CENT)
+        _notify(player_id, new_balance)
+        return new_balance
+
+
+def fold(player_id):
+    """Consolida la cola de asientos del jugador en su checkpoint"""
+    with transaction.atomic():
+        balance, balance_seq, tail = _locked_state(player_id)
+        if not tail:
+            return balance
+        new_balance = balance + sum((amount for _, amount in tail), Decimal('0'))
+        Player.objects.filter(pk=player_id).update(
+            balance=new_balance,
+            balance_seq=max(seq for seq, _ in tail)
+        )
+        return new_balance
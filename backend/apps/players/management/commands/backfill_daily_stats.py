@@ -0,0 +1,73 @@
+from collections import defaultdict
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncDate
+from backend.apps.players.models import PlayerDailyStats
+from backend.apps.players.rollups import DEFAULT_CURRENCY, TRANSACTION_FIELDS
+from backend.apps.games.models import GameSession
+from backend.apps.transactions.models import Transaction
+
+class Command(BaseCommand):
+    help = 'Reconstruye los acumulados diarios (PlayerDailyStats) desde el historial'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--player', type=int, help='Reconstruir solo este jugador')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        transactions = Transaction.objects.all()
+        sessions = GameSession.objects.all()
+        existing = PlayerDailyStats.objects.all()
+        if options['player']:
+            transactions = transactions.filter(player_id=options['player'])
+            sessions = sessions.filter(player_id=options['player'])
+            existing = existing.filter(player_id=options['player'])
+
+        rows = defaultdict(dict)
+
+        def add(key, field, value):
+            rows[key][field] = rows[key].get(field, 0) + value
+
+        # Transacciones agrupadas por jugador, día, moneda, tipo y estado
+        transaction_groups = transactions.annotate(day=TruncDate('created_at')).order_by().values(
+            'player_id', 'day', 'currency', 'transaction_type', 'status'
+        ).annotate(total=Sum('amount'), count=Count('id'))
+        for group in transaction_groups.iterator():
+            key = (group['player_id'], group['day'], group['currency'])
+            add(key, 'transaction_count', group['count'])
+            if group['status'] == 'completed':
+                total_field, count_field = TRANSACTION_FIELDS[group['transaction_type']]
+                add(key, total_field, group['total'])
+                add(key, count_field, group['count'])
+
+        # Sesiones de juego agrupadas por jugador y día de inicio
+        session_groups = sessions.annotate(day=TruncDate('start_time')).order_by().values(
+            'player_id', 'day'
+        ).annotate(
+            played=Count('id'),
+            won_rounds=Count('id', filter=Q(result='won')),
+            wagered=Sum('bet_amount'),
+            won=Sum('amount_won')
+        )
+        for group in session_groups.iterator():
+            key = (group['player_id'], group['day'], DEFAULT_CURRENCY)
+            add(key, 'games_played', group['played'])
+            add(key, 'games_won', group['won_rounds'])
+            add(key, 'total_wagered', group['wagered'] or Decimal('0'))
+            add(key, 'total_won', group['won'] or Decimal('0'))
+
+        with transaction.atomic():
+            existing.delete()
+            PlayerDailyStats.objects.bulk_create(
+                (
+                    PlayerDailyStats(player_id=player_id, day=day, currency=currency, **fields)
+                    for (player_id, day, currency), fields in rows.items()
+                ),
+                batch_size=options['batch_size']
+            )
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Se reconstruyeron {len(rows)} filas de acumulados diarios')
+        )
@@ -0,0 +1,124 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connections
+from django.db.backends.signals import connection_created
+from casinoChill import mysql_pool
+
+# Configuración de conexiones de cada modo (CONN_MAX_AGE, tamaño del pool)
+MODES = {
+    'fresh': {'CONN_MAX_AGE': 0, 'POOL': 0},
+    'persistent': {'CONN_MAX_AGE': 600, 'POOL': 0},
+    'pool': {'CONN_MAX_AGE': 0, 'POOL': None},  # tamaño según --pool-size
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el costo de conexión por petición contra la base de datos configurada '
+        '(p. ej. el servicio `db` de docker-compose): conexión nueva por petición, '
+        'conexiones persistentes y pool, con N hilos concurrentes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Peticiones simuladas por modo')
+        parser.add_argument('--threads', type=int, default=8, help='Hilos concurrentes')
+        parser.add_argument('--pool-size', type=int, default=4, help='Conexiones del pool en el modo pool')
+        parser.add_argument(
+            '--mode', action='append', choices=list(MODES),
+            help='Modo a medir (repetible; por defecto todos)'
+        )
+        parser.add_argument('--query', default='SELECT 1', help='Consulta de cada petición')
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1 or options['threads'] < 1 or options['pool_size'] < 1:
+            raise CommandError('--requests, --threads y --pool-size deben ser mayores que 0')
+        alias = options['database']
+        connection = connections[alias]
+        if connection.vendor != 'mysql':
+            raise CommandError('El benchmark es para MySQL (servicio `db` de docker-compose)')
+        modes = options['mode'] or list(MODES)
+        if 'pool' in modes and type(connection).__module__ != 'casinoChill.mysql_pool.base':
+            raise CommandError("El modo pool requiere ENGINE = 'casinoChill.mysql_pool'")
+
+        settings_dict = settings.DATABASES[alias]
+        original = (settings_dict['CONN_MAX_AGE'], settings_dict.get('POOL'))
+        try:
+            for mode in modes:
+                config = MODES[mode]
+                settings_dict['CONN_MAX_AGE'] = config['CONN_MAX_AGE']
+                settings_dict['POOL'] = {
+                    **(original[1] or {}),
+                    'MAX_SIZE': options['pool_size'] if config['POOL'] is None else 0,
+                }
+                self._report(mode, self._run(alias, options))
+                mysql_pool.close_all()
+        finally:
+            settings_dict['CONN_MAX_AGE'], settings_dict['POOL'] = original
+
+    def _run(self, alias, options):
+        latencies = []
+        opened = [0]
+        lock = threading.Lock()
+
+        def on_connect(sender, connection, **kwargs):
+            if connection.alias == alias:
+                with lock:
+                    opened[0] += 1
+
+        def worker(count):
+            timings = []
+            try:
+                for _ in range(count):
+                    # Mismo ciclo de vida que una petición: request_started y request_finished
+                    start = time.perf_counter()
+                    close_old_connections()
+                    with connections[alias].cursor() as cursor:
+                        cursor.execute(options['query'])
+                        cursor.fetchall()
+                    close_old_connections()
+                    timings.append(time.perf_counter() - start)
+            finally:
+                connections[alias].close()
+            with lock:
+                latencies.extend(timings)
+
+        threads = options['threads']
+        share, extra = divmod(options['requests'], threads)
+        connection_created.connect(on_connect)
+        try:
+            begin = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                for future in [
+                    executor.submit(worker, share + (1 if i < extra else 0)) for i in range(threads)
+                ]:
+                    future.result()
+            elapsed = time.perf_counter() - begin
+        finally:
+            connection_created.disconnect(on_connect)
+        return latencies, opened[0], elapsed, mysql_pool.stats()
+
+    def _report(self, mode, result):
+        latencies, opened, elapsed, pools = result
+        latencies.sort()
+        if mode != 'pool':
+            pools = {}
+        else:
+            # Con pool, connection_created se emite en cada préstamo: cuentan las físicas
+            opened = sum(stats['created'] for stats in pools.values())
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        self.stdout.write(
+            f'{mode:<11} {len(latencies) / elapsed:>9,.0f} req/s   '
+            f'mediana {statistics.median(latencies) * 1000:.2f} ms   p99 {p99 * 1000:.2f} ms   '
+            f'conexiones abiertas {opened}'
+        )
+        for key, stats in pools.items():
+            if stats['acquired']:
+                self.stdout.write(
+                    f'            pool {key}: espera media {stats["wait_ms_avg"]} ms, '
+                    f'máx {stats["wait_ms_max"]} ms, {stats["waited"]} de {stats["acquired"]} esperaron'
+                )
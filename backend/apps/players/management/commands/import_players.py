@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from backend.apps.players import importer
+
+
+class Command(BaseCommand):
+    help = 'Importa jugadores desde un archivo CSV o NDJSON (usuario, jugador y membresía bronce)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Archivo a importar')
+        parser.add_argument(
+            '--format', choices=importer.FORMATS,
+            help='Formato del archivo (por defecto se deduce de la extensión)'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=importer.DEFAULT_CHUNK_SIZE,
+            help='Filas por lote (una transacción por lote)'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=settings.PLAYER_IMPORT_WORKERS,
+            help='Procesos que hashean contraseñas (por defecto uno por núcleo)'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or (
+            'ndjson' if path.lower().endswith(('.ndjson', '.jsonl')) else 'csv'
+        )
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size debe ser mayor que 0')
+
+        def progress(result):
+            self.stdout.write(f'{result.created} creados, {len(result.errors)} errores')
+
+        try:
+            with open(path, encoding='utf-8-sig', newline='') as stream:
+                result = importer.import_players(
+                    importer.read_rows(stream, file_format),
+                    chunk_size=options['chunk_size'],
+                    workers=options['workers'],
+                    on_chunk=progress,
+                )
+        except OSError as exc:
+            raise CommandError(f'No se pudo leer {path}: {exc}')
+
+        for error in result.errors:
+            self.stderr.write(f"Línea {error['line']} ({error['username']}): {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f'Se importaron {result.created} jugadores ({len(result.errors)} filas con error)'
+        ))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F
+from backend.apps.players.models import BalanceEntry
+from backend.apps.players import ledger
+
+class Command(BaseCommand):
+    help = 'Consolida el diario de saldo en el checkpoint de cada jugador'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-tail', type=int, default=1,
+            help='Consolidar solo jugadores con al menos N asientos pendientes'
+        )
+
+    def handle(self, *args, **options):
+        pending = BalanceEntry.objects.filter(
+            seq__gt=F('player__balance_seq')
+        ).values('player_id').annotate(
+            tail=Count('id')
+        ).filter(tail__gte=options['min_tail']).values_list('player_id', flat=True)
+
+        folded = 0
+        for player_id in pending.iterator():
+            ledger.fold(player_id)
+            folded += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Se consolidaron los saldos de {folded} jugadores')
+        )
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='balance_seq',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='BalanceEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.PositiveBigIntegerField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('kind', models.CharField(max_length=30)),
+                ('reference', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_entries', to='players.player')),
+            ],
+            options={
+                'ordering': ['player', 'seq'],
+                'unique_together': {('player', 'seq')},
+            },
+        ),
+    ]
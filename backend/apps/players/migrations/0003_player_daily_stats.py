@@ -0,0 +1,40 @@
+# Generated by Django 5.1.4 on 2026-10-18 13:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0002_balance_journal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('currency', models.CharField(default='USD', max_length=3)),
+                ('deposits_total', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('deposits_count', models.PositiveIntegerField(default=0)),
+                ('withdrawals_total', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('withdrawals_count', models.PositiveIntegerField(default=0)),
+                ('wins_total', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('wins_count', models.PositiveIntegerField(default=0)),
+                ('losses_total', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('losses_count', models.PositiveIntegerField(default=0)),
+                ('transaction_count', models.PositiveIntegerField(default=0)),
+                ('games_played', models.PositiveIntegerField(default=0)),
+                ('games_won', models.PositiveIntegerField(default=0)),
+                ('total_wagered', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('total_won', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='players.player')),
+            ],
+            options={
+                'ordering': ['-day'],
+                'unique_together': {('player', 'day', 'currency')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:00
+
+from django.db import migrations, models
+
+
+def mark_ready(apps, schema_editor):
+    # Solo los QR generados con el formato vigente (player:<id>) quedan listos;
+    # el resto (p. ej. qr_None.png) queda pendiente y se regenera en la cola
+    Player = apps.get_model('players', 'Player')
+    Player.objects.filter(qr_code__startswith='qrcodes/qr_player_').update(qr_status='ready')
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0003_player_daily_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='qr_status',
+            field=models.CharField(choices=[('pending', 'Pendiente'), ('ready', 'Listo')], db_index=True, default='pending', max_length=10),
+        ),
+        migrations.RunPython(mark_ready, migrations.RunPython.noop),
+    ]
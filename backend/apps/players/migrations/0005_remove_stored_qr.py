@@ -0,0 +1,21 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:02
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('players', '0004_player_qr_status'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='player',
+            name='qr_code',
+        ),
+        migrations.RemoveField(
+            model_name='player',
+            name='qr_status',
+        ),
+    ]
@@ -1,42 +1,99 @@
-import qrcode
-from io import BytesIO
-from django.core.files import File
+from decimal import Decimal
 from django.db import models
+from django.db.models import F, Q, Sum, Value, FilteredRelation
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User 
 
+class PlayerQuerySet(models.QuerySet):
+    def with_live_balance(self):
+        """Anota `live_balance`: checkpoint más los asientos aún no consolidados"""
+        return self.alias(
+            tail_entries=FilteredRelation(
+                'balance_entries',
+                condition=Q(balance_entries__seq__gt=F('balance_seq'))
+            )
+        ).annotate(
+            live_balance=F('balance') + Coalesce(
+                Sum('tail_entries__amount'), Value(Decimal('0')),
+                output_field=models.DecimalField(max_digits=15, decimal_places=2)
+            )
+        )
+
 class Player(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
     join_date = models.DateTimeField(auto_now_add=True)
+    # Checkpoint del saldo: consolidado hasta el asiento `balance_seq` del diario
     balance = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
-    qr_code = models.ImageField(upload_to='qrcodes/', blank=True, null=True)
+    balance_seq = models.PositiveBigIntegerField(default=0)
+
+    objects = PlayerQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.name} {self.last_name}"
 
     def save(self, *args, **kwargs):
-        # Generar código QR solo si es un nuevo jugador o no tiene QR
-        if not self.qr_code:
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
-            )
-            # Usar datos más significativos para el QR
-            qr_data = f"Player:{self.user.username}|Name:{self.name} {self.last_name}" if self.id else "Player:New"
-            qr.add_data(qr_data)
-            qr.make(fit=True)
+        # El saldo solo lo modifica el diario (ledger): un save() de un objeto
+        # en memoria no debe pisar el checkpoint consolidado
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in ('balance', 'balance_seq')
+            ]
+
+        super().save(*args, **kwargs)
 
-            img = qr.make_image(fill_color="black", back_color="white")
+class BalanceEntry(models.Model):
+    """
+    Asiento del diario de saldo. Solo se agregan, nunca se modifican:
+    el saldo de un jugador es su checkpoint más los asientos posteriores.
+    """
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='balance_entries')
+    seq = models.PositiveBigIntegerField()
+    amount = models.DecimalField(max_digits=15, decimal_places=2)
+    kind = models.CharField(max_length=30)
+    reference = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
 
-            buffer = BytesIO()
-            img.save(buffer, format='PNG')
-            buffer.seek(0)
+    class Meta:
+        unique_together = ['player', 'seq']
+        ordering = ['player', 'seq']
 
-            # Solo guardar si tenemos un ID
-            if self.id:
-                self.qr_code.save(f'qr_{self.id}.png', File(buffer), save=False)
+    def __str__(self):
+        return f"{self.player_id}#{self.seq} {self.kind} {self.amount}"
+
+class PlayerDailyStats(models.Model):
+    """
+    Acumulado diario por jugador y moneda de transacciones y sesiones de juego.
+    Se mantiene en cada escritura (ver rollups.py) para que los resúmenes por
+    rango de fechas sumen pocas filas en lugar de recorrer el historial.
+    """
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name='daily_stats')
+    day = models.DateField()
+    currency = models.CharField(max_length=3, default='USD')
+
+    # Transacciones completadas por tipo
+    deposits_total = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    deposits_count = models.PositiveIntegerField(default=0)
+    withdrawals_total = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    withdrawals_count = models.PositiveIntegerField(default=0)
+    wins_total = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    wins_count = models.PositiveIntegerField(default=0)
+    losses_total = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    losses_count = models.PositiveIntegerField(default=0)
+    # Todas las transacciones creadas, en cualquier estado
+    transaction_count = models.PositiveIntegerField(default=0)
 
-        super().save(*args, **kwargs)
\ No newline at end of file
+    # Sesiones de juego
+    games_played = models.PositiveIntegerField(default=0)
+    games_won = models.PositiveIntegerField(default=0)
+    total_wagered = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+    total_won = models.DecimalField(max_digits=15, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ['player', 'day', 'currency']
+        ordering = ['-day']
+
+    def __str__(self):
+        return f"{self.player_id} {self.day} {self.currency}"
@@ -0,0 +1,144 @@
+# backend/apps/players/player_cache.py
+"""
+Caché read-through de las lecturas calientes de un jugador (saldo y perfil).
+
+Las claves llevan la versión del jugador: `player:<id>:v<versión>:e<global>:<nombre>`.
+Invalidar es asignarle una versión nueva, así las entradas anteriores quedan
+huérfanas y expiran solas. La versión cambia al confirmar la
+transacción que modificó al jugador (asientos del diario, perfil, membresía),
+de modo que ninguna lectura posterior al commit ve el dato viejo.
+
+Los perfiles incluyen el plan de membresía; editar un plan incrementa una
+versión global de perfiles en lugar de la de cada jugador.
+
+Aciertos y fallos se cuentan en la propia caché (compartidos entre procesos
+con Redis) y se exponen con `stats()`.
+"""
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import serializers
+from .models import Player
+
+PROFILE_EPOCH_KEY = 'player:profile_epoch'
+HITS_KEY = 'player_cache:hits'
+MISSES_KEY = 'player_cache:misses'
+
+_MISSING = object()
+
+
+def _version_key(player_id):
+    return f'player:{player_id}:v'
+
+
+def _user_key(user_id):
+    return f'player:user:{user_id}'
+
+
+def _new_version():
+    # Una versión nueva nunca coincide con una anterior aunque la clave de
+    # versión haya sido desalojada de la caché
+    return time.time_ns()
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # La clave no existe (primer uso o desalojada)
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def _versions(player_id):
+    """Versión del jugador y versión global de perfiles, en una sola lectura"""
+    version_key = _version_key(player_id)
+    values = cache.get_many([version_key, PROFILE_EPOCH_KEY])
+    version = values.get(version_key)
+    if version is None:
+        version = _new_version()
+        if not cache.add(version_key, version, timeout=None):
+            version = cache.get(version_key, version)
+    return version, values.get(PROFILE_EPOCH_KEY, 0)
+
+
+def fetch(player_id, name, loader):
+    """
+    Devuelve el valor `name` del jugador desde la caché o, si falta, lo
+    calcula con `loader()` y lo guarda bajo la versión leída antes de cargarlo.
+    """
+    version, epoch = _versions(player_id)
+    key = f'player:{player_id}:v{version}:e{epoch}:{name}'
+    value = cache.get(key)
+    if value is not None:
+        _incr(HITS_KEY)
+        return value
+    _incr(MISSES_KEY)
+    value = loader()
+    cache.set(key, value, timeout=settings.PLAYER_CACHE_TTL)
+    return value
+
+
+def player_id_for(user):
+    """
+    Id del jugador del usuario autenticado: el claim del token si viene en él
+    (ClaimsUser), o la relación cacheada en otro caso
+    """
+    player_id = getattr(user, 'player_id', _MISSING)
+    if player_id is not _MISSING:
+        return player_id
+    return player_id_for_user(user.id)
+
+
+def player_id_for_user(user_id):
+    """Id del jugador del usuario (la relación no cambia); None si no tiene jugador"""
+    key = _user_key(user_id)
+    player_id = cache.get(key)
+    if player_id is None:
+        player_id = Player.objects.filter(user_id=user_id).values_list('id', flat=True).first()
+        if player_id is not None:
+            cache.set(key, player_id, timeout=None)
+    return player_id
+
+
+def balance(player_id):
+    """Saldo actual del jugador con su nombre y usuario, cacheado"""
+    def load():
+        player = Player.objects.with_live_balance().values(
+            'user_id', 'name', 'last_name', 'live_balance'
+        ).get(pk=player_id)
+        return {
+            'user_id': player['user_id'],
+            'balance': serializers.DecimalField(
+                max_digits=15, decimal_places=2
+            ).to_representation(player['live_balance']),
+            'player_name': f"{player['name']} {player['last_name']}",
+        }
+    return fetch(player_id, 'balance', load)
+
+
+def invalidate(player_id):
+    """Invalida las lecturas cacheadas del jugador al confirmar la transacción actual"""
+    transaction.on_commit(lambda: cache.set(_version_key(player_id), _new_version(), timeout=None))
+
+
+def forget_user(user_id):
+    cache.delete(_user_key(user_id))
+
+
+def invalidate_profiles():
+    """Invalida todos los perfiles (p. ej. al editar un plan de membresía)"""
+    transaction.on_commit(lambda: cache.set(PROFILE_EPOCH_KEY, _new_version(), timeout=None))
+
+
+def stats():
+    values = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits = values.get(HITS_KEY, 0)
+    misses = values.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else None,
+    }
@@ -0,0 +1,100 @@
+# backend/apps/players/qr.py
+"""
+Códigos QR de los jugadores, renderizados al vuelo.
+
+El QR de un jugador depende solo de su id (`player:<id>`), del formato y del
+tamaño, así que no se guarda ningún archivo: el endpoint `qr_code` lo
+renderiza bajo demanda y lo sirve con un ETag derivado de esos datos. Las
+imágenes ya renderizadas se guardan en un LRU acotado por proceso, con la
+misma clave, para no volver a codificarlas mientras estén calientes.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from io import BytesIO
+import qrcode
+import qrcode.image.svg
+from django.conf import settings
+
+FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+DEFAULT_BOX_SIZE = 10
+MIN_BOX_SIZE = 1
+MAX_BOX_SIZE = 40
+BORDER = 4
+
+# Cambiar si cambia la forma de renderizar, para invalidar ETags ya emitidos
+RENDER_VERSION = 1
+
+
+def qr_data(player_id):
+    """Contenido del QR, el mismo formato que decodifica scan_qr"""
+    return f"player:{player_id}"
+
+
+def content_key(player_id, image_format, box_size):
+    """Hash del contenido a renderizar: clave del LRU y ETag de la respuesta"""
+    raw = f"{RENDER_VERSION}|{qr_data(player_id)}|{image_format}|{box_size}|{BORDER}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def render(player_id, image_format='png', box_size=DEFAULT_BOX_SIZE):
+    """Renderiza el QR del jugador y devuelve los bytes de la imagen"""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_L,
+        box_size=box_size,
+        border=BORDER,
+    )
+    qr.add_data(qr_data(player_id))
+    qr.make(fit=True)
+
+    buffer = BytesIO()
+    if image_format == 'svg':
+        qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).save(buffer)
+    else:
+        qr.make_image(fill_color="black", back_color="white").save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+class LRUCache:
+    """Caché LRU acotada en número de entradas, segura entre hilos"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_cache = LRUCache(settings.QR_CACHE_MAX_ENTRIES)
+
+
+def get_image(player_id, image_format='png', box_size=DEFAULT_BOX_SIZE):
+    """Devuelve (etag, bytes) del QR, renderizándolo solo si no está en el LRU"""
+    key = content_key(player_id, image_format, box_size)
+    content = _cache.get(key)
+    if content is None:
+        content = render(player_id, image_format, box_size)
+        _cache.set(key, content)
+    return key, content
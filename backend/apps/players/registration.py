@@ -0,0 +1,119 @@
+# backend/apps/players/registration.py
+"""
+Alta de jugadores: usuario, jugador y membresía bronce en una transacción.
+
+Es el único camino de registro (RegisterView, el endpoint `register` y
+PlayerSerializer.create). No hay consultas previas de existencia: los
+duplicados los detectan las restricciones únicas de auth_user (username y
+el email normalizado, migración 0003 de authentication) y se traducen a un
+RegistrationError. El id del plan bronce se guarda en caché, así el alta son
+tres INSERT. Los efectos secundarios (cachés) se aplican al confirmar.
+"""
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .models import Player
+
+BRONZE_PLAN_KEY = 'membership_plan:bronze:id'
+
+# Días de la membresía bronce inicial
+MEMBERSHIP_DAYS = 30
+
+# Nombre de la restricción única del email (ver la migración de authentication)
+EMAIL_CONSTRAINT = 'auth_user_email_ci_uniq'
+
+# Cómo nombra cada backend el username único de auth_user en el error:
+# PostgreSQL la restricción, MySQL la clave y SQLite la columna
+USERNAME_CONSTRAINTS = (
+    'auth_user_username_key', "for key 'auth_user.username'", "for key 'username'",
+    'failed: auth_user.username',
+)
+
+USERNAME_TAKEN = 'El nombre de usuario ya existe'
+EMAIL_TAKEN = 'Este correo electrónico ya está registrado'
+
+
+class RegistrationError(Exception):
+    """Alta rechazada; `field` indica el dato en conflicto"""
+
+    def __init__(self, message, field=None):
+        super().__init__(message)
+        self.message = message
+        self.field = field
+
+
+def bronze_plan():
+    """Plan bronce por defecto, creado si todavía no existe"""
+    from backend.apps.memberships.models import MembershipPlan
+    plan, _ = MembershipPlan.objects.get_or_create(
+        tier='bronze',
+        defaults={
+            'name': 'Free',
+            'description': 'Membresía básica gratuita',
+            'benefits': 'Acceso a juegos básicos',
+            'min_balance': 0,
+            'min_monthly_volume': 0,
+            'valid_from': timezone.now(),
+            'is_active': True,
+        }
+    )
+    return plan
+
+
+def bronze_plan_id():
+    """Id del plan bronce, cacheado (se olvida al editar o borrar el plan)"""
+    plan_id = cache.get(BRONZE_PLAN_KEY)
+    if plan_id is None:
+        plan_id = bronze_plan().pk
+        cache.set(BRONZE_PLAN_KEY, plan_id, timeout=None)
+    return plan_id
+
+
+def forget_bronze_plan():
+    transaction.on_commit(lambda: cache.delete(BRONZE_PLAN_KEY))
+
+
+def conflict_error(exc):
+    """
+    Traduce la violación de una restricción única de auth_user a un
+    RegistrationError; devuelve None si el error no es un duplicado conocido.
+    """
+    message = str(exc)
+    if EMAIL_CONSTRAINT in message:
+        return RegistrationError(EMAIL_TAKEN, field='email')
+    if any(constraint in message for constraint in USERNAME_CONSTRAINTS):
+        return RegistrationError(USERNAME_TAKEN, field='username')
+    return None
+
+
+def register_player(username, password, email='', name='', last_name=''):
+    """
+    Crea usuario, jugador y membresía bronce y devuelve el jugador.
+    Lanza RegistrationError si el username o el email ya están registrados.
+    """
+    from backend.apps.memberships.models import Membership
+    plan_id = bronze_plan_id()
+    # El hash se calcula fuera de la transacción para no alargarla
+    user = User(username=username, email=User.objects.normalize_email(email or ''))
+    user.set_password(password)
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            user.save(force_insert=True)
+            player = Player.objects.create(user=user, name=name or '', last_name=last_name or '')
+            Membership.objects.create(
+                player=player,
+                plan_id=plan_id,
+                expires_at=now + timedelta(days=MEMBERSHIP_DAYS),
+                is_active=True
+            )
+    except IntegrityError as exc:
+        error = conflict_error(exc)
+        if error is None:
+            raise
+        raise error from exc
+    # Un jugador recién creado no tiene asientos en el diario
+    player.live_balance = player.balance
+    return player
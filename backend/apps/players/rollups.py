@@ -0,0 +1,151 @@
+# backend/apps/players/rollups.py
+"""
+Mantenimiento incremental de PlayerDailyStats.
+
+Cada escritura de dinero o de juego suma sus deltas a la fila
+(jugador, día, moneda) con un UPDATE ... SET x = x + delta; si la fila no
+existe se crea. Los resúmenes por rango suman como mucho una fila por día.
+"""
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+from .models import PlayerDailyStats
+
+# Las sesiones de juego no tienen moneda propia
+DEFAULT_CURRENCY = 'USD'
+
+# Campos (total, conteo) por tipo de transacción
+TRANSACTION_FIELDS = {
+    'deposit': ('deposits_total', 'deposits_count'),
+    'withdrawal': ('withdrawals_total', 'withdrawals_count'),
+    'win': ('wins_total', 'wins_count'),
+    'loss': ('losses_total', 'losses_count'),
+}
+
+AMOUNT_FIELDS = [
+    'deposits_total', 'withdrawals_total', 'wins_total', 'losses_total',
+    'total_wagered', 'total_won',
+]
+COUNT_FIELDS = [
+    'deposits_count', 'withdrawals_count', 'wins_count', 'losses_count',
+    'transaction_count', 'games_played', 'games_won',
+]
+
+def _bump(player_id, day, currency, **deltas):
+    """Suma `deltas` a la fila del día, creándola si aún no existe"""
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    rows = PlayerDailyStats.objects.filter(player_id=player_id, day=day, currency=currency)
+    increments = {field: F(field) + value for field, value in deltas.items()}
+    if rows.update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            PlayerDailyStats.objects.create(
+                player_id=player_id, day=day, currency=currency, **deltas
+            )
+    except IntegrityError:
+        # Otra escritura creó la fila del día en paralelo
+        rows.update(**increments)
+
+
+def record_transaction(transaction_obj):
+    """Registra una transacción recién creada"""
+    deltas = {'transaction_count': 1}
+    if transaction_obj.status == 'completed':
+        total_field, count_field = TRANSACTION_FIELDS[transaction_obj.transaction_type]
+        deltas[total_field] = transaction_obj.amount
+        deltas[count_field] = 1
+    _bump(
+        transaction_obj.player_id,
+        timezone.localdate(transaction_obj.created_at),
+        transaction_obj.currency,
+        **deltas
+    )
+
+
+def record_cancellation(transaction_obj, previous_status):
+    """Descuenta una transacción completada que se canceló"""
+    if previous_status != 'completed':
+        return
+    total_field, count_field = TRANSACTION_FIELDS[transaction_obj.transaction_type]
+    _bump(
+        transaction_obj.player_id,
+        timezone.localdate(transaction_obj.created_at),
+        transaction_obj.currency,
+        **{total_field: -transaction_obj.amount, count_field: -1}
+    )
+
+
+def transaction_contribution(transaction_obj):
+    """Aporte de una transacción a los acumulados: {(jugador, día, moneda): deltas}"""
+    deltas = {'transaction_count': 1}
+    if transaction_obj.status == 'completed':
+        total_field, count_field = TRANSACTION_FIELDS[transaction_obj.transaction_type]
+        deltas[total_field] = transaction_obj.amount
+        deltas[count_field] = 1
+    key = (
+        transaction_obj.player_id,
+        timezone.localdate(transaction_obj.created_at),
+        transaction_obj.currency
+    )
+    return {key: deltas}
+
+
+def game_contribution(session):
+    """Aporte de una sesión de juego a los acumulados"""
+    key = (session.player_id, timezone.localdate(session.start_time), DEFAULT_CURRENCY)
+    return {key: {
+        'games_played': 1,
+        'games_won': int(session.result == 'won'),
+        'total_wagered': session.bet_amount,
+        'total_won': session.amount_won,
+    }}
+
+
+def record_change(before, after):
+    """
+    Suma la diferencia entre dos aportes (antes y después de editar o borrar
+    una fila; {} si no existía o ya no existe)
+    """
+    changes = {}
+    for contribution, sign in ((before, -1), (after, 1)):
+        for key, deltas in contribution.items():
+            row = changes.setdefault(key, {})
+            for field, value in deltas.items():
+                row[field] = row.get(field, 0) + sign * value
+    for (player_id, day, currency), deltas in changes.items():
+        _bump(player_id, day, currency, **deltas)
+
+
+def record_game(player_id, started_at, played=0, won_round=False, wagered=Decimal('0'), won=Decimal('0')):
+    """
+    Registra sesiones de juego en el día en que empezaron. `won_round` es un
+    booleano para una sesión o la cantidad de rondas ganadas de un lote.
+    """
+    _bump(
+        player_id,
+        timezone.localdate(started_at),
+        DEFAULT_CURRENCY,
+        games_played=played,
+        games_won=int(won_round),
+        total_wagered=wagered,
+        total_won=won
+    )
+
+
+def summarize(player_id, start_day=None, end_day=None):
+    """Suma los acumulados del jugador en el rango de días (inclusive)"""
+    rows = PlayerDailyStats.objects.filter(player_id=player_id)
+    if start_day:
+        rows = rows.filter(day__gte=start_day)
+    if end_day:
+        rows = rows.filter(day__lte=end_day)
+    totals = rows.aggregate(**{field: Sum(field) for field in AMOUNT_FIELDS + COUNT_FIELDS})
+    for field in AMOUNT_FIELDS:
+        totals[field] = Decimal(totals[field] or 0).quantize(Decimal('0.01'))
+    for field in COUNT_FIELDS:
+        totals[field] = totals[field] or 0
+    return totals
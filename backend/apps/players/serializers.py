@@ -1,17 +1,21 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from django.db import transaction
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db import IntegrityError, transaction
 from .models import Player
+from django.urls import reverse
+from . import ledger, registration
 from backend.apps.memberships.serializers import PlayerMembershipSerializer
-import qrcode
-from io import BytesIO
-from django.core.files import File
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'username', 'email', 'password')
-        extra_kwargs = {'password': {'write_only': True}}
+        extra_kwargs = {
+            'password': {'write_only': True},
+            # Sin UniqueValidator: el duplicado lo detecta la restricción única al insertar
+            'username': {'validators': [UnicodeUsernameValidator()]},
+        }
 
     def create(self, validated_data):
         user = User.objects.create_user(
@@ -26,6 +30,8 @@ class PlayerSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='user.username', read_only=True)
     email = serializers.EmailField(source='user.email', read_only=True)
     membership = PlayerMembershipSerializer(source='player_membership', read_only=True) 
+    balance = serializers.SerializerMethodField()
+    qr_code = serializers.SerializerMethodField()
     
     class Meta:
         model = Player
@@ -33,85 +39,31 @@ class PlayerSerializer(serializers.ModelSerializer):
                  'join_date', 'balance', 'membership']
         read_only_fields = ('qr_code', 'join_date', 'balance')
 
-    @transaction.atomic
+    def get_balance(self, obj):
+        """Saldo actual: usa la anotación `live_balance` si el queryset la trae"""
+        balance = getattr(obj, 'live_balance', None)
+        if balance is None:
+            balance = ledger.get_balance(obj.pk)
+        return serializers.DecimalField(max_digits=15, decimal_places=2).to_representation(balance)
+
+    def get_qr_code(self, obj):
+        """URL del endpoint que renderiza el QR del jugador al vuelo"""
+        url = reverse('player-qr-code', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
     def create(self, validated_data):
-        # Extraer datos del usuario
         user_data = validated_data.pop('user')
-        
-        # Crear usuario con email
-        user = User.objects.create_user(
-            username=user_data['username'],
-            email=user_data.get('email', ''),
-            password=user_data['password']
-        )
-        
-        # Obtener membresía Free por defecto
-        from backend.apps.memberships.models import MembershipPlan, Membership
-        free_plan = MembershipPlan.objects.filter(tier='bronze').first()
-        if not free_plan:
-            from django.utils import timezone
-            free_plan = MembershipPlan.objects.create(
-                name='Free',
-                tier='bronze',
-                description='Membresía básica gratuita',
-                benefits='Acceso a juegos básicos',
-                min_balance=0,
-                min_monthly_volume=0,
-                valid_from=timezone.now(),
-                is_active=True
-            )
-        
-        # Crear jugador
-        player = Player.objects.create(
-            user=user,
-            **validated_data
-        )
-        
-        # Crear membresía para el jugador
-        Membership.objects.create(
-            player=player,
-            plan=free_plan,
-            expires_at=timezone.now() + timezone.timedelta(days=30),
-            is_active=True
-        )
-        
-        # Generar código QR
-        self.generate_qr_code(player)
-        
-        return player
-
-    def generate_qr_code(self, player):
-        """Genera y guarda el código QR para un jugador"""
         try:
-            # Crear datos del QR
-            qr_data = f"player:{player.id}"
-            
-            # Generar QR
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
-                border=4,
+            return registration.register_player(
+                user_data['username'],
+                user_data['password'],
+                user_data.get('email', ''),
+                name=validated_data.get('name'),
+                last_name=validated_data.get('last_name')
             )
-            qr.add_data(qr_data)
-            qr.make(fit=True)
-            
-            # Crear imagen
-            qr_image = qr.make_image(fill_color="black", back_color="white")
-            
-            # Guardar en buffer
-            buffer = BytesIO()
-            qr_image.save(buffer, format='PNG')
-            buffer.seek(0)
-            
-            # Crear nombre de archivo
-            filename = f'qr_player_{player.id}.png'
-            
-            # Guardar archivo
-            player.qr_code.save(filename, File(buffer), save=True)
-            
-        except Exception as e:
-            print(f"Error generando QR: {e}")
+        except registration.RegistrationError as e:
+            raise serializers.ValidationError({'user': {e.field: [e.message]}})
 
     def update(self, instance, validated_data):
         # Manejar actualización de usuario si se proporciona
@@ -126,7 +78,12 @@ class PlayerSerializer(serializers.ModelSerializer):
             if 'password' in user_data:
                 user.set_password(user_data['password'])
             
-            user.save()
+            try:
+                with transaction.atomic():
+                    user.save()
+            except IntegrityError as e:
+                error = registration.conflict_error(e)
+                raise serializers.ValidationError({'user': {error.field: [error.message]}})
         
         # Actualizar otros campos del jugador
         for attr, value in validated_data.items():
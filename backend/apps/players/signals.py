@@ -0,0 +1,46 @@
+# backend/apps/players/signals.py
+"""
+Invalidación de la caché de jugadores cuando cambian los datos que muestran
+su perfil. Los cambios de saldo los invalida el propio diario (ledger.py).
+"""
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from backend.apps.memberships.models import Membership, MembershipPlan
+from . import player_cache, registration
+from .models import Player
+
+
+@receiver(post_save, sender=Player)
+def player_saved(sender, instance, **kwargs):
+    player_cache.invalidate(instance.pk)
+
+
+@receiver(post_delete, sender=Player)
+def player_deleted(sender, instance, **kwargs):
+    player_cache.invalidate(instance.pk)
+    player_cache.forget_user(instance.user_id)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created=False, update_fields=None, **kwargs):
+    # Un usuario recién creado todavía no tiene jugador
+    if created:
+        return
+    # El login solo actualiza last_login (y password al rehashear), que no forman parte del perfil
+    if update_fields is not None and set(update_fields) <= {'last_login', 'password'}:
+        return
+    player_id = Player.objects.filter(user=instance).values_list('id', flat=True).first()
+    if player_id is not None:
+        player_cache.invalidate(player_id)
+
+
+@receiver([post_save, post_delete], sender=Membership)
+def membership_changed(sender, instance, **kwargs):
+    player_cache.invalidate(instance.player_id)
+
+
+@receiver([post_save, post_delete], sender=MembershipPlan)
+def plan_changed(sender, instance, **kwargs):
+    player_cache.invalidate_profiles()
+    registration.forget_bronze_plan()
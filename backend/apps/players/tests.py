@@ -1,3 +1,308 @@
-from django.test import TestCase
+import io
+import json
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from casinoChill.testing import QueryCountMixin
+from backend.apps.memberships.models import MembershipPlan, Membership
+from . import importer, ledger, player_cache
+from .models import BalanceEntry, Player
 
-# Create your tests here.
+
+def create_player(username, plan=None):
+    user = User.objects.create(username=username, email=f'{username}@test.com')
+    player = Player.objects.create(user=user, name=username, last_name='Test')
+    if plan:
+        Membership.objects.create(player=player, plan=plan, expires_at=timezone.now())
+    return player
+
+
+class PlayerQueryCountTests(QueryCountMixin, APITestCase):
+    def setUp(self):
+        self.plan = MembershipPlan.objects.create(
+            name='Free', tier='bronze', description='', valid_from=timezone.now()
+        )
+        self.staff = User.objects.create(username='staff', is_staff=True)
+        self.client.force_authenticate(self.staff)
+        self.counter = 0
+
+    def add_players(self, count):
+        for _ in range(count):
+            self.counter += 1
+            create_player(f'player{self.counter}', self.plan)
+
+    def test_player_list(self):
+        self.assertConstantQueries('/api/players/players/', self.add_players, expected=1)
+
+
+class LedgerTests(TestCase):
+    def setUp(self):
+        self.player = create_player('journal')
+
+    def live_balance(self):
+        return Player.objects.with_live_balance().get(pk=self.player.pk).live_balance
+
+    def test_hold_folds_tail_at_threshold(self):
+        with ledger.hold(self.player.pk) as account:
+            for _ in range(ledger.FOLD_THRESHOLD - 1):
+                account.post(Decimal('1'), 'deposit')
+        self.player.refresh_from_db()
+        self.assertEqual(self.player.balance_seq, 0)
+
+        ledger.debit(self.player.pk, Decimal('0.50'), 'bet')
+        self.player.refresh_from_db()
+        self.assertEqual(self.player.balance_seq, ledger.FOLD_THRESHOLD)
+        self.assertEqual(self.player.balance, Decimal('48.50'))
+        self.assertEqual(ledger.get_balance(self.player.pk), Decimal('48.50'))
+
+    def test_live_balance_matches_get_balance(self):
+        ledger.credit(self.player.pk, Decimal('100'), 'deposit')
+        ledger.fold(self.player.pk)
+        ledger.credit(self.player.pk, Decimal('20.25'), 'deposit')
+        ledger.debit(self.player.pk, Decimal('5'), 'bet')
+        self.assertEqual(self.live_balance(), Decimal('115.25'))
+        self.assertEqual(ledger.get_balance(self.player.pk), Decimal('115.25'))
+
+    def test_hold_rejects_overdraft(self):
+        ledger.credit(self.player.pk, Decimal('10'), 'deposit')
+        with self.assertRaises(ledger.InsufficientFunds):
+            ledger.debit(self.player.pk, Decimal('10.01'), 'bet')
+        self.assertEqual(ledger.get_balance(self.player.pk), Decimal('10.00'))
+
+    def test_credit_retries_after_sequence_collision(self):
+        ledger.credit(self.player.pk, Decimal('10'), 'deposit')
+        append = ledger._append
+
+        def concurrent_credit_wins(player_id, entries, last_seq):
+            # Otro abono toma la secuencia entre la lectura y el INSERT
+            BalanceEntry.objects.create(player_id=player_id, seq=last_seq + 1, amount=Decimal('5'), kind='deposit')
+            return append(player_id, entries, last_seq)
+
+        with mock.patch.object(ledger, '_append', concurrent_credit_wins):
+            new_balance = ledger.credit(self.player.pk, Decimal('1'), 'deposit')
+
+        self.assertEqual(new_balance, Decimal('16.00'))
+        self.assertEqual(ledger.get_balance(self.player.pk), Decimal('16.00'))
+        self.assertEqual(
+            list(BalanceEntry.objects.filter(player=self.player).values_list('seq', 'amount')),
+            [(1, Decimal('10.00')), (2, Decimal('5.00')), (3, Decimal('1.00'))]
+        )
+
+
+
+
+class PlayerCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        plan = MembershipPlan.objects.create(
+            name='Free', tier='bronze', description='', valid_from=timezone.now()
+        )
+        self.player = create_player('cached', plan)
+        self.loads = 0
+
+    def profile(self):
+        def load():
+            self.loads += 1
+            return {'loads': self.loads}
+        return player_cache.fetch(self.player.pk, 'profile', load)
+
+    def assertReloadsAfterCommit(self, change):
+        self.assertEqual(self.profile(), {'loads': 1})
+        with self.captureOnCommitCallbacks() as callbacks:
+            change()
+        # Hasta el commit se sigue sirviendo la versión anterior
+        self.assertEqual(self.profile(), {'loads': 1})
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.profile(), {'loads': 2})
+
+    def test_balance_invalidated_by_credit(self):
+        self.assertEqual(player_cache.balance(self.player.pk)['balance'], '0.00')
+        with self.captureOnCommitCallbacks() as callbacks:
+            ledger.credit(self.player.pk, Decimal('25'), 'deposit')
+        self.assertEqual(player_cache.balance(self.player.pk)['balance'], '0.00')
+        for callback in callbacks:
+            callback()
+        self.assertEqual(player_cache.balance(self.player.pk)['balance'], '25.00')
+
+    def test_balance_invalidated_by_hold(self):
+        ledger.credit(self.player.pk, Decimal('25'), 'deposit')
+        self.assertEqual(player_cache.balance(self.player.pk)['balance'], '25.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            with ledger.hold(self.player.pk) as account:
+                account.post(Decimal('-10'), 'bet', 'test')
+        self.assertEqual(player_cache.balance(self.player.pk)['balance'], '15.00')
+
+    def test_profile_invalidated_by_membership_save(self):
+        membership = Membership.objects.get(player=self.player)
+        membership.is_active = False
+        self.assertReloadsAfterCommit(membership.save)
+
+    def test_profile_invalidated_by_user_save(self):
+        user = self.player.user
+        user.email = 'nuevo@test.com'
+        self.assertReloadsAfterCommit(user.save)
+
+        # El login solo toca last_login: el perfil cacheado sigue vigente
+        with self.captureOnCommitCallbacks(execute=True):
+            user.last_login = timezone.now()
+            user.save(update_fields=['last_login'])
+        self.assertEqual(self.profile(), {'loads': 2})
+
+    def test_hit_and_miss_counters(self):
+        self.assertEqual(player_cache.stats(), {'hits': 0, 'misses': 0, 'hit_ratio': None})
+        player_cache.balance(self.player.pk)
+        player_cache.balance(self.player.pk)
+        player_cache.balance(self.player.pk)
+        self.assertEqual(player_cache.stats(), {'hits': 2, 'misses': 1, 'hit_ratio': 0.6667})
+
+        self.client.force_authenticate(self.player.user)
+        self.assertEqual(self.client.get('/api/players/cache/stats/').status_code, 403)
+        self.client.force_authenticate(User.objects.create(username='staff', is_staff=True))
+        response = self.client.get('/api/players/cache/stats/')
+        self.assertEqual(response.json(), {'hits': 2, 'misses': 1, 'hit_ratio': 0.6667})
+
+
+class QRCodeTests(APITestCase):
+    def setUp(self):
+        self.player = create_player('qr_player')
+        self.url = f'/api/players/players/{self.player.id}/qr_code/'
+
+    def test_png_and_svg(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/png')
+        self.assertTrue(response.content.startswith(b'\x89PNG'))
+        self.assertIn('immutable', response['Cache-Control'])
+
+        response = self.client.get(self.url, {'fmt': 'svg', 'size': 4}, HTTP_ACCEPT='image/*')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/svg+xml')
+        self.assertIn(b'<svg', response.content)
+
+    def test_not_modified_on_matching_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"otro", {etag}')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        # Otro tamaño es otra imagen; un ETag que solo contiene al vigente no coincide
+        self.assertEqual(self.client.get(self.url, {'size': 5}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=f'W/{etag}x').status_code, 200)
+
+    def test_invalid_parameters(self):
+        for params in ({'fmt': 'gif'}, {'size': 0}, {'size': 41}, {'size': 'grande'}):
+            self.assertEqual(self.client.get(self.url, params).status_code, 400, params)
+
+    def test_unknown_player(self):
+        response = self.client.get(f'/api/players/players/{self.player.id + 100}/qr_code/')
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+class ImporterTests(APITestCase):
+    CSV = (
+        'username,email,password,name,last_name\n'
+        'ana,ana@example.com,Clave-1,Ana,Uno\n'
+        'existing,otro@example.com,Clave-1,,\n'
+        'ANA,ana2@example.com,Clave-1,,\n'
+        'beto,no-es-correo,Clave-1,,\n'
+        'carla,carla@example.com,,,\n'
+        'dario,DARIO@EXAMPLE.COM,Clave-1,Dario,\n'
+    )
+
+    def setUp(self):
+        cache.clear()
+        create_player('existing')
+
+    def rows(self, text, file_format):
+        return list(importer.read_rows(io.StringIO(text), file_format))
+
+    def errors(self, result):
+        return sorted((error['line'], error['error']) for error in result.errors)
+
+    def test_read_rows(self):
+        rows = self.rows(self.CSV, 'csv')
+        self.assertEqual([line for line, _ in rows], [2, 3, 4, 5, 6, 7])
+        self.assertEqual(rows[0][1]['username'], 'ana')
+
+        rows = self.rows('{"username": "ana"}\n\nno es json\n[1, 2]\n', 'ndjson')
+        self.assertEqual(rows, [(1, {'username': 'ana'}), (3, None), (4, None)])
+
+    def test_drop_duplicates_against_database_and_batch(self):
+        result = importer.ImportResult()
+        rows = [
+            {'line': 1, 'username': 'EXISTING', 'email': 'x@example.com'},
+            {'line': 2, 'username': 'eva', 'email': 'existing@TEST.com'},
+            {'line': 3, 'username': 'eva', 'email': 'eva@example.com'},
+            {'line': 4, 'username': 'Eva', 'email': 'eva2@example.com'},
+            {'line': 5, 'username': 'fede', 'email': 'EVA@example.com'},
+        ]
+        unique = importer._drop_duplicates(rows, result)
+        self.assertEqual([row['line'] for row in unique], [3])
+        self.assertEqual(self.errors(result), [
+            (1, 'El nombre de usuario ya existe'),
+            (2, 'Este correo electrónico ya está registrado'),
+            (4, 'El nombre de usuario ya existe'),
+            (5, 'Este correo electrónico ya está registrado'),
+        ])
+
+    def test_import_csv(self):
+        with mock.patch.object(importer, 'ProcessPoolExecutor', wraps=importer.ProcessPoolExecutor) as pool:
+            result = importer.import_players(self.rows(self.CSV, 'csv'), chunk_size=4, workers=1)
+        pool.assert_called_once()
+        self.assertEqual(result.created, 2)
+        self.assertEqual(self.errors(result), [
+            (3, 'El nombre de usuario ya existe'),
+            (4, 'El nombre de usuario ya existe'),
+            (5, 'Correo electrónico inválido'),
+            (6, 'Usuario, contraseña y correo son obligatorios'),
+        ])
+        player = Player.objects.get(user__username='ana')
+        self.assertEqual((player.name, player.last_name), ('Ana', 'Uno'))
+        self.assertTrue(player.user.check_password('Clave-1'))
+        self.assertTrue(Membership.objects.filter(player=player, is_active=True).exists())
+        # Dominio en minúsculas, como en el registro
+        self.assertTrue(User.objects.filter(username='dario', email='DARIO@example.com').exists())
+
+    def test_import_ndjson_reports_invalid_rows(self):
+        lines = [
+            {'username': 12345, 'email': 'num@example.com', 'password': 'Clave-1'},
+            {'username': {'nombre': 'x'}, 'email': 'dict@example.com', 'password': 'Clave-1'},
+            {'username': 'con espacio', 'email': 'sp@example.com', 'password': 'Clave-1'},
+            {'username': 'u' * 151, 'email': 'largo@example.com', 'password': 'Clave-1'},
+            {'username': 'gina', 'email': 'gina@example.com', 'password': 'Clave-1', 'name': 'n' * 101},
+            {'username': 'hugo', 'email': 'hugo@example.com', 'password': True},
+            {'username': 'ines', 'email': 'ines@example.com', 'password_hash': 'no-es-un-hash'},
+            {'username': 'NUM', 'email': 'num@example.com', 'password': 'Clave-1'},
+        ]
+        text = '\n'.join(json.dumps(line) for line in lines) + '\n{roto\n'
+        result = importer.import_players(self.rows(text, 'ndjson'), workers=0)
+
+        self.assertEqual(result.created, 1)
+        self.assertTrue(User.objects.filter(username='12345').exists())
+        self.assertEqual(self.errors(result), [
+            (2, 'Valor inválido en la columna username'),
+            (3, 'Nombre de usuario inválido'),
+            (4, 'La columna username supera los 150 caracteres'),
+            (5, 'La columna name supera los 100 caracteres'),
+            (6, 'Valor inválido en la columna password'),
+            (7, 'Hash de contraseña no reconocido'),
+            (8, 'Este correo electrónico ya está registrado'),
+            (9, 'Fila ilegible'),
+        ])
+
+    def test_bulk_import_hashes_in_process(self):
+        self.client.force_authenticate(User.objects.create(username='staff', is_staff=True))
+        upload = io.BytesIO(self.CSV.encode())
+        upload.name = 'jugadores.csv'
+        with mock.patch.object(importer, 'ProcessPoolExecutor') as pool:
+            response = self.client.post('/api/players/players/bulk_import/', {'file': upload})
+        pool.assert_not_called()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 2)
+        self.assertTrue(User.objects.get(username='ana').check_password('Clave-1'))
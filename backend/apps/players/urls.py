@@ -10,4 +10,6 @@ urlpatterns = [
     path('qr/scan/', views.scan_qr, name='scan-qr'),  # ¡IMPORTANTE! Sin "players/" antes
     path('<int:player_id>/balance/', views.update_balance, name='update-balance'),
     path('my/balance/', views.my_balance, name='my-balance'),
+    path('my/balance/async/', views.my_balance_async, name='my-balance-async'),
+    path('cache/stats/', views.cache_stats, name='player-cache-stats'),
 ]
\ No newline at end of file
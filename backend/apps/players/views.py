@@ -1,22 +1,46 @@
 from rest_framework import viewsets, generics, status, permissions
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
-from django.db import transaction, models
-from django.db.models import F  # Added F expression
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from django.db import transaction
+from django.http import HttpResponse
+from django.conf import settings
 from .models import Player
+from . import ledger, qr, player_cache, importer
+from casinoChill.query_profiles import QueryProfile, QueryProfileMixin
+from casinoChill import async_api
+from casinoChill.pagination import OffsetPaginationMixin
 from .serializers import PlayerSerializer
-import qrcode
-from io import BytesIO
-from django.core.files import File
 from django.shortcuts import get_object_or_404
 from decimal import Decimal
 
-class PlayerViewSet(viewsets.ModelViewSet):
+# Relaciones que necesita PlayerSerializer (usuario, membresía y plan)
+PLAYER_PROFILE = QueryProfile(select=('user', 'player_membership__plan'))
+
+class QRImageRenderer(BaseRenderer):
+    """
+    Acepta clientes que piden `image/*` (CDN, terminales). La imagen se
+    devuelve como HttpResponse; este renderer solo serializa los errores.
+    """
+    media_type = 'image/*'
+    format = 'qr'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return JSONRenderer().render(data)
+
+class PlayerViewSet(OffsetPaginationMixin, QueryProfileMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestionar jugadores con permisos adecuados
     """
     queryset = Player.objects.all()
     serializer_class = PlayerSerializer
+    query_profiles = {
+        'list': PLAYER_PROFILE,
+        'retrieve': PLAYER_PROFILE,
+        'update': PLAYER_PROFILE,
+        'partial_update': PLAYER_PROFILE,
+        'my_profile': PLAYER_PROFILE,
+    }
 
     def get_permissions(self):
         """
@@ -28,6 +52,9 @@ class PlayerViewSet(viewsets.ModelViewSet):
         elif self.action in ['create']:
             # Crear jugadores requiere autenticación (admin)
             self.permission_classes = [permissions.IsAuthenticated]
+        elif self.action == 'bulk_import':
+            # La importación masiva es solo para administradores
+            self.permission_classes = [permissions.IsAdminUser]
         else:
             # Actualizar, eliminar y acciones de balance requieren autenticación
             self.permission_classes = [permissions.IsAuthenticated]
@@ -38,12 +65,13 @@ class PlayerViewSet(viewsets.ModelViewSet):
         Filtra el queryset basado en el usuario autenticado
         """
         user = self.request.user
+        queryset = self.apply_query_profile(Player.objects.with_live_balance())
         if user.is_staff:
             # Los administradores ven todos los jugadores
-            return Player.objects.all()
+            return queryset
         elif user.is_authenticated:
             # Los usuarios autenticados ven solo su propio perfil
-            return Player.objects.filter(user=user)
+            return queryset.filter(user_id=user.id)
         else:
             # Usuarios no autenticados ven lista vacía (solo pueden ver detalles específicos)
             return Player.objects.none()
@@ -57,7 +85,7 @@ class PlayerViewSet(viewsets.ModelViewSet):
         player = self.get_object()
         
         # Verificar permisos: admin o el propio jugador
-        if not (request.user.is_staff or player.user == request.user):
+        if not (request.user.is_staff or player.user_id == request.user.id):
             return Response(
                 {'error': 'No tienes permiso para realizar esta acción'}, 
                 status=status.HTTP_403_FORBIDDEN
@@ -70,18 +98,15 @@ class PlayerViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Actualizar balance de forma atómica
+        # Registrar el abono en el diario de saldo
         decimal_amount = Decimal(amount)
-        Player.objects.filter(id=player.id).update(
-            balance=F('balance') + decimal_amount
+        new_balance = ledger.credit(
+            player.id, decimal_amount, 'manual_credit', f'user:{request.user.id}'
         )
         
-        # Obtener el jugador actualizado
-        player.refresh_from_db()
-        
         return Response({
             'message': f'Se agregaron ${decimal_amount:.2f} al saldo',
-            'new_balance': str(player.balance)  # Mantener como string para precisión
+            'new_balance': str(new_balance)  # Mantener como string para precisión
         })
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
@@ -93,7 +118,7 @@ class PlayerViewSet(viewsets.ModelViewSet):
         player = self.get_object()
         
         # Verificar permisos: admin o el propio jugador
-        if not (request.user.is_staff or player.user == request.user):
+        if not (request.user.is_staff or player.user_id == request.user.id):
             return Response(
                 {'error': 'No tienes permiso para realizar esta acción'}, 
                 status=status.HTTP_403_FORBIDDEN
@@ -108,26 +133,20 @@ class PlayerViewSet(viewsets.ModelViewSet):
         
         decimal_amount = Decimal(amount)
         
-        # Verificar saldo y retirar de forma atómica
-        updated = Player.objects.filter(
-            id=player.id, 
-            balance__gte=decimal_amount
-        ).update(
-            balance=F('balance') - decimal_amount
-        )
-        
-        if not updated:
+        # Verificar saldo y registrar el cargo con la cuenta bloqueada
+        try:
+            new_balance = ledger.debit(
+                player.id, decimal_amount, 'manual_debit', f'user:{request.user.id}'
+            )
+        except ledger.InsufficientFunds:
             return Response(
                 {'error': 'Saldo insuficiente'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Obtener el jugador actualizado
-        player.refresh_from_db()
-        
         return Response({
             'message': f'Se retiraron ${decimal_amount:.2f} del saldo',
-            'new_balance': str(player.balance)  # Mantener como string para precisión
+            'new_balance': str(new_balance)  # Mantener como string para precisión
         })
 
     @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated])
@@ -135,29 +154,69 @@ class PlayerViewSet(viewsets.ModelViewSet):
         """
         Obtener saldo de un jugador (solo admin o el propio jugador)
         """
+        cached = None
+        if str(pk).isdigit():
+            try:
+                cached = player_cache.balance(int(pk))
+            except Player.DoesNotExist:
+                cached = None
+        if cached is not None and (request.user.is_staff or cached['user_id'] == request.user.id):
+            return Response({'balance': cached['balance']})
+
+        # Jugador inexistente o ajeno: mismas respuestas que sin caché
         player = self.get_object()
         
         # Verificar permisos: admin o el propio jugador
-        if not (request.user.is_staff or player.user == request.user):
+        if not (request.user.is_staff or player.user_id == request.user.id):
             return Response(
                 {'error': 'No tienes permiso para realizar esta acción'}, 
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        return Response({'balance': str(player.balance)})  # Mantener como string
+        return Response({'balance': str(player.live_balance)})  # Mantener como string
     
-    @action(detail=True, methods=['get'], permission_classes=[permissions.AllowAny])
+    @action(detail=True, methods=['get'], permission_classes=[permissions.AllowAny],
+            renderer_classes=[JSONRenderer, QRImageRenderer])
     def qr_code(self, request, pk=None):
         """
-        Obtener URL del código QR de un jugador (público)
+        Imagen del código QR de un jugador (público), renderizada al vuelo.
+        Parámetros: ?fmt=png|svg (por defecto png) y ?size=1-40 (tamaño de módulo).
         """
-        player = get_object_or_404(Player, pk=pk)
-        if player.qr_code:
-            return Response({'qr_code_url': player.qr_code.url})
-        return Response(
-            {'error': 'Código QR no encontrado'}, 
-            status=status.HTTP_404_NOT_FOUND
-        )
+        image_format = request.query_params.get('fmt', 'png').lower()
+        if image_format not in qr.FORMATS:
+            return Response(
+                {'error': 'Formato inválido, use png o svg'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            box_size = int(request.query_params.get('size', qr.DEFAULT_BOX_SIZE))
+        except ValueError:
+            box_size = None
+        if box_size is None or not qr.MIN_BOX_SIZE <= box_size <= qr.MAX_BOX_SIZE:
+            return Response(
+                {'error': f'Tamaño inválido, use un valor entre {qr.MIN_BOX_SIZE} y {qr.MAX_BOX_SIZE}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        player_id = int(pk) if pk.isdigit() else None
+        if player_id is None or not Player.objects.filter(pk=player_id).exists():
+            return Response(
+                {'error': 'Código QR no encontrado'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        # El contenido solo depende del id, formato y tamaño: el ETag se
+        # conoce sin renderizar y la imagen puede cachearse indefinidamente
+        etag = f'"{qr.content_key(player_id, image_format, box_size)}"'
+        tags = [tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')]
+        if etag in tags or '*' in tags:
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            _, content = qr.get_image(player_id, image_format, box_size)
+            response = HttpResponse(content, content_type=qr.FORMATS[image_format])
+        response['ETag'] = etag
+        response['Cache-Control'] = f'public, max-age={settings.QR_CACHE_MAX_AGE}, immutable'
+        return response
 
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def my_profile(self, request):
@@ -165,15 +224,56 @@ class PlayerViewSet(viewsets.ModelViewSet):
         Obtener el perfil del jugador autenticado
         """
         try:
-            player = Player.objects.get(user=request.user)
-            serializer = PlayerSerializer(player)
-            return Response(serializer.data)
+            player_id = player_cache.player_id_for(request.user)
+            if player_id is None:
+                raise Player.DoesNotExist
+
+            def load():
+                player = self.apply_query_profile(
+                    Player.objects.with_live_balance()
+                ).get(pk=player_id)
+                return dict(PlayerSerializer(player).data)
+
+            return Response(player_cache.fetch(player_id, 'profile', load))
         except Player.DoesNotExist:
             return Response(
                 {'error': 'Perfil de jugador no encontrado'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
 
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def bulk_import(self, request):
+        """
+        Importa jugadores desde un archivo CSV o NDJSON (campo `file`).
+        Devuelve cuántos se crearon y los errores por línea.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response(
+                {'error': 'Debe adjuntar un archivo en el campo file'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        file_format = request.data.get('fmt') or (
+            'ndjson' if upload.name.lower().endswith(('.ndjson', '.jsonl')) else 'csv'
+        )
+        if file_format not in importer.FORMATS:
+            return Response(
+                {'error': f'Formato no soportado, use uno de: {", ".join(importer.FORMATS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rows = importer.read_rows(importer.text_stream(upload.file), file_format)
+        try:
+            # Dentro de una petición se hashea en este proceso: nada de pools por request
+            result = importer.import_players(rows, workers=0)
+        except UnicodeDecodeError:
+            return Response(
+                {'error': 'El archivo debe estar codificado en UTF-8'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        response_status = status.HTTP_201_CREATED if result.created else status.HTTP_200_OK
+        return Response(result.as_dict(), status=response_status)
+
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
 def scan_qr(request):
@@ -186,7 +286,9 @@ def scan_qr(request):
         # Decodificar datos del QR (formato: "player:{id}")
         if qr_data.startswith('player:'):
             player_id = qr_data.split(':')[1]
-            player = get_object_or_404(Player, id=player_id)
+            player = get_object_or_404(
+                PLAYER_PROFILE.apply(Player.objects.with_live_balance()), id=player_id
+            )
             
             serializer = PlayerSerializer(player)
             return Response(serializer.data)
@@ -212,7 +314,7 @@ def update_balance(request, player_id):
         player = get_object_or_404(Player, id=player_id)
         
         # Verificar permisos: admin o el propio jugador
-        if not (request.user.is_staff or player.user == request.user):
+        if not (request.user.is_staff or player.user_id == request.user.id):
             return Response(
                 {'error': 'No tienes permiso para realizar esta acción'}, 
                 status=status.HTTP_403_FORBIDDEN
@@ -222,22 +324,16 @@ def update_balance(request, player_id):
         amount = Decimal(str(request.data.get('amount', 0)))
         action_type = request.data.get('action', 'add')  # 'add' o 'subtract'
         
+        reference = f'user:{request.user.id}'
         if action_type == 'add':
-            # Actualizar de forma atómica
-            Player.objects.filter(id=player.id).update(
-                balance=F('balance') + amount
-            )
+            # Registrar el ajuste en el diario de saldo
+            ledger.adjust(player.id, amount, 'manual_credit', reference)
             message = f'Se agregaron ${amount:.2f} al saldo'
         elif action_type == 'subtract':
-            # Verificar saldo y restar de forma atómica
-            updated = Player.objects.filter(
-                id=player.id, 
-                balance__gte=amount
-            ).update(
-                balance=F('balance') - amount
-            )
-            
-            if not updated:
+            # Verificar saldo y registrar el cargo con la cuenta bloqueada
+            try:
+                ledger.debit(player.id, amount, 'manual_debit', reference)
+            except ledger.InsufficientFunds:
                 return Response(
                     {'error': 'Saldo insuficiente'}, 
                     status=status.HTTP_400_BAD_REQUEST
@@ -249,8 +345,8 @@ def update_balance(request, player_id):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Obtener el jugador actualizado
-        player.refresh_from_db()
+        # Obtener el jugador con su saldo actual
+        player = PLAYER_PROFILE.apply(Player.objects.with_live_balance()).get(id=player.id)
         serializer = PlayerSerializer(player)
         
         return Response({
@@ -264,20 +360,47 @@ def update_balance(request, player_id):
             status=status.HTTP_400_BAD_REQUEST
         )
 
+def balance_for(user):
+    """Saldo cacheado del usuario autenticado; devuelve (cuerpo, status)"""
+    try:
+        player_id = player_cache.player_id_for(user)
+        if player_id is None:
+            raise Player.DoesNotExist
+        cached = player_cache.balance(player_id)
+        return {
+            'balance': cached['balance'],  # Mantener como string para precisión
+            'player_name': cached['player_name']
+        }, status.HTTP_200_OK
+    except Player.DoesNotExist:
+        return {'error': 'Jugador no encontrado'}, status.HTTP_404_NOT_FOUND
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def my_balance(request):
     """
     Obtener el saldo del jugador autenticado
     """
-    try:
-        player = Player.objects.get(user=request.user)
-        return Response({
-            'balance': str(player.balance),  # Mantener como string para precisión
-            'player_name': f"{player.name} {player.last_name}"
-        })
-    except Player.DoesNotExist:
-        return Response(
-            {'error': 'Jugador no encontrado'}, 
-            status=status.HTTP_404_NOT_FOUND
-        )
\ No newline at end of file
+    body, status_code = balance_for(request.user)
+    return Response(body, status=status_code)
+
+def _balance_for_request(request):
+    user = async_api.authenticated_user(request)
+    if user is None:
+        return async_api.NOT_AUTHENTICATED
+    return balance_for(user)
+
+@async_api.endpoint('GET')
+async def my_balance_async(request, data):
+    """
+    Variante async de my_balance para ASGI (ver casinoChill/async_api.py)
+    """
+    return await async_api.run_db(_balance_for_request, request)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def cache_stats(request):
+    """
+    Aciertos y fallos de la caché de saldo/perfil (solo admin)
+    """
+    return Response(player_cache.stats())
@@ -0,0 +1,594 @@
+# backend/apps/transactions/limits.py
+"""
+Contadores de los límites de transacción (diario, semanal y mensual).
+
+LIMITS_STORE elige dónde se validan y acumulan:
+
+- 'redis': un hash por ventana (`used` y `max`, en centavos). Validar e
+  incrementar todas las ventanas del movimiento es un único script Lua, así
+  que es atómico entre procesos y nodos. Cada clave expira al terminar su
+  ventana (más un margen): el período siguiente usa otra clave y empieza en
+  cero, sin resetear filas.
+- 'memory': lo mismo en un dict del proceso. Solo sirve con un único proceso.
+- 'database': las filas de TransactionLimit se leen y escriben dentro de la
+  transacción del movimiento.
+
+Con 'redis' y 'memory', TransactionLimit es la copia durable: las ventanas
+que tocó un movimiento confirmado se marcan y un hilo de cada proceso las
+vuelca en bloque cada LIMITS_FLUSH_INTERVAL segundos (también al salir del
+proceso y con `python manage.py flush_limits`). Si una ventana no está en el
+store se siembra desde su fila, o desde el límite por defecto, con una sola
+consulta.
+
+Si el store no responde se lanza LimitsUnavailable: el movimiento se rechaza
+en lugar de aprobarse sin límites o informarse como límite excedido.
+"""
+import abc
+import atexit
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import close_old_connections, transaction as db_transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import TransactionLimit
+
+logger = logging.getLogger(__name__)
+
+# Límites por defecto cuando el jugador aún no tiene uno configurado
+# (los períodos sin valor por defecto solo se aplican si tienen fila)
+DEFAULT_LIMITS = {
+    'daily': Decimal('5000'),
+    'monthly': Decimal('50000'),
+}
+
+LIMIT_PERIODS = tuple(period for period, _ in TransactionLimit.PERIOD_CHOICES)
+
+# Segundos que una ventana sigue en el store después de terminar, para que
+# el volcado y las compensaciones tardías la encuentren
+EXPIRY_GRACE = 24 * 60 * 60
+
+# Ventanas que se vuelcan por consulta
+FLUSH_BATCH_SIZE = 500
+
+# Máximo de una ventana sin límite configurado
+UNLIMITED = -1
+
+
+class LimitsUnavailable(Exception):
+    """El store de límites no respondió; el movimiento no se puede validar"""
+
+
+def period_bounds(period, now):
+    """Devuelve (inicio, fin) del período que contiene a `now`"""
+    day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if period == 'daily':
+        return day_start, day_start + timedelta(days=1)
+    if period == 'weekly':
+        week_start = day_start - timedelta(days=day_start.weekday())
+        return week_start, week_start + timedelta(days=7)
+    month_start = day_start.replace(day=1)
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    return month_start, next_month
+
+
+def to_cents(amount):
+    return int((Decimal(amount) * 100).to_integral_value())
+
+
+def from_cents(cents):
+    return Decimal(cents) / 100
+
+
+class DatabaseLimitStore:
+    """Límites en filas de TransactionLimit, dentro de la transacción del movimiento"""
+
+    def reserve(self, player_id, transaction_type, amount, now, consume=True):
+        """
+        Valida los límites y, con `consume`, acumula `amount`. Devuelve False
+        si alguno se excede. Debe llamarse con la cuenta del jugador bloqueada.
+        """
+        existing = {
+            limit.period: limit
+            for limit in TransactionLimit.objects.filter(
+                player_id=player_id,
+                transaction_type=transaction_type,
+                period__in=LIMIT_PERIODS
+            )
+        }
+
+        to_create, to_update = [], []
+        for period in LIMIT_PERIODS:
+            period_start, period_end = period_bounds(period, now)
+            limit = existing.get(period)
+
+            if limit is None:
+                if period not in DEFAULT_LIMITS:
+                    continue
+                limit = TransactionLimit(
+                    player_id=player_id,
+                    period=period,
+                    transaction_type=transaction_type,
+                    max_amount=DEFAULT_LIMITS[period],
+                    current_amount=Decimal('0'),
+                    period_start=period_start,
+                    period_end=period_end
+                )
+                to_create.append(limit)
+            else:
+                # Resetear el período si ya expiró
+                if limit.period_end <= now:
+                    limit.current_amount = Decimal('0')
+                    limit.period_start = period_start
+                    limit.period_end = period_end
+                to_update.append(limit)
+
+            if limit.current_amount + amount > limit.max_amount:
+                return False
+            limit.current_amount += amount
+
+        if consume:
+            if to_create:
+                TransactionLimit.objects.bulk_create(to_create)
+            if to_update:
+                TransactionLimit.objects.bulk_update(
+                    to_update, ['current_amount', 'period_start', 'period_end']
+                )
+        return True
+
+    def release(self, player_id, transaction_type, amount, now):
+        # El rollback de la transacción ya deshace las filas
+        pass
+
+    def committed(self, player_id, transaction_type, now):
+        pass
+
+    def limit_changed(self, limit):
+        pass
+
+    def flush(self):
+        return 0
+
+
+class CounterLimitStore(abc.ABC):
+    """
+    Base de los stores con contadores por ventana y volcado diferido.
+    Las subclases implementan las operaciones atómicas sobre las claves.
+    """
+
+    def __init__(self, prefix='limits'):
+        self.prefix = prefix
+        self._flusher_pid = None
+        self._flusher_lock = threading.Lock()
+
+    # Operaciones del store
+
+    @abc.abstractmethod
+    def _reserve(self, keys, cents, consume):
+        """1 si se aplicó, 0 si algún límite se excede, -1 si falta alguna clave"""
+
+    @abc.abstractmethod
+    def _seed(self, entries):
+        """Crea las ventanas (clave, usado, máximo, expira) que no existan"""
+
+    @abc.abstractmethod
+    def _release(self, keys, cents):
+        """Descuenta `cents` de las ventanas que existan"""
+
+    @abc.abstractmethod
+    def _set_max(self, key, max_cents):
+        """Cambia el máximo de la ventana si existe"""
+
+    @abc.abstractmethod
+    def _mark_dirty(self, keys):
+        """Marca las ventanas para el próximo volcado"""
+
+    @abc.abstractmethod
+    def _pop_dirty(self, count):
+        """Saca hasta `count` ventanas marcadas"""
+
+    @abc.abstractmethod
+    def _values(self, keys):
+        """(usado, máximo) de cada clave, o None si ya no existe"""
+
+    # Claves
+
+    def _key(self, player_id, transaction_type, period, period_start):
+        return f'{self.prefix}:{player_id}:{transaction_type}:{period}:{int(period_start.timestamp())}'
+
+    def _parse_key(self, key):
+        player_id, transaction_type, period, start = key[len(self.prefix) + 1:].split(':')
+        period_start = datetime.fromtimestamp(int(start), tz=timezone.get_current_timezone())
+        return int(player_id), transaction_type, period, period_bounds(period, period_start)
+
+    def _windows(self, player_id, transaction_type, now):
+        """[(período, inicio, fin, clave)] de las ventanas que contienen a `now`"""
+        windows = []
+        for period in LIMIT_PERIODS:
+            period_start, period_end = period_bounds(period, now)
+            windows.append((
+                period, period_start, period_end,
+                self._key(player_id, transaction_type, period, period_start)
+            ))
+        return windows
+
+    # API del servicio de billetera
+
+    def reserve(self, player_id, transaction_type, amount, now, consume=True):
+        """
+        Valida los límites y, con `consume`, acumula `amount` en un solo paso
+        atómico. Devuelve False si alguno se excede.
+        """
+        windows = self._windows(player_id, transaction_type, now)
+        keys = [window[3] for window in windows]
+        cents = to_cents(amount)
+        result = self._reserve(keys, cents, consume)
+        if result < 0:
+            self._seed(self._seed_entries(player_id, transaction_type, windows))
+            result = self._reserve(keys, cents, consume)
+            if result < 0:
+                # Solo pasa si la ventana ya expiró (reloj del nodo atrasado)
+                raise LimitsUnavailable('No se pudieron cargar las ventanas de límites')
+        return result > 0
+
+    def release(self, player_id, transaction_type, amount, now):
+        """Deshace un `reserve` cuyo movimiento no llegó a confirmarse"""
+        keys = [window[3] for window in self._windows(player_id, transaction_type, now)]
+        try:
+            self._release(keys, to_cents(amount))
+            self._mark_dirty(keys)
+        except LimitsUnavailable:
+            # Se propaga el error original del movimiento; el contador queda alto (más restrictivo)
+            logger.exception('No se pudo devolver la reserva de límites')
+
+    def committed(self, player_id, transaction_type, now):
+        """Marca para el volcado las ventanas de un movimiento confirmado"""
+        try:
+            self._mark_dirty([window[3] for window in self._windows(player_id, transaction_type, now)])
+        except LimitsUnavailable:
+            # El contador ya está en el store; la fila se pondrá al día en el próximo movimiento
+            logger.exception('No se pudieron marcar los límites para el volcado')
+        self._ensure_flusher()
+
+    def limit_changed(self, limit):
+        """Aplica al store un nuevo máximo configurado en TransactionLimit"""
+        period_start, _ = period_bounds(limit.period, timezone.localtime())
+        self._set_max(
+            self._key(limit.player_id, limit.transaction_type, limit.period, period_start),
+            to_cents(limit.max_amount)
+        )
+
+    def _seed_entries(self, player_id, transaction_type, windows):
+        rows = {
+            limit.period: limit
+            for limit in TransactionLimit.objects.filter(
+                player_id=player_id,
+                transaction_type=transaction_type,
+                period__in=LIMIT_PERIODS
+            )
+        }
+        entries = []
+        for period, period_start, period_end, key in windows:
+            limit = rows.get(period)
+            used = 0
+            if limit is None:
+                default = DEFAULT_LIMITS.get(period)
+                max_cents = UNLIMITED if default is None else to_cents(default)
+            else:
+                max_cents = to_cents(limit.max_amount)
+                if limit.period_start == period_start:
+                    used = to_cents(limit.current_amount)
+            entries.append((key, used, max_cents, int(period_end.timestamp()) + EXPIRY_GRACE))
+        return entries
+
+    # Volcado a TransactionLimit
+
+    def flush(self):
+        """Vuelca las ventanas marcadas; devuelve cuántas se escribieron"""
+        written = 0
+        while True:
+            keys = self._pop_dirty(FLUSH_BATCH_SIZE)
+            if not keys:
+                return written
+            try:
+                written += self._write_rows(keys)
+            except BaseException:
+                self._mark_dirty(keys)
+                raise
+
+    def _write_rows(self, keys):
+        windows = {}
+        for key in set(keys):
+            player_id, transaction_type, period, bounds = self._parse_key(key)
+            identity = (player_id, transaction_type, period)
+            # Si se marcaron dos ventanas de la misma fila, gana la más reciente
+            if identity not in windows or windows[identity][1][0] < bounds[0]:
+                windows[identity] = (key, bounds)
+
+        with db_transaction.atomic():
+            rows = {
+                (limit.player_id, limit.transaction_type, limit.period): limit
+                for limit in TransactionLimit.objects.select_for_update().filter(
+                    player_id__in={identity[0] for identity in windows},
+                    period__in=LIMIT_PERIODS
+                )
+            }
+            # Los valores se leen con las filas bloqueadas: otro volcado
+            # concurrente no puede escribir uno más viejo después
+            identities = list(windows)
+            values = self._values([windows[identity][0] for identity in identities])
+
+            to_create, to_update = [], []
+            for identity, value in zip(identities, values):
+                if value is None:
+                    continue
+                used, max_cents = value
+                period_start, period_end = windows[identity][1]
+                limit = rows.get(identity)
+                if limit is None:
+                    if max_cents == UNLIMITED:
+                        continue
+                    player_id, transaction_type, period = identity
+                    to_create.append(TransactionLimit(
+                        player_id=player_id,
+                        period=period,
+                        transaction_type=transaction_type,
+                        max_amount=from_cents(max_cents),
+                        current_amount=from_cents(used),
+                        period_start=period_start,
+                        period_end=period_end
+                    ))
+                elif limit.period_start <= period_start:
+                    limit.current_amount = from_cents(used)
+                    limit.period_start = period_start
+                    limit.period_end = period_end
+                    to_update.append(limit)
+
+            if to_create:
+                TransactionLimit.objects.bulk_create(to_create, ignore_conflicts=True)
+            if to_update:
+                TransactionLimit.objects.bulk_update(
+                    to_update, ['current_amount', 'period_start', 'period_end']
+                )
+        return len(to_create) + len(to_update)
+
+    def _ensure_flusher(self):
+        # Un hilo por proceso (los hilos no sobreviven a un fork)
+        if not settings.LIMITS_FLUSH_INTERVAL or self._flusher_pid == os.getpid():
+            return
+        with self._flusher_lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+            threading.Thread(target=self._flush_loop, name='limits-flush', daemon=True).start()
+            atexit.register(self._flush_quietly)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(settings.LIMITS_FLUSH_INTERVAL)
+            self._flush_quietly()
+
+    def _flush_quietly(self):
+        close_old_connections()
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('No se pudieron volcar los límites a TransactionLimit')
+        finally:
+            close_old_connections()
+
+
+class MemoryLimitStore(CounterLimitStore):
+    """Ventanas en un dict del proceso: un solo proceso, sin Redis"""
+
+    def __init__(self, prefix='limits'):
+        super().__init__(prefix)
+        self._windows_by_key = {}  # clave -> [usado, máximo, expira]
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    def _live(self, key, now):
+        window = self._windows_by_key.get(key)
+        if window is not None and window[2] <= now:
+            del self._windows_by_key[key]
+            return None
+        return window
+
+    def _reserve(self, keys, cents, consume):
+        now = time.time()
+        with self._lock:
+            windows = [self._live(key, now) for key in keys]
+            if any(window is None for window in windows):
+                return -1
+            for used, max_cents, _ in windows:
+                if max_cents != UNLIMITED and used + cents > max_cents:
+                    return 0
+            if consume:
+                for window in windows:
+                    window[0] += cents
+            return 1
+
+    def _seed(self, entries):
+        now = time.time()
+        with self._lock:
+            for key, used, max_cents, expire_at in entries:
+                if self._live(key, now) is None:
+                    self._windows_by_key[key] = [used, max_cents, expire_at]
+
+    def _release(self, keys, cents):
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                window = self._live(key, now)
+                if window is not None:
+                    window[0] -= cents
+
+    def _set_max(self, key, max_cents):
+        with self._lock:
+            window = self._live(key, time.time())
+            if window is not None:
+                window[1] = max_cents
+
+    def _mark_dirty(self, keys):
+        with self._lock:
+            self._dirty.update(keys)
+
+    def _pop_dirty(self, count):
+        with self._lock:
+            return [self._dirty.pop() for _ in range(min(count, len(self._dirty)))]
+
+    def _values(self, keys):
+        now = time.time()
+        with self._lock:
+            values = []
+            for key in keys:
+                window = self._live(key, now)
+                values.append(None if window is None else (window[0], window[1]))
+            return values
+
+
+# Valida todas las ventanas y, si ninguna se excede, las incrementa.
+# KEYS: una clave por ventana. ARGV: monto en centavos, 1 = consumir / 0 = solo validar
+RESERVE_SCRIPT = """
+local amount = tonumber(ARGV[1])
+for _, key in ipairs(KEYS) do
+    local values = redis.call('HMGET', key, 'used', 'max')
+    if not values[1] then
+        return -1
+    end
+    local max = tonumber(values[2])
+    if max >= 0 and tonumber(values[1]) + amount > max then
+        return 0
+    end
+end
+if ARGV[2] == '1' then
+    for _, key in ipairs(KEYS) do
+        redis.call('HINCRBY', key, 'used', amount)
+    end
+end
+return 1
+"""
+
+# ARGV: (usado, máximo, expira) por cada clave; no pisa ventanas existentes
+SEED_SCRIPT = """
+for i, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 0 then
+        redis.call('HSET', key, 'used', ARGV[i * 3 - 2], 'max', ARGV[i * 3 - 1])
+        redis.call('EXPIREAT', key, ARGV[i * 3])
+    end
+end
+return 1
+"""
+
+RELEASE_SCRIPT = """
+for _, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        redis.call('HINCRBY', key, 'used', -tonumber(ARGV[1]))
+    end
+end
+return 1
+"""
+
+SET_MAX_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('HSET', KEYS[1], 'max', ARGV[1])
+end
+return 1
+"""
+
+
+class RedisLimitStore(CounterLimitStore):
+    """Ventanas en Redis, compartidas por todos los procesos y nodos"""
+
+    def __init__(self, url, prefix='limits'):
+        super().__init__(prefix)
+        import redis
+        self._errors = (redis.RedisError,)
+        self._client = redis.Redis.from_url(url)
+        self._reserve_script = self._client.register_script(RESERVE_SCRIPT)
+        self._seed_script = self._client.register_script(SEED_SCRIPT)
+        self._release_script = self._client.register_script(RELEASE_SCRIPT)
+        self._set_max_script = self._client.register_script(SET_MAX_SCRIPT)
+        self._dirty_key = f'{prefix}:dirty'
+
+    def _call(self, func, *args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        except self._errors as e:
+            raise LimitsUnavailable(str(e)) from e
+
+    def _reserve(self, keys, cents, consume):
+        return int(self._call(self._reserve_script, keys=keys, args=[cents, 1 if consume else 0]))
+
+    def _seed(self, entries):
+        args = []
+        for _, used, max_cents, expire_at in entries:
+            args.extend((used, max_cents, expire_at))
+        self._call(self._seed_script, keys=[entry[0] for entry in entries], args=args)
+
+    def _release(self, keys, cents):
+        self._call(self._release_script, keys=keys, args=[cents])
+
+    def _set_max(self, key, max_cents):
+        self._call(self._set_max_script, keys=[key], args=[max_cents])
+
+    def _mark_dirty(self, keys):
+        self._call(self._client.sadd, self._dirty_key, *keys)
+
+    def _pop_dirty(self, count):
+        return [key.decode() for key in self._call(self._client.spop, self._dirty_key, count) or []]
+
+    def _values(self, keys):
+        pipeline = self._client.pipeline(transaction=False)
+        for key in keys:
+            pipeline.hmget(key, 'used', 'max')
+        values = []
+        for used, max_cents in self._call(pipeline.execute):
+            values.append(None if used is None else (int(used), int(max_cents)))
+        return values
+
+    def delete_all(self):
+        """Borra las ventanas del prefijo (benchmarks)"""
+        keys = self._call(lambda: list(self._client.scan_iter(f'{self.prefix}:*')))
+        if keys:
+            self._call(self._client.delete, *keys)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def create_store(name, url=''):
+    if name == 'redis':
+        if not url:
+            raise LimitsUnavailable('LIMITS_STORE=redis requiere LIMITS_REDIS_URL o REDIS_URL')
+        return RedisLimitStore(url)
+    if name == 'memory':
+        return MemoryLimitStore()
+    if name == 'database':
+        return DatabaseLimitStore()
+    raise ValueError(f'LIMITS_STORE desconocido: {name}')
+
+
+@receiver(setting_changed)
+def _reset_stores(setting, **kwargs):
+    # override_settings de LIMITS_* (tests) empieza con un store nuevo
+    if setting.startswith('LIMITS_'):
+        _stores.clear()
+
+
+def get_store():
+    """Store de LIMITS_STORE, uno por proceso"""
+    config = (settings.LIMITS_STORE, settings.LIMITS_REDIS_URL)
+    store = _stores.get(config)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(config)
+            if store is None:
+                store = _stores[config] = create_store(*config)
+    return store
@@ -0,0 +1,84 @@
+import statistics
+import time
+from decimal import Decimal
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction as db_transaction
+from django.utils import timezone
+from backend.apps.players.models import Player
+from backend.apps.transactions import limits
+
+STORES = ('memory', 'redis', 'database')
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide la validación de límites por movimiento en cada store (memoria, Redis, '
+        'base de datos). Los contadores del benchmark usan un prefijo propio y las '
+        'filas de la base de datos se revierten al terminar'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000, help='Movimientos por store')
+        parser.add_argument(
+            '--store', action='append', choices=STORES,
+            help='Store a medir (repetible; por defecto memoria, y Redis si hay LIMITS_REDIS_URL)'
+        )
+        parser.add_argument('--player', type=int, help='Jugador de las filas de límites (por defecto el primero)')
+
+    def handle(self, *args, **options):
+        if options['count'] < 1:
+            raise CommandError('--count debe ser mayor que 0')
+        stores = options['store'] or ['memory'] + (['redis'] if settings.LIMITS_REDIS_URL else [])
+        player_id = options['player'] or Player.objects.values_list('pk', flat=True).first()
+        if player_id is None:
+            raise CommandError('No hay jugadores; cree uno o use --player')
+
+        for name in stores:
+            if name == 'redis':
+                if not settings.LIMITS_REDIS_URL:
+                    raise CommandError('El store redis requiere LIMITS_REDIS_URL o REDIS_URL')
+                store = limits.RedisLimitStore(settings.LIMITS_REDIS_URL, prefix='bench:limits')
+            else:
+                store = limits.create_store(name)
+            try:
+                self._report(name, *self._run(store, player_id, options['count']))
+            except limits.LimitsUnavailable as e:
+                raise CommandError(f'El store {name} no está disponible: {e}')
+            finally:
+                if name == 'redis':
+                    store.delete_all()
+
+    def _run(self, store, player_id, count):
+        amount = Decimal('0.01')
+        now = timezone.localtime()
+        timings = []
+        queries = [0]
+
+        def count_queries(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count_queries):
+            try:
+                with db_transaction.atomic():
+                    for _ in range(count):
+                        start = time.perf_counter()
+                        store.reserve(player_id, 'deposit', amount, now)
+                        timings.append(time.perf_counter() - start)
+                    raise _Rollback
+            except _Rollback:
+                pass
+        return timings, queries[0]
+
+    def _report(self, name, timings, queries):
+        timings.sort()
+        p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+        self.stdout.write(
+            f'{name:<9} media {statistics.mean(timings) * 1e6:>9.1f} µs   '
+            f'p99 {p99 * 1e6:>9.1f} µs   consultas {queries / len(timings):.2f} por movimiento'
+        )
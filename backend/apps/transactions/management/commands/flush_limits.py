@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+from backend.apps.transactions import limits
+
+
+class Command(BaseCommand):
+    help = (
+        'Vuelca a TransactionLimit los contadores de límites pendientes del store '
+        '(con LIMITS_STORE=redis; el store en memoria solo lo vuelca su propio proceso)'
+    )
+
+    def handle(self, *args, **options):
+        try:
+            written = limits.get_store().flush()
+        except limits.LimitsUnavailable as e:
+            raise CommandError(f'El store de límites no está disponible: {e}')
+        self.stdout.write(self.style.SUCCESS(f'Se volcaron {written} límites'))
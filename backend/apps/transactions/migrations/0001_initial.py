@@ -0,0 +1,79 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('players', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Transaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_type', models.CharField(choices=[('deposit', 'Depósito'), ('withdrawal', 'Retiro'), ('win', 'Ganancia'), ('loss', 'Pérdida')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('currency', models.CharField(choices=[('USD', 'Dólares USD'), ('EUR', 'Euros EUR'), ('MXN', 'Pesos MXN')], default='USD', max_length=3)),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('completed', 'Completada'), ('cancelled', 'Cancelada'), ('rejected', 'Rechazada')], default='pending', max_length=20)),
+                ('origin', models.CharField(help_text='Origen de los fondos', max_length=100)),
+                ('channel', models.CharField(choices=[('web', 'Web'), ('mobile', 'Móvil'), ('terminal', 'Terminal'), ('api', 'API')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('requires_authorization', models.BooleanField(default=False)),
+                ('authorization_notes', models.TextField(blank=True)),
+                ('authorized_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='authorized_transactions', to=settings.AUTH_USER_MODEL)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transactions', to='players.player')),
+                ('processed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='processed_transactions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CancellationRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reason', models.TextField()),
+                ('requires_double_authorization', models.BooleanField(default=False)),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('approved', 'Aprobada'), ('rejected', 'Rechazada')], default='pending', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('first_authorizer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='first_authorized_cancellations', to=settings.AUTH_USER_MODEL)),
+                ('requested_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='requested_cancellations', to=settings.AUTH_USER_MODEL)),
+                ('second_authorizer', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='second_authorized_cancellations', to=settings.AUTH_USER_MODEL)),
+                ('transaction', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='cancellation_request', to='transactions.transaction')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TransactionLimit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('daily', 'Diario'), ('weekly', 'Semanal'), ('monthly', 'Mensual')], max_length=10)),
+                ('transaction_type', models.CharField(choices=[('deposit', 'Depósito'), ('withdrawal', 'Retiro'), ('win', 'Ganancia'), ('loss', 'Pérdida')], max_length=20)),
+                ('max_amount', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('current_amount', models.DecimalField(decimal_places=2, default=0, max_digits=15)),
+                ('period_start', models.DateTimeField()),
+                ('period_end', models.DateTimeField()),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='transaction_limits', to='players.player')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['player', 'created_at'], name='transaction_player__aff065_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['transaction_type', 'status'], name='transaction_transac_ed11cf_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='transactionlimit',
+            unique_together={('player', 'period', 'transaction_type')},
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-18 14:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['player', 'status', 'transaction_type', 'created_at', 'amount'], name='transaction_summary_idx'),
+        ),
+    ]
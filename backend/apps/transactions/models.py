@@ -57,6 +57,12 @@ class Transaction(models.Model):
         indexes = [
             models.Index(fields=['player', 'created_at']),
             models.Index(fields=['transaction_type', 'status']),
+            # Historial del jugador filtrado por estado y tipo (?status=&transaction_type=)
+            # dentro de un rango de fechas; los resúmenes usan PlayerDailyStats
+            models.Index(
+                fields=['player', 'status', 'transaction_type', 'created_at', 'amount'],
+                name='transaction_summary_idx'
+            ),
         ]
 
     def __str__(self):
@@ -0,0 +1,104 @@
+# backend/apps/transactions/services.py
+"""
+Servicio de billetera: aplica depósitos y retiros en una sola pasada.
+
+Cada movimiento bloquea la cuenta del jugador (ledger.hold), valida y acumula
+sus límites en el store de límites (limits.py) y escribe el asiento del
+diario y el registro de la transacción. El nuevo balance se calcula a partir
+del saldo bloqueado, sin volver a leer al jugador.
+"""
+from decimal import Decimal
+from django.db import transaction as db_transaction
+from django.utils import timezone
+from backend.apps.players import ledger, rollups
+from . import limits
+from .models import Transaction
+
+# Retiros por encima de este monto quedan pendientes de autorización
+AUTHORIZATION_THRESHOLD = Decimal('1000')
+
+LIMIT_MESSAGES = {
+    'deposit': 'Límite de depósito excedido',
+    'withdrawal': 'Límite de retiro excedido',
+}
+
+
+class WalletError(Exception):
+    """Error de negocio al aplicar un movimiento de billetera"""
+
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+class InsufficientFunds(WalletError):
+    pass
+
+
+class LimitExceeded(WalletError):
+    pass
+
+
+def apply_movement(player, transaction_type, amount, processed_by=None, **fields):
+    """
+    Aplica un depósito o retiro para `player`.
+
+    Devuelve (transacción, nuevo_balance). Si el retiro supera el umbral de
+    autorización se registra como pendiente y el balance no cambia.
+    Lanza InsufficientFunds o LimitExceeded si el movimiento no procede, y
+    limits.LimitsUnavailable si no se pueden validar los límites.
+    """
+    amount = Decimal(str(amount))
+    now = timezone.localtime()
+    store = limits.get_store()
+    is_withdrawal = transaction_type == 'withdrawal'
+    pending = is_withdrawal and amount > AUTHORIZATION_THRESHOLD
+    reserved = False
+
+    try:
+        with db_transaction.atomic():
+            # Único bloqueo del movimiento: serializa saldo y límites del jugador
+            with ledger.hold(player.pk) as account:
+                balance = account.balance
+                if is_withdrawal and balance < amount:
+                    raise InsufficientFunds('Saldo insuficiente')
+
+                # Un retiro pendiente se valida contra los límites pero no los consume
+                if not store.reserve(player.pk, transaction_type, amount, now, consume=not pending):
+                    raise LimitExceeded(LIMIT_MESSAGES[transaction_type])
+                reserved = not pending
+
+                if pending:
+                    transaction_obj = Transaction.objects.create(
+                        player=player,
+                        transaction_type=transaction_type,
+                        amount=amount,
+                        requires_authorization=True,
+                        **fields
+                    )
+                    rollups.record_transaction(transaction_obj)
+                    return transaction_obj, balance
+
+                transaction_obj = Transaction.objects.create(
+                    player=player,
+                    transaction_type=transaction_type,
+                    amount=amount,
+                    status='completed',
+                    processed_at=now,
+                    processed_by=processed_by,
+                    **fields
+                )
+                rollups.record_transaction(transaction_obj)
+                new_balance = account.post(
+                    -amount if is_withdrawal else amount,
+                    transaction_type,
+                    f'transaction:{transaction_obj.id}'
+                )
+            # Las ventanas se marcan para el volcado cuando el movimiento se confirma
+            db_transaction.on_commit(lambda: store.committed(player.pk, transaction_type, now))
+    except BaseException:
+        # El store de límites no participa del rollback: se devuelve lo reservado
+        if reserved:
+            store.release(player.pk, transaction_type, amount, now)
+        raise
+    return transaction_obj, new_balance
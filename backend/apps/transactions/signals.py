@@ -0,0 +1,23 @@
+# backend/apps/transactions/signals.py
+"""
+Lleva al store de límites los máximos que se cambian en TransactionLimit
+(el volcado diferido escribe en bloque y no dispara estas señales).
+"""
+import logging
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from . import limits
+from .models import TransactionLimit
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=TransactionLimit)
+def limit_saved(sender, instance, **kwargs):
+    def apply():
+        try:
+            limits.get_store().limit_changed(instance)
+        except limits.LimitsUnavailable:
+            logger.exception('No se pudo actualizar el máximo en el store de límites')
+    db_transaction.on_commit(apply)
@@ -1,3 +1,264 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from casinoChill.testing import QueryCountMixin
+from backend.apps.authentication.tokens import ClaimsTokenObtainPairSerializer
+from backend.apps.players import ledger
+from backend.apps.players.tests import create_player
+from casinoChill import replicas
+from . import limits, services as wallet
+from .models import Transaction, CancellationRequest, TransactionLimit
 
-# Create your tests here.
+
+class TransactionQueryCountTests(QueryCountMixin, APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create(username='staff', is_staff=True)
+        self.client.force_authenticate(self.staff)
+        self.counter = 0
+
+    def add_transactions(self, count):
+        for _ in range(count):
+            self.counter += 1
+            player = create_player(f'player{self.counter}')
+            Transaction.objects.create(
+                player=player, transaction_type='deposit', amount=Decimal('10'),
+                origin='test', channel='web', status='completed', processed_by=self.staff
+            )
+
+    def add_cancellations(self, count):
+        for _ in range(count):
+            self.add_transactions(1)
+            CancellationRequest.objects.create(
+                transaction=Transaction.objects.latest('id'),
+                requested_by=self.staff,
+                reason='test'
+            )
+
+    def test_transaction_list(self):
+        self.assertConstantQueries(
+            '/api/transactions/transactions/', self.add_transactions, expected=1
+        )
+
+    def test_cancellation_list(self):
+        self.assertConstantQueries(
+            '/api/transactions/cancellations/', self.add_cancellations, expected=1
+        )
+
+
+@override_settings(ASYNC_DB_THREADS=0)
+class AsyncDepositTests(APITestCase):
+    def test_create_deposit_async(self):
+        player = create_player('async_depositor')
+        token = ClaimsTokenObtainPairSerializer.get_token(player.user).access_token
+        url = '/api/transactions/transactions/create_deposit/async/'
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {token}'}
+
+        response = self.client.post(
+            url, {'amount': '25.50', 'origin': 'test', 'channel': 'web'}, format='json', **auth
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['new_balance'], '25.50')
+        self.assertEqual(ledger.get_balance(player.id), Decimal('25.50'))
+
+        response = self.client.post(
+            url, {'amount': '0', 'origin': 'test', 'channel': 'web'}, format='json', **auth
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('amount', response.json())
+
+
+@override_settings(REPLICA_DATABASE='replica')
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = replicas.ReplicaRouter()
+        cache.clear()
+
+    def test_reads_go_to_replica_only_inside_marked_block(self):
+        self.assertIsNone(self.router.db_for_read(Transaction))
+        with replicas.reading_from_replica():
+            self.assertEqual(self.router.db_for_read(Transaction), 'replica')
+            self.assertEqual(self.router.db_for_write(Transaction), 'default')
+            # Tras escribir en el mismo bloque, las lecturas vuelven al primario
+            self.assertIsNone(self.router.db_for_read(Transaction))
+        self.assertIsNone(self.router.db_for_read(Transaction))
+
+    def test_pinned_user_reads_from_primary(self):
+        user = User(id=42)
+        replicas.pin(user.id)
+        with replicas.reading_from_replica(user):
+            self.assertIsNone(self.router.db_for_read(Transaction))
+        with replicas.reading_from_replica(User(id=43)):
+            self.assertEqual(self.router.db_for_read(Transaction), 'replica')
+
+    def test_replica_is_never_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica', 'transactions'))
+        self.assertIsNone(self.router.allow_migrate('default', 'transactions'))
+
+
+@override_settings(REPLICA_DATABASE='replica')
+class ReplicaPinningTests(APITestCase):
+    def test_write_pins_user_to_primary(self):
+        cache.clear()
+        player = create_player('pinned')
+        self.client.force_authenticate(player.user)
+        self.assertFalse(replicas.is_pinned(player.user.id))
+        response = self.client.post(
+            '/api/transactions/transactions/create_deposit/',
+            {'amount': '10', 'origin': 'test', 'channel': 'web'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(replicas.is_pinned(player.user.id))
+
+
+class RollupConsistencyTests(APITestCase):
+    """El resumen (PlayerDailyStats) coincide con el historial tras cada escritura"""
+
+    def setUp(self):
+        self.player = create_player('rollups')
+        self.player.user.is_staff = True
+        self.player.user.save()
+        self.client.force_authenticate(self.player.user)
+
+    def assertSummaryMatchesHistory(self):
+        history = self.client.get('/api/transactions/history/', {'page_size': 200}).json()['results']
+        summary = self.client.get('/api/transactions/history/summary/').json()['summary']
+
+        def total(transaction_type):
+            amount = sum(
+                (Decimal(row['amount']) for row in history
+                 if row['status'] == 'completed' and row['transaction_type'] == transaction_type),
+                Decimal('0')
+            )
+            return str(amount.quantize(Decimal('0.01')))
+
+        self.assertEqual(summary['total_deposits'], total('deposit'))
+        self.assertEqual(summary['total_withdrawals'], total('withdrawal'))
+        self.assertEqual(summary['transaction_count'], len(history))
+
+    def test_generic_writes_keep_summary_in_sync(self):
+        url = '/api/transactions/transactions/'
+        fields = {'player': self.player.id, 'origin': 'test', 'channel': 'web'}
+
+        response = self.client.post(url, {
+            **fields, 'transaction_type': 'deposit', 'amount': '50.00', 'status': 'completed'
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        deposit_id = response.json()['id']
+        self.assertSummaryMatchesHistory()
+
+        response = self.client.post(url, {
+            **fields, 'transaction_type': 'withdrawal', 'amount': '10.00', 'status': 'pending'
+        }, format='json')
+        withdrawal_id = response.json()['id']
+        self.assertSummaryMatchesHistory()
+
+        self.client.patch(f'{url}{withdrawal_id}/', {'status': 'completed'}, format='json')
+        self.assertSummaryMatchesHistory()
+
+        self.client.patch(f'{url}{deposit_id}/', {'amount': '70.00'}, format='json')
+        self.assertSummaryMatchesHistory()
+
+        self.client.patch(f'{url}{deposit_id}/', {'transaction_type': 'withdrawal'}, format='json')
+        self.assertSummaryMatchesHistory()
+
+        response = self.client.delete(f'{url}{withdrawal_id}/')
+        self.assertEqual(response.status_code, 204)
+        self.assertSummaryMatchesHistory()
+
+        summary = self.client.get('/api/transactions/history/summary/').json()['summary']
+        self.assertEqual(summary['total_withdrawals'], '70.00')
+        self.assertEqual(summary['transaction_count'], 1)
+
+
+class WalletServiceTests(TestCase):
+    def setUp(self):
+        # Store de límites en memoria, nuevo en cada test
+        limits_settings = override_settings(LIMITS_STORE='memory', LIMITS_FLUSH_INTERVAL=0)
+        limits_settings.enable()
+        self.addCleanup(limits_settings.disable)
+        self.player = create_player('wallet')
+
+    def move(self, transaction_type, amount, **fields):
+        return wallet.apply_movement(
+            self.player, transaction_type, Decimal(amount), origin='test', channel='web', **fields
+        )
+
+    def test_deposit(self):
+        transaction_obj, new_balance = self.move('deposit', '150.25')
+        self.assertEqual(transaction_obj.status, 'completed')
+        self.assertEqual(new_balance, Decimal('150.25'))
+        self.assertEqual(ledger.get_balance(self.player.id), Decimal('150.25'))
+
+    def test_withdrawal_with_insufficient_funds(self):
+        self.move('deposit', '20')
+        with self.assertRaises(wallet.InsufficientFunds):
+            self.move('withdrawal', '20.01')
+        self.assertEqual(ledger.get_balance(self.player.id), Decimal('20.00'))
+        self.assertEqual(Transaction.objects.filter(transaction_type='withdrawal').count(), 0)
+
+    def test_limit_exceeded_and_reservation_released_on_rollback(self):
+        self.move('deposit', '4000')
+        with self.assertRaises(wallet.LimitExceeded):
+            self.move('deposit', '1001')
+
+        # Falla después de reservar (campo inexistente): la reserva se devuelve
+        with self.assertRaises(TypeError):
+            self.move('deposit', '1000', unknown_field=True)
+        self.assertEqual(Transaction.objects.count(), 1)
+        _, new_balance = self.move('deposit', '1000')
+        self.assertEqual(new_balance, Decimal('5000'))
+
+    def test_withdrawal_above_threshold_is_pending(self):
+        self.move('deposit', '3000')
+        amount = wallet.AUTHORIZATION_THRESHOLD + 1
+        transaction_obj, balance = self.move('withdrawal', amount)
+        self.assertEqual(transaction_obj.status, 'pending')
+        self.assertTrue(transaction_obj.requires_authorization)
+        self.assertEqual(balance, Decimal('3000'))
+        self.assertEqual(ledger.get_balance(self.player.id), Decimal('3000.00'))
+        # Un retiro pendiente no consume el límite
+        self.assertTrue(limits.get_store().reserve(
+            self.player.pk, 'withdrawal', limits.DEFAULT_LIMITS['daily'], timezone.localtime(), consume=False
+        ))
+
+
+@override_settings(LIMITS_STORE='memory', LIMITS_FLUSH_INTERVAL=0)
+class CounterLimitTests(TestCase):
+    def test_limits_are_enforced_in_store_and_flushed_later(self):
+        player = create_player('limited')
+        with self.captureOnCommitCallbacks(execute=True):
+            wallet.apply_movement(player, 'deposit', Decimal('4000'), origin='test', channel='web')
+        with self.assertRaises(wallet.LimitExceeded):
+            wallet.apply_movement(player, 'deposit', Decimal('1500'), origin='test', channel='web')
+
+        # Escritura diferida: las filas aparecen con el volcado
+        self.assertFalse(TransactionLimit.objects.filter(player=player).exists())
+        limits.get_store().flush()
+        daily = TransactionLimit.objects.get(player=player, period='daily', transaction_type='deposit')
+        self.assertEqual(daily.current_amount, Decimal('4000'))
+        self.assertEqual(daily.max_amount, limits.DEFAULT_LIMITS['daily'])
+        self.assertFalse(TransactionLimit.objects.filter(player=player, period='weekly').exists())
+
+    def test_new_window_starts_from_zero(self):
+        player = create_player('rollover')
+        store = limits.MemoryLimitStore()
+        today = timezone.localtime()
+        self.assertTrue(store.reserve(player.pk, 'deposit', Decimal('4000'), today))
+        self.assertFalse(store.reserve(player.pk, 'deposit', Decimal('1500'), today))
+        self.assertTrue(store.reserve(player.pk, 'deposit', Decimal('1500'), today + timedelta(days=1)))
+
+    @override_settings(LIMITS_STORE='redis', LIMITS_REDIS_URL='redis://127.0.0.1:1/0')
+    def test_store_outage_is_not_reported_as_limit_exceeded(self):
+        player = create_player('outage')
+        token = ClaimsTokenObtainPairSerializer.get_token(player.user).access_token
+        response = self.client.post(
+            '/api/transactions/transactions/create_deposit/',
+            {'amount': '10', 'origin': 'test', 'channel': 'web'},
+            content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {token}'
+        )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(ledger.get_balance(player.id), Decimal('0'))
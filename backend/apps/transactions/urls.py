@@ -10,4 +10,5 @@ router.register(r'history', views.TransactionHistoryViewSet, basename='transacti
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('transactions/create_deposit/async/', views.create_deposit_async, name='transaction-create-deposit-async'),
 ]
\ No newline at end of file
@@ -2,14 +2,16 @@
 from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from django.db import transaction as db_transaction, models  # Added models
 from django.db.models import F  # Added F expression
 from django.utils import timezone
-from datetime import timedelta
+from django.utils.dateparse import parse_date
+from datetime import datetime, time, timedelta
 from decimal import Decimal
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import Transaction, TransactionLimit, CancellationRequest
+from .models import Transaction, CancellationRequest
 from .serializers import (
     TransactionSerializer, 
     DepositSerializer, 
@@ -17,16 +19,59 @@ from .serializers import (
     CancellationRequestSerializer
 )
 from backend.apps.players.models import Player
+from backend.apps.players import ledger, player_cache, rollups
+from . import limits, services as wallet
+from casinoChill.query_profiles import QueryProfile, QueryProfileMixin
+from casinoChill.replicas import ReplicaReadMixin
+from casinoChill.pagination import OffsetPaginationMixin
+from casinoChill import async_api, realtime
 
+# Relaciones que necesita TransactionSerializer
+TRANSACTION_PROFILE = QueryProfile(select=('player__user', 'processed_by'))
 
-class TransactionViewSet(viewsets.ModelViewSet):
+
+def parse_date_param(name, value):
+    """Convierte un parámetro AAAA-MM-DD en fecha (None si no se envió)"""
+    if not value:
+        return None
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValidationError({name: 'Fecha inválida, use el formato AAAA-MM-DD'})
+    return day
+
+
+def filter_by_date_range(queryset, start_date, end_date):
+    """
+    Filtra por fecha de creación con rangos sobre la columna (sin DATE()),
+    para que la consulta pueda usar los índices que empiezan por created_at
+    """
+    start_day = parse_date_param('start_date', start_date)
+    end_day = parse_date_param('end_date', end_date)
+    
+    if start_day:
+        queryset = queryset.filter(
+            created_at__gte=timezone.make_aware(datetime.combine(start_day, time.min))
+        )
+    if end_day:
+        queryset = queryset.filter(
+            created_at__lt=timezone.make_aware(datetime.combine(end_day + timedelta(days=1), time.min))
+        )
+    return queryset
+
+
+class TransactionViewSet(OffsetPaginationMixin, QueryProfileMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
+    query_profiles = {'*': TRANSACTION_PROFILE}
     
     def get_queryset(self):
         user = self.request.user
+        queryset = self.apply_query_profile(Transaction.objects.all())
         if user.is_staff:
-            return Transaction.objects.all().order_by('-created_at')
-        return Transaction.objects.filter(player=user.player).order_by('-created_at')
+            return queryset.order_by('-created_at')
+        return queryset.filter(player_id=player_cache.player_id_for(user)).order_by('-created_at')
     
     def get_serializer_class(self):
         if self.action == 'create_deposit':
@@ -36,235 +81,124 @@ class TransactionViewSet(viewsets.ModelViewSet):
         return TransactionSerializer
 
     @action(detail=False, methods=['post'])
-    @db_transaction.atomic
     def create_deposit(self, request):
         """Crear un depósito ficticio"""
         serializer = DepositSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            player = request.user.player
-            
-            # Convertir amount a Decimal
-            amount = Decimal(str(serializer.validated_data['amount']))
-            
-            # Validar límites
-            if not self._check_limits(player, 'deposit', amount):
-                return Response(
-                    {'error': 'Límite de depósito excedido'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Crear transacción
-            transaction_data = serializer.validated_data.copy()
-            transaction_data['amount'] = amount
-            transaction_obj = Transaction.objects.create(
-                player=player,
-                transaction_type='deposit',
-                **transaction_data
-            )
-            
-            # Actualizar balance del jugador de forma atómica
-            Player.objects.filter(id=player.id).update(
-                balance=F('balance') + amount
-            )
-            
-            # Actualizar límites
-            self._update_limits(player, 'deposit', amount)
-            
-            # Procesar transacción
-            transaction_obj.status = 'completed'
-            transaction_obj.processed_at = timezone.now()
-            transaction_obj.processed_by = request.user
-            transaction_obj.save()
-            
-            # Obtener el jugador actualizado
-            player.refresh_from_db()
-            
-            return Response({
-                **TransactionSerializer(transaction_obj).data,
-                'new_balance': str(player.balance)  # Mantener como string para precisión
-            })
+            return self._apply_movement(request, 'deposit', serializer.validated_data)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=['post'])
-    @db_transaction.atomic
     def create_withdrawal(self, request):
         """Crear un retiro ficticio"""
         serializer = WithdrawalSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            player = request.user.player
-            
-            # Convertir amount a Decimal
-            amount = Decimal(str(serializer.validated_data['amount']))
-            
-            # Validar saldo suficiente de forma atómica
-            if not Player.objects.filter(id=player.id, balance__gte=amount).exists():
-                return Response(
-                    {'error': 'Saldo insuficiente'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Validar límites
-            if not self._check_limits(player, 'withdrawal', amount):
-                return Response(
-                    {'error': 'Límite de retiro excedido'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Crear transacción
-            transaction_data = serializer.validated_data.copy()
-            transaction_data['amount'] = amount
-            transaction_obj = Transaction.objects.create(
-                player=player,
-                transaction_type='withdrawal',
-                **transaction_data
-            )
-            
-            # Validar autorización si es requerida
-            if amount > Decimal('1000'):
-                transaction_obj.requires_authorization = True
-                transaction_obj.save()
-                return Response(
-                    {'message': 'Retiro requiere autorización', 'transaction_id': transaction_obj.id},
-                    status=status.HTTP_202_ACCEPTED
-                )
-            
-            # Procesar retiro inmediato de forma atómica
-            updated = Player.objects.filter(
-                id=player.id, 
-                balance__gte=amount
-            ).update(
-                balance=F('balance') - amount
-            )
-            
-            if not updated:
-                return Response(
-                    {'error': 'Saldo insuficiente durante el procesamiento'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            transaction_obj.status = 'completed'
-            transaction_obj.processed_at = timezone.now()
-            transaction_obj.processed_by = request.user
-            transaction_obj.save()
-            
-            # Actualizar límites
-            self._update_limits(player, 'withdrawal', amount)
-            
-            # Obtener el jugador actualizado
-            player.refresh_from_db()
-            
-            return Response({
-                **TransactionSerializer(transaction_obj).data,
-                'new_balance': str(player.balance)  # Mantener como string para precisión
-            })
+            return self._apply_movement(request, 'withdrawal', serializer.validated_data)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-    def _check_limits(self, player, transaction_type, amount):
-        """Validar límites de transacción - MODO SEGURO"""
-        today = timezone.now().date()
-        
-        try:
-            # Obtener o crear límite diario
-            daily_limit, created = TransactionLimit.objects.get_or_create(
-                player=player,
-                period='daily',
-                transaction_type=transaction_type,
-                defaults={
-                    'max_amount': Decimal('5000'),
-                    'current_amount': Decimal('0'),
-                    'period_start': today,
-                    'period_end': today + timedelta(days=1)
-                }
-            )
-            
-            # Verificar si el período ha expirado y resetear si es necesario
-            if not created and daily_limit.period_end < today:
-                daily_limit.current_amount = Decimal('0')
-                daily_limit.period_start = today
-                daily_limit.period_end = today + timedelta(days=1)
-                daily_limit.save()
-            
-            if daily_limit.current_amount + amount > daily_limit.max_amount:
-                return False
-            
-            # Obtener o crear límite mensual
-            month_start = today.replace(day=1)
-            next_month = month_start + timedelta(days=32)
-            month_end = next_month.replace(day=1) - timedelta(days=1)
-            
-            monthly_limit, created = TransactionLimit.objects.get_or_create(
-                player=player,
-                period='monthly',
-                transaction_type=transaction_type,
-                defaults={
-                    'max_amount': Decimal('50000'),
-                    'current_amount': Decimal('0'),
-                    'period_start': month_start,
-                    'period_end': month_end
-                }
-            )
-            
-            # Verificar si el período mensual ha expirado
-            if not created and monthly_limit.period_end < today:
-                monthly_limit.current_amount = Decimal('0')
-                monthly_limit.period_start = month_start
-                monthly_limit.period_end = month_end
-                monthly_limit.save()
-            
-            if monthly_limit.current_amount + amount > monthly_limit.max_amount:
-                return False
-            
-            return True
-            
-        except Exception as e:
-            # MODO SEGURO: En caso de error, rechazar la transacción
-            return False
+    # Altas y ediciones genéricas (staff): los acumulados diarios siguen a la fila
 
-    def _update_limits(self, player, transaction_type, amount):
-        """Actualizar límites de transacción de forma atómica"""
-        today = timezone.now().date()
-        
-        try:
-            # Actualizar límite diario de forma atómica
-            daily_limit = TransactionLimit.objects.filter(
-                player=player,
-                period='daily',
-                transaction_type=transaction_type,
-                period_start__lte=today,
-                period_end__gte=today
-            )
-            
-            if daily_limit.exists():
-                daily_limit.update(current_amount=F('current_amount') + amount)
-            
-            # Actualizar límite mensual de forma atómica
-            month_start = today.replace(day=1)
-            monthly_limit = TransactionLimit.objects.filter(
-                player=player,
-                period='monthly',
-                transaction_type=transaction_type,
-                period_start=month_start
-            )
-            
-            if monthly_limit.exists():
-                monthly_limit.update(current_amount=F('current_amount') + amount)
-            
-        except Exception as e:
-            # Log the error but don't fail the transaction
-            pass
+    def perform_create(self, serializer):
+        with db_transaction.atomic():
+            rollups.record_transaction(serializer.save())
+
+    def perform_update(self, serializer):
+        with db_transaction.atomic():
+            before = rollups.transaction_contribution(serializer.instance)
+            transaction_obj = serializer.save()
+            rollups.record_change(before, rollups.transaction_contribution(transaction_obj))
 
+    def perform_destroy(self, instance):
+        with db_transaction.atomic():
+            before = rollups.transaction_contribution(instance)
+            instance.delete()
+            rollups.record_change(before, {})
 
-class CancellationRequestViewSet(viewsets.ModelViewSet):
+    def _apply_movement(self, request, transaction_type, validated_data):
+        """Aplicar el movimiento con el servicio de billetera (un solo bloqueo)"""
+        body, status_code = apply_movement_for(request.user, transaction_type, validated_data)
+        return Response(body, status=status_code)
+
+
+def apply_movement_for(user, transaction_type, validated_data):
+    """Depósito o retiro del usuario autenticado; devuelve (cuerpo, status)"""
+    transaction_data = validated_data.copy()
+    amount = Decimal(str(transaction_data.pop('amount')))
+    
+    try:
+        transaction_obj, new_balance = wallet.apply_movement(
+            user.player,
+            transaction_type,
+            amount,
+            processed_by=user,
+            **transaction_data
+        )
+    except wallet.WalletError as e:
+        return {'error': e.message}, status.HTTP_400_BAD_REQUEST
+    except limits.LimitsUnavailable:
+        return (
+            {'error': 'Los límites no están disponibles, intente nuevamente'},
+            status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    
+    if transaction_obj.status == 'pending':
+        return (
+            {'message': 'Retiro requiere autorización', 'transaction_id': transaction_obj.id},
+            status.HTTP_202_ACCEPTED
+        )
+    
+    return {
+        **TransactionSerializer(transaction_obj).data,
+        'new_balance': str(new_balance)  # Mantener como string para precisión
+    }, status.HTTP_200_OK
+
+
+def _deposit_for_request(request, data):
+    user = async_api.authenticated_user(request)
+    if user is None:
+        return async_api.NOT_AUTHENTICATED
+    serializer = DepositSerializer(data=data)
+    if not serializer.is_valid():
+        return serializer.errors, status.HTTP_400_BAD_REQUEST
+    return apply_movement_for(user, 'deposit', serializer.validated_data)
+
+
+@async_api.endpoint('POST')
+async def create_deposit_async(request, data):
+    """
+    Variante async de TransactionViewSet.create_deposit para ASGI
+    (ver casinoChill/async_api.py)
+    """
+    return await async_api.run_db(_deposit_for_request, request, data)
+
+
+def _notify_cancellation(cancellation, trans):
+    """Avisa por WebSocket al jugador del resultado de la cancelación"""
+    realtime.publish(trans.player_id, 'cancellation', {
+        'cancellation_id': cancellation.id,
+        'transaction_id': trans.id,
+        'status': cancellation.status,
+        'transaction_status': trans.status,
+    })
+
+
+class CancellationRequestViewSet(QueryProfileMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
     serializer_class = CancellationRequestSerializer
+    query_profiles = {
+        '*': QueryProfile(select=(
+            'transaction__player__user', 'transaction__processed_by', 'requested_by'
+        )),
+    }
     
     def get_queryset(self):
         user = self.request.user
+        queryset = self.apply_query_profile(CancellationRequest.objects.all())
         if user.is_staff:
-            return CancellationRequest.objects.all().order_by('-created_at')
-        return CancellationRequest.objects.filter(requested_by=user).order_by('-created_at')
+            return queryset.order_by('-created_at')
+        return queryset.filter(requested_by_id=user.id).order_by('-created_at')
     
     @action(detail=True, methods=['post'], permission_classes=[IsAdminUser])
     @db_transaction.atomic
@@ -290,17 +224,16 @@ class CancellationRequestViewSet(viewsets.ModelViewSet):
                     
                     if trans.transaction_type == 'deposit':
                         # Revertir depósito: restar del balance
-                        Player.objects.filter(id=player.id).update(
-                            balance=F('balance') - trans.amount
-                        )
+                        ledger.adjust(player.id, -trans.amount, 'cancellation', f'transaction:{trans.id}')
                     elif trans.transaction_type == 'withdrawal':
                         # Revertir retiro: sumar al balance
-                        Player.objects.filter(id=player.id).update(
-                            balance=F('balance') + trans.amount
-                        )
+                        ledger.adjust(player.id, trans.amount, 'cancellation', f'transaction:{trans.id}')
                     
+                    previous_status = trans.status
                     trans.status = 'cancelled'
                     trans.save()
+                    rollups.record_cancellation(trans, previous_status)
+                    _notify_cancellation(cancellation, trans)
                 
                 return Response({'message': 'Cancelación autorizada y procesada'})
         else:
@@ -314,25 +247,26 @@ class CancellationRequestViewSet(viewsets.ModelViewSet):
                 player = trans.player
                 
                 if trans.transaction_type == 'deposit':
-                    Player.objects.filter(id=player.id).update(
-                        balance=F('balance') - trans.amount
-                    )
+                    ledger.adjust(player.id, -trans.amount, 'cancellation', f'transaction:{trans.id}')
                 elif trans.transaction_type == 'withdrawal':
-                    Player.objects.filter(id=player.id).update(
-                        balance=F('balance') + trans.amount
-                    )
+                    ledger.adjust(player.id, trans.amount, 'cancellation', f'transaction:{trans.id}')
                 
+                previous_status = trans.status
                 trans.status = 'cancelled'
                 trans.save()
+                rollups.record_cancellation(trans, previous_status)
+                _notify_cancellation(cancellation, trans)
             
             return Response({'message': 'Cancelación autorizada y procesada'})
         
         return Response({'error': 'No se puede autorizar'}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class TransactionHistoryViewSet(viewsets.ReadOnlyModelViewSet):
+class TransactionHistoryViewSet(ReplicaReadMixin, QueryProfileMixin, viewsets.ReadOnlyModelViewSet):
     permission_classes = [IsAuthenticated]
     serializer_class = TransactionSerializer
+    query_profiles = {'*': TRANSACTION_PROFILE}
+    replica_actions = ('list', 'retrieve', 'summary')
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['transaction_type', 'status', 'currency', 'channel']
     search_fields = ['origin', 'authorization_notes']
@@ -341,37 +275,30 @@ class TransactionHistoryViewSet(viewsets.ReadOnlyModelViewSet):
     
     def get_queryset(self):
         user = self.request.user
-        queryset = Transaction.objects.filter(player=user.player)
+        queryset = self.apply_query_profile(
+            Transaction.objects.filter(player_id=player_cache.player_id_for(user))
+        )
         
         # Filtros adicionales por fecha
-        start_date = self.request.query_params.get('start_date')
-        end_date = self.request.query_params.get('end_date')
-        
-        if start_date:
-            queryset = queryset.filter(created_at__date__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(created_at__date__lte=end_date)
-            
-        return queryset
+        return filter_by_date_range(
+            queryset,
+            self.request.query_params.get('start_date'),
+            self.request.query_params.get('end_date')
+        )
     
     @action(detail=False, methods=['get'])
     def summary(self, request):
         """Resumen de transacciones por período"""
-        player = request.user.player
+        player_id = player_cache.player_id_for(request.user)
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
         
-        queryset = Transaction.objects.filter(player=player)
-        
-        if start_date:
-            queryset = queryset.filter(created_at__date__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(created_at__date__lte=end_date)
-        
-        deposits = queryset.filter(transaction_type='deposit', status='completed')
-        withdrawals = queryset.filter(transaction_type='withdrawal', status='completed')
-        wins = queryset.filter(transaction_type='win', status='completed')
-        losses = queryset.filter(transaction_type='loss', status='completed')
+        # Suma los acumulados diarios del período (una fila por día)
+        totals = rollups.summarize(
+            player_id,
+            parse_date_param('start_date', start_date),
+            parse_date_param('end_date', end_date)
+        )
         
         return Response({
             'period': {
@@ -379,10 +306,10 @@ class TransactionHistoryViewSet(viewsets.ReadOnlyModelViewSet):
                 'end_date': end_date
             },
             'summary': {
-                'total_deposits': str(sum(d.amount for d in deposits)),  # Mantener como string
-                'total_withdrawals': str(sum(w.amount for w in withdrawals)),
-                'total_wins': str(sum(win.amount for win in wins)),
-                'total_losses': str(sum(loss.amount for loss in losses)),
-                'transaction_count': queryset.count()
+                'total_deposits': str(totals['deposits_total']),  # Mantener como string
+                'total_withdrawals': str(totals['withdrawals_total']),
+                'total_wins': str(totals['wins_total']),
+                'total_losses': str(totals['losses_total']),
+                'transaction_count': totals['transaction_count']
             }
-        })
\ No newline at end of file
+        })
@@ -2,6 +2,10 @@
 ASGI config for casinoChill project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP requests go to Django; WebSocket connections go to the real-time
+notifications app (casinoChill/realtime.py).
+
+    uvicorn casinoChill.asgi:application
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,4 +17,13 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'casinoChill.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from casinoChill.realtime import websocket_application  # noqa: E402  (requiere Django configurado)
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        await websocket_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -0,0 +1,131 @@
+"""
+Soporte de las vistas async de los endpoints calientes (jugar, saldo, depósito).
+
+Bajo ASGI, Django ejecuta cada vista síncrona con `sync_to_async` en modo
+thread_sensitive: todas comparten un único hilo por proceso, así que las
+peticiones que esperan a la base de datos se atienden de a una. Los métodos
+async del ORM (`aget`, `acreate`, ...) tampoco ayudan: con MySQL no hay un
+driver async y cada consulta vuelve a pasar por ese mismo hilo.
+
+Las vistas de este módulo hacen en el event loop lo que no toca la base de
+datos (parseo, validación de forma, respuesta) y ejecutan la parte
+transaccional completa, autenticación incluida, en un solo salto a un pool
+propio de ASYNC_DB_THREADS hilos. Cada hilo mantiene su conexión a la base de
+datos, de modo que la concurrencia queda acotada por el pool y no por un
+único hilo compartido.
+
+Con ASYNC_DB_THREADS=0 se usa el hilo compartido de Django (útil en tests,
+donde la transacción del test vive en ese hilo).
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class BadRequest(Exception):
+    """Cuerpo de la petición que no se puede interpretar"""
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.ASYNC_DB_THREADS, thread_name_prefix='async-db'
+                )
+    return _executor
+
+
+def _call(func, args, kwargs):
+    # Mismo ciclo de vida de conexiones que una petición síncrona
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_db(func, *args, **kwargs):
+    """Ejecuta `func` (código síncrono con ORM) en el pool de base de datos"""
+    if not settings.ASYNC_DB_THREADS:
+        return await sync_to_async(func)(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    # Se copia el contexto para que el hilo vea el estado de la petición
+    # (p. ej. el enrutamiento a la réplica, casinoChill/replicas.py)
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _get_executor(), functools.partial(context.run, _call, func, args, kwargs)
+    )
+
+
+def authenticated_user(request):
+    """
+    Usuario del JWT de la petición, o None. Usa la misma autenticación que
+    DRF (claims del token y revocación en caché).
+    """
+    from backend.apps.authentication.authentication import ClaimsJWTAuthentication
+    try:
+        result = ClaimsJWTAuthentication().authenticate(request)
+    except (AuthenticationFailed, InvalidToken, TokenError):
+        return None
+    if not result:
+        return None
+    request.user = result[0]
+    return result[0]
+
+
+def request_data(request):
+    """Cuerpo JSON (o formulario) de la petición como dict"""
+    if request.content_type == 'application/json':
+        if not request.body:
+            return {}
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            raise BadRequest('JSON parse error') from None
+        if not isinstance(data, dict):
+            raise BadRequest('Se esperaba un objeto JSON')
+        return data
+    return request.POST.dict()
+
+
+def endpoint(*methods):
+    """
+    Decorador de las vistas async: valida el método, interpreta el cuerpo y
+    convierte el (cuerpo, status) que devuelve la vista en un JsonResponse.
+    Las vistas reciben `data` como argumento con nombre.
+    """
+    def decorator(view):
+        @csrf_exempt
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return JsonResponse(
+                    {'detail': f'Método "{request.method}" no permitido.'}, status=405
+                )
+            try:
+                data = request_data(request) if request.method == 'POST' else {}
+            except BadRequest as e:
+                return JsonResponse({'detail': str(e)}, status=400)
+            body, status_code = await view(request, *args, data=data, **kwargs)
+            return JsonResponse(body, status=status_code)
+        return wrapper
+    return decorator
+
+
+NOT_AUTHENTICATED = (
+    {'detail': 'Las credenciales de autenticación no se proveyeron o no son válidas.'}, 401
+)
@@ -0,0 +1,158 @@
+"""
+Caché de catálogos casi estáticos (juegos, planes de membresía).
+
+Cada catálogo tiene en la caché compartida una versión y su fecha de última
+modificación. Con eso se calculan el ETag y Last-Modified de la respuesta, de
+modo que una petición condicional se contesta con 304 sin consultar la base
+de datos ni ejecutar serializers. Los datos serializados se guardan en la
+caché compartida y en una copia local del proceso, ambas por versión.
+
+La variante de la respuesta sale solo de los parámetros que la vista usa
+(orden validado, búsqueda, filtros y paginación), así un parámetro
+cualquiera en la URL no crea entradas nuevas. La copia local guarda solo la
+versión vigente de cada catálogo y a lo sumo MAX_LOCAL_VARIANTS variantes.
+
+Cualquier escritura en el modelo del catálogo asigna una versión nueva al
+confirmarse la transacción (ver `register`).
+"""
+import hashlib
+import threading
+import time
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.utils.http import http_date, parse_http_date_safe, urlencode
+from rest_framework import status
+from rest_framework.filters import OrderingFilter, SearchFilter
+from rest_framework.response import Response
+
+# Los datos de versiones anteriores quedan huérfanos y expiran tras este tiempo
+DATA_TTL = 60 * 60 * 24
+
+# Variantes por catálogo en la copia local del proceso
+MAX_LOCAL_VARIANTS = 32
+
+# nombre del catálogo -> (versión, {variante: datos})
+_local = {}
+_local_lock = threading.Lock()
+
+PAGINATION_PARAMS = (
+    'page_query_param', 'page_size_query_param', 'cursor_query_param',
+    'limit_query_param', 'offset_query_param',
+)
+
+
+def _meta_key(name):
+    return f'catalog:{name}:meta'
+
+
+def _new_meta():
+    return {'version': time.time_ns(), 'last_modified': int(time.time())}
+
+
+def get_meta(name):
+    """Versión y fecha de última modificación del catálogo"""
+    meta = cache.get(_meta_key(name))
+    if meta is None:
+        meta = _new_meta()
+        if not cache.add(_meta_key(name), meta, timeout=None):
+            meta = cache.get(_meta_key(name), meta)
+    return meta
+
+
+def invalidate(name):
+    """Asigna una versión nueva al catálogo al confirmar la transacción actual"""
+    transaction.on_commit(lambda: cache.set(_meta_key(name), _new_meta(), timeout=None))
+
+
+def register(model, name):
+    """Invalida el catálogo `name` con cada alta, cambio o baja de `model`"""
+    def changed(sender, **kwargs):
+        invalidate(name)
+
+    for signal in (post_save, post_delete):
+        signal.connect(changed, sender=model, weak=False, dispatch_uid=f'catalog:{name}:{signal}')
+
+
+class CatalogCacheMixin:
+    """
+    Cachea la respuesta de `list` de una vista de catálogo.
+
+    catalog_name = 'games'
+
+    La respuesta depende solo de la versión del catálogo, los parámetros de
+    la URL que usa la vista (ver `_catalog_params`) y el formato negociado,
+    nunca del usuario.
+    """
+    catalog_name = None
+
+    def list(self, request, *args, **kwargs):
+        meta = get_meta(self.catalog_name)
+        variant = f'{request.accepted_renderer.format}?{urlencode(self._catalog_params(request))}'
+        variant_hash = hashlib.sha1(variant.encode()).hexdigest()[:12]
+        etag = f'"{self.catalog_name}-{meta["version"]}-{variant_hash}"'
+        headers = {
+            'ETag': etag,
+            'Last-Modified': http_date(meta['last_modified']),
+            'Cache-Control': 'public, max-age=0, must-revalidate',
+        }
+
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            not_modified = etag in tags or '*' in tags
+        else:
+            since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+            not_modified = since is not None and meta['last_modified'] <= since
+        if not_modified:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        data = self._catalog_data(meta['version'], variant_hash, request, *args, **kwargs)
+        return Response(data, headers=headers)
+
+    def _catalog_params(self, request):
+        """Pares (parámetro, valor) de la URL que cambian el listado, ordenados"""
+        queryset = self.get_queryset()
+        names = set()
+        params = []
+        for backend_class in self.filter_backends:
+            backend = backend_class()
+            if isinstance(backend, OrderingFilter):
+                # El orden ya validado: un campo desconocido no cambia la respuesta
+                ordering = backend.get_ordering(request, queryset, self)
+                if ordering:
+                    params.append((backend.ordering_param, ','.join(ordering)))
+            elif isinstance(backend, SearchFilter):
+                if getattr(self, 'search_fields', None):
+                    names.add(backend.search_param)
+            elif hasattr(backend, 'get_filterset_class'):
+                filterset_class = backend.get_filterset_class(self, queryset)
+                if filterset_class is not None:
+                    names.update(filterset_class.base_filters)
+        if self.paginator is not None:
+            names.update(filter(None, (getattr(self.paginator, attr, None) for attr in PAGINATION_PARAMS)))
+        for name in names:
+            params.extend((name, value) for value in request.query_params.getlist(name))
+        return sorted(params)
+
+    def _catalog_data(self, version, variant_hash, request, *args, **kwargs):
+        with _local_lock:
+            local_version, variants = _local.get(self.catalog_name, (None, {}))
+            if local_version == version and variant_hash in variants:
+                return variants[variant_hash]
+
+        shared_key = f'catalog:{self.catalog_name}:v{version}:{variant_hash}'
+        data = cache.get(shared_key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(shared_key, data, timeout=DATA_TTL)
+        with _local_lock:
+            local_version, variants = _local.get(self.catalog_name, (None, None))
+            if local_version != version:
+                # Solo se conserva la versión vigente del catálogo
+                variants = {}
+                _local[self.catalog_name] = (version, variants)
+            variants[variant_hash] = data
+            while len(variants) > MAX_LOCAL_VARIANTS:
+                del variants[next(iter(variants))]
+        return data
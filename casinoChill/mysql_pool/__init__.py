@@ -0,0 +1,74 @@
+"""
+Backend MySQL de Django con pool de conexiones opcional en el proceso.
+
+    DATABASES['default'] = {
+        'ENGINE': 'casinoChill.mysql_pool',
+        ...
+        'CONN_MAX_AGE': 0,
+        'POOL': {'MAX_SIZE': 10, 'IDLE_TIMEOUT': 300, 'TIMEOUT': 10, 'PRE_PING': True},
+    }
+
+Sin POOL (o con MAX_SIZE 0) se comporta igual que django.db.backends.mysql.
+Con pool, cerrar la conexión de Django (al final de cada petición con
+CONN_MAX_AGE = 0) la devuelve al pool y abrirla toma una libre: el handshake
+TCP + autenticación se paga una vez por conexión del pool y no por petición,
+y los hilos del proceso comparten como máximo MAX_SIZE conexiones.
+
+Los pools son por proceso; `stats()` devuelve sus métricas (incluido el
+tiempo que las peticiones esperan una conexión libre).
+"""
+import os
+import threading
+from .pool import ConnectionPool, PoolTimeout
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, settings_dict, ping):
+    """Pool del alias para la base de datos configurada, o None si está desactivado"""
+    options = settings_dict.get('POOL') or {}
+    if not options.get('MAX_SIZE'):
+        return None
+    key = f"{alias}:{settings_dict['USER']}@{settings_dict['HOST']}:{settings_dict['PORT']}/{settings_dict['NAME']}"
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = ConnectionPool(
+                    options['MAX_SIZE'],
+                    idle_timeout=options.get('IDLE_TIMEOUT', 300),
+                    timeout=options.get('TIMEOUT', 10),
+                    pre_ping=options.get('PRE_PING', True),
+                    ping=ping,
+                )
+    return pool
+
+
+def stats():
+    """Métricas de los pools de este proceso, por alias y base de datos"""
+    with _pools_lock:
+        pools = list(_pools.items())
+    return {key: pool.stats() for key, pool in pools}
+
+
+def close_all():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
+
+
+def _reset_after_fork():
+    # Los sockets heredados son del proceso padre: se olvidan sin cerrarlos
+    global _pools_lock
+    _pools.clear()
+    _pools_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+__all__ = ['ConnectionPool', 'PoolTimeout', 'close_all', 'get_pool', 'stats']
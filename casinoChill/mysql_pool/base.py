@@ -0,0 +1,68 @@
+"""
+DatabaseWrapper de MySQL que toma y devuelve sus conexiones del pool del
+proceso (ver casinoChill/mysql_pool/__init__.py).
+"""
+from django.db.backends.mysql import base as mysql_base
+from . import get_pool
+
+Database = mysql_base.Database
+
+# Atributos que se guardan en la conexión de MySQLdb mientras vive en el pool
+POOL_ATTR = '_casino_pool'
+INITIALIZED_ATTR = '_casino_pool_initialized'
+
+
+def _ping(conn):
+    try:
+        conn.ping()
+    except Database.Error:
+        return False
+    return True
+
+
+class DatabaseWrapper(mysql_base.DatabaseWrapper):
+    def get_new_connection(self, conn_params):
+        pool = get_pool(self.alias, self.settings_dict, _ping)
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        conn = pool.acquire(
+            lambda: super(DatabaseWrapper, self).get_new_connection(conn_params)
+        )
+        setattr(conn, POOL_ATTR, pool)
+        return conn
+
+    def init_connection_state(self):
+        # La sesión (SQL_AUTO_IS_NULL, nivel de aislamiento) se configura una
+        # sola vez por conexión física, no cada vez que se toma del pool
+        if getattr(self.connection, INITIALIZED_ATTR, False):
+            return
+        super().init_connection_state()
+        if getattr(self.connection, POOL_ATTR, None) is not None:
+            setattr(self.connection, INITIALIZED_ATTR, True)
+
+    def _set_autocommit(self, autocommit):
+        # Evita un viaje al servidor si la conexión ya está en ese modo
+        if self.connection.get_autocommit() != autocommit:
+            super()._set_autocommit(autocommit)
+
+    def _close(self):
+        pool = getattr(self.connection, POOL_ATTR, None)
+        if pool is None:
+            return super()._close()
+        conn = self.connection
+        pool.release(conn, reusable=self._reset_for_pool(conn, pool))
+
+    def _reset_for_pool(self, conn, pool):
+        """Deja la conexión en autocommit y sin transacción abierta; False si no se puede"""
+        if self.in_atomic_block:
+            # Se cierra dentro de atomic(): Django espera que la conexión quede inutilizable
+            return False
+        if self.errors_occurred and not pool.pre_ping:
+            return False
+        try:
+            if not conn.get_autocommit():
+                conn.rollback()
+                conn.autocommit(True)
+        except Database.Error:
+            return False
+        return True
@@ -0,0 +1,162 @@
+"""
+Pool de conexiones del proceso, compartido por los hilos que atienden peticiones.
+
+Las conexiones libres se guardan en una pila (la más reciente se reutiliza
+primero, así las que sobran envejecen y se cierran por inactividad). Si el
+pool está lleno, `acquire` espera hasta `timeout` segundos a que otra
+petición devuelva su conexión; ese tiempo de espera se mide en `stats()`.
+"""
+import threading
+import time
+from collections import deque
+from django.db.utils import OperationalError
+
+# Límites superiores (ms) de los tramos del histograma de espera
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000)
+
+
+class PoolTimeout(OperationalError):
+    """No se liberó ninguna conexión dentro del tiempo de espera"""
+
+
+class ConnectionPool:
+    def __init__(self, max_size, idle_timeout=300, timeout=10, pre_ping=True, ping=None):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.pre_ping = pre_ping
+        self._ping = ping
+        self._idle = deque()  # (conexión, momento en que se devolvió)
+        self._size = 0
+        self._cond = threading.Condition()
+        self._counters = dict.fromkeys(
+            ('acquired', 'created', 'reused', 'waited', 'timeouts', 'expired', 'ping_failures', 'discarded'), 0
+        )
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._wait_histogram = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def acquire(self, connect):
+        """Conexión libre del pool o, si hay lugar, una nueva creada con `connect()`"""
+        start = time.monotonic()
+        waited = False
+        while True:
+            conn, expired = None, []
+            with self._cond:
+                while True:
+                    expired.extend(self._expire(time.monotonic()))
+                    if self._idle:
+                        conn = self._idle.pop()[0]
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = start + self.timeout - time.monotonic()
+                    if remaining <= 0:
+                        self._counters['timeouts'] += 1
+                        raise PoolTimeout(
+                            f'No hay conexiones libres en el pool ({self.max_size}) '
+                            f'tras {self.timeout} s'
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+                self._record_wait(time.monotonic() - start, waited)
+            for stale in expired:
+                _close_quietly(stale)
+
+            if conn is None:
+                return self._create(connect)
+            if not self.pre_ping or self._ping(conn):
+                self._count('reused')
+                return conn
+            # La conexión se cayó mientras estaba libre: se reemplaza en el mismo lugar
+            self._count('ping_failures')
+            _close_quietly(conn)
+            return self._create(connect)
+
+    def release(self, conn, reusable=True):
+        """Devuelve la conexión al pool, o la cierra si no se puede reutilizar"""
+        with self._cond:
+            if reusable:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._size -= 1
+                self._counters['discarded'] += 1
+            self._cond.notify()
+        if not reusable:
+            _close_quietly(conn)
+
+    def close_all(self):
+        """Cierra las conexiones libres (las que están en uso se cierran al devolverse)"""
+        with self._cond:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            _close_quietly(conn)
+
+    def stats(self):
+        with self._cond:
+            acquired = self._counters['acquired']
+            histogram = {
+                f'<={limit}ms': count for limit, count in zip(WAIT_BUCKETS_MS, self._wait_histogram)
+            }
+            histogram[f'>{WAIT_BUCKETS_MS[-1]}ms'] = self._wait_histogram[-1]
+            return {
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                **self._counters,
+                'wait_ms_avg': round(self._wait_total / acquired * 1000, 3) if acquired else None,
+                'wait_ms_max': round(self._wait_max * 1000, 3),
+                'wait_histogram': histogram,
+            }
+
+    def _create(self, connect):
+        try:
+            conn = connect()
+        except BaseException:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        self._count('created')
+        return conn
+
+    def _expire(self, now):
+        # Las más antiguas están al fondo de la pila
+        expired = []
+        if self.idle_timeout:
+            while self._idle and now - self._idle[0][1] > self.idle_timeout:
+                expired.append(self._idle.popleft()[0])
+                self._size -= 1
+                self._counters['expired'] += 1
+        return expired
+
+    def _record_wait(self, seconds, waited):
+        # Se llama con el lock tomado
+        self._counters['acquired'] += 1
+        if waited:
+            self._counters['waited'] += 1
+        self._wait_total += seconds
+        self._wait_max = max(self._wait_max, seconds)
+        milliseconds = seconds * 1000
+        for i, limit in enumerate(WAIT_BUCKETS_MS):
+            if milliseconds <= limit:
+                self._wait_histogram[i] += 1
+                break
+        else:
+            self._wait_histogram[-1] += 1
+
+    def _count(self, name):
+        with self._cond:
+            self._counters[name] += 1
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
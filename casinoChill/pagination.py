@@ -0,0 +1,79 @@
+"""
+Paginación por defecto de la API.
+
+Los listados usan paginación por cursor sobre columnas indexadas: cada página
+es un rango del índice y nunca se ejecuta COUNT(*). Los listados de
+administración (jugadores, transacciones y sesiones de juego) incluyen
+OffsetPaginationMixin: si el cliente envía `?limit=` u `?offset=` se usa
+OffsetPagination para saltar a una página arbitraria, que cuenta el total
+salvo que se pida `?count=false`.
+"""
+from collections import OrderedDict
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class DefaultCursorPagination(CursorPagination):
+    page_size_query_param = 'page_size'
+    max_page_size = settings.API_MAX_PAGE_SIZE
+    # Clave primaria: única, indexada y creciente con la fecha de creación
+    ordering = '-id'
+
+
+class OffsetPagination(LimitOffsetPagination):
+    """Paginación por desplazamiento con conteo opcional (`?count=false`)"""
+    max_limit = settings.API_MAX_PAGE_SIZE
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.skip_count = request.query_params.get(self.count_query_param, '').lower() in ('false', '0')
+        if not self.skip_count:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        # Se pide una fila extra para saber si hay página siguiente sin contar
+        results = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(results) > self.limit
+        self.count = None
+        return results[:self.limit]
+
+    def get_next_link(self):
+        if not self.skip_count:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(url, self.offset_query_param, self.offset + self.limit)
+
+    def get_paginated_response(self, data):
+        if not self.skip_count:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+
+class OffsetPaginationMixin:
+    """
+    Permite pedir OffsetPagination con `?limit=` u `?offset=`; sin esos
+    parámetros la vista usa su paginación por defecto (cursor).
+    """
+    offset_pagination_class = OffsetPagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator') and self.request is not None:
+            pagination = self.offset_pagination_class
+            query_params = self.request.query_params
+            if pagination.limit_query_param in query_params or pagination.offset_query_param in query_params:
+                self._paginator = pagination()
+        return super().paginator
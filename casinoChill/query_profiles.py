@@ -0,0 +1,39 @@
+"""
+Perfiles de consulta por acción para los viewsets.
+
+Cada viewset declara qué relaciones necesita su serializer en cada acción
+y los aplica en su get_queryset con `apply_query_profile`, de modo que un
+listado emite un número fijo de consultas sin importar cuántas filas tenga.
+"""
+
+
+class QueryProfile:
+    """Relaciones a cargar con select_related y prefetch_related"""
+
+    def __init__(self, select=(), prefetch=()):
+        self.select = tuple(select)
+        self.prefetch = tuple(prefetch)
+
+    def apply(self, queryset):
+        if self.select:
+            queryset = queryset.select_related(*self.select)
+        if self.prefetch:
+            queryset = queryset.prefetch_related(*self.prefetch)
+        return queryset
+
+
+class QueryProfileMixin:
+    """
+    query_profiles = {'list': QueryProfile(...), '*': QueryProfile(...)}
+
+    La clave '*' se usa para las acciones que no tienen perfil propio.
+    """
+    query_profiles = {}
+
+    def apply_query_profile(self, queryset):
+        profile = self.query_profiles.get(getattr(self, 'action', None))
+        if profile is None:
+            profile = self.query_profiles.get('*')
+        if profile is None:
+            return queryset
+        return profile.apply(queryset)
@@ -0,0 +1,290 @@
+"""
+Notificaciones en tiempo real por WebSocket (ASGI).
+
+Cada jugador autenticado abre `ws://<host>/ws/player/` enviando su access JWT
+en el subprotocolo (`new WebSocket(url, ['bearer', token])`, el servidor
+acepta `bearer`) y recibe, como mensajes JSON `{"event": ..., "data": ...}`,
+los cambios que se confirman en la base de datos:
+
+- `balance`: saldo nuevo tras cada asiento del diario.
+- `game_round` / `game_batch`: resultado de las rondas jugadas.
+- `cancellation`: resultado de una cancelación de transacción.
+
+`publish` se llama desde el código síncrono de las vistas y entrega el
+mensaje al confirmar la transacción. Con un solo nodo basta el broker en
+memoria; con REALTIME_BROKER_URL (por defecto REDIS_URL) los mensajes pasan
+por pub/sub de Redis y cada nodo los reparte a sus conexiones locales.
+
+Si un cliente no consume sus mensajes, su cola se vacía y recibe un evento
+`resync` para que vuelva a pedir el estado por HTTP.
+
+Por compatibilidad también se acepta `?token=<access JWT>`, pero la query
+string queda en los logs de acceso del servidor ASGI (y de los proxies):
+con REALTIME_QUERY_TOKEN=False solo se acepta el subprotocolo.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import parse_qs
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+PLAYER_PATH = '/ws/player/'
+CHANNEL_PREFIX = 'realtime:player:'
+
+# Subprotocolo que lleva el token: Sec-WebSocket-Protocol: bearer, <token>
+TOKEN_SUBPROTOCOL = 'bearer'
+
+# Códigos de cierre propios (rango 4000-4999 de la RFC 6455)
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_NOT_FOUND = 4404
+
+
+def _message(event, data):
+    return json.dumps({'event': event, 'data': data, 'ts': time.time()})
+
+
+class Subscription:
+    """Cola de mensajes de una conexión, ligada al event loop que la atiende"""
+
+    def __init__(self, player_id, loop, max_size):
+        self.player_id = player_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_size)
+
+    def push(self, message):
+        # Se ejecuta en el event loop de la conexión
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_message('resync', {}))
+
+
+class LocalBroker:
+    """Broker en memoria: reparte los mensajes a las conexiones de este proceso"""
+
+    def __init__(self, queue_size):
+        self.queue_size = queue_size
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, player_id):
+        subscription = Subscription(player_id, asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscriptions[player_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.player_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.player_id]
+
+    def connections(self):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+    def deliver(self, player_id, message):
+        """Entrega a las conexiones locales; se puede llamar desde cualquier hilo"""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(player_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.push, message)
+            except RuntimeError:
+                # El event loop de la conexión ya se cerró
+                self.unsubscribe(subscription)
+
+    def publish(self, player_id, message):
+        self.deliver(player_id, message)
+
+    async def start(self):
+        pass
+
+
+class RedisBroker(LocalBroker):
+    """
+    Broker multinodo: publica en Redis y un listener por proceso reparte lo
+    recibido a las conexiones locales. Los mensajes de un nodo sin
+    conexiones del jugador simplemente se descartan.
+    """
+
+    def __init__(self, url, queue_size):
+        super().__init__(queue_size)
+        import redis
+        self.url = url
+        self._client = redis.Redis.from_url(url)
+        self._listener = None
+
+    def publish(self, player_id, message):
+        try:
+            self._client.publish(f'{CHANNEL_PREFIX}{player_id}', message)
+        except Exception:
+            # La notificación no debe romper la escritura que ya se confirmó
+            logger.exception('No se pudo publicar la notificación en Redis')
+
+    async def start(self):
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self):
+        import redis.asyncio as aioredis
+        while True:
+            client = aioredis.Redis.from_url(self.url)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.psubscribe(f'{CHANNEL_PREFIX}*')
+                    async for item in pubsub.listen():
+                        if item['type'] != 'pmessage':
+                            continue
+                        channel = item['channel'].decode()
+                        message = item['data'].decode()
+                        self.deliver(int(channel[len(CHANNEL_PREFIX):]), message)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Se perdió la suscripción a Redis, reintentando')
+                await asyncio.sleep(1)
+            finally:
+                await client.aclose()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                url = settings.REALTIME_BROKER_URL
+                queue_size = settings.REALTIME_QUEUE_SIZE
+                _broker = RedisBroker(url, queue_size) if url else LocalBroker(queue_size)
+    return _broker
+
+
+def publish(player_id, event, data):
+    """Notifica `event` al jugador cuando se confirme la transacción actual"""
+    if player_id is None:
+        return
+    message = _message(event, data)
+    transaction.on_commit(lambda: get_broker().publish(player_id, message))
+
+
+def _raw_token(scope):
+    """(token, subprotocolo a aceptar) de la conexión; el token puede ser vacío"""
+    subprotocols = scope.get('subprotocols') or []
+    if len(subprotocols) == 2 and subprotocols[0] == TOKEN_SUBPROTOCOL:
+        return subprotocols[1], TOKEN_SUBPROTOCOL
+    if not settings.REALTIME_QUERY_TOKEN:
+        return '', None
+    query = parse_qs(scope.get('query_string', b'').decode())
+    return (query.get('token') or [''])[0], None
+
+
+def _authenticate(raw_token):
+    """(player_id, token) del access token, o None si no es válido"""
+    from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+    from rest_framework_simplejwt.settings import api_settings
+    from rest_framework_simplejwt.tokens import AccessToken
+    from backend.apps.authentication.tokens import check_not_revoked
+    from backend.apps.players import player_cache
+    try:
+        token = AccessToken(raw_token)
+        if 'token_version' in token:
+            check_not_revoked(token)
+            player_id = token.get('player_id')
+        else:
+            player_id = player_cache.player_id_for_user(token[api_settings.USER_ID_CLAIM])
+    except (InvalidToken, TokenError, KeyError):
+        return None
+    if player_id is None:
+        return None
+    return player_id, token
+
+
+def _still_valid(token):
+    from rest_framework_simplejwt.exceptions import InvalidToken
+    from backend.apps.authentication.tokens import check_not_revoked
+    if token['exp'] <= time.time():
+        return False
+    if 'token_version' in token:
+        try:
+            check_not_revoked(token)
+        except InvalidToken:
+            return False
+    return True
+
+
+async def websocket_application(scope, receive, send):
+    """Aplicación ASGI de los WebSocket de jugadores"""
+    event = await receive()
+    if event['type'] != 'websocket.connect':
+        return
+    if scope['path'] != PLAYER_PATH:
+        await send({'type': 'websocket.close', 'code': CLOSE_NOT_FOUND})
+        return
+
+    raw_token, subprotocol = _raw_token(scope)
+    authenticated = await sync_to_async(_authenticate)(raw_token) if raw_token else None
+    if authenticated is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+        return
+    player_id, token = authenticated
+
+    broker = get_broker()
+    subscription = broker.subscribe(player_id)
+    try:
+        await broker.start()
+        await send({'type': 'websocket.accept', 'subprotocol': subprotocol})
+        await send({'type': 'websocket.send', 'text': _message('connected', {'player_id': player_id})})
+        await _serve(subscription, token, receive, send)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+async def _serve(subscription, token, receive, send):
+    async def read():
+        # Los mensajes del cliente se ignoran salvo "ping"
+        while True:
+            event = await receive()
+            if event['type'] == 'websocket.disconnect':
+                return
+            if event.get('text') == 'ping':
+                await send({'type': 'websocket.send', 'text': _message('pong', {})})
+
+    async def write():
+        interval = settings.REALTIME_PING_INTERVAL
+        next_check = time.monotonic() + interval
+        while True:
+            try:
+                message = await asyncio.wait_for(
+                    subscription.queue.get(), timeout=max(next_check - time.monotonic(), 0)
+                )
+            except asyncio.TimeoutError:
+                # En cada intervalo se revisa que el token siga vigente (expiración, logout)
+                next_check = time.monotonic() + interval
+                if not await sync_to_async(_still_valid)(token):
+                    await send({'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+                    return
+                message = _message('ping', {})
+            await send({'type': 'websocket.send', 'text': message})
+
+    tasks = [asyncio.ensure_future(read()), asyncio.ensure_future(write())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
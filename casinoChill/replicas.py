@@ -0,0 +1,167 @@
+"""
+Lecturas de reportes desde una réplica de la base de datos.
+
+Las vistas de solo lectura (historiales, resúmenes, estadísticas) marcan sus
+acciones con `ReplicaReadMixin` o `reads_from_replica`; durante esas acciones
+`ReplicaRouter` envía las lecturas a REPLICA_DATABASE. Todo lo demás, y
+cualquier lectura dentro de una transacción o posterior a una escritura en la
+misma petición, va al primario.
+
+Lectura de lo escrito: cuando una petición escribe, `ReplicaPinMiddleware`
+deja en la caché una marca por usuario durante REPLICA_PIN_SECONDS (más que
+el retraso de replicación esperado). Mientras exista, las lecturas de ese
+usuario siguen en el primario, así ve sus propios depósitos y rondas.
+
+Sin REPLICA_DATABASE configurada todo se lee del primario.
+"""
+import contextlib
+import contextvars
+import functools
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class _RoutingState:
+    __slots__ = ('replica', 'wrote')
+
+    def __init__(self):
+        self.replica = None
+        self.wrote = False
+
+
+_state = contextvars.ContextVar('replica_routing', default=None)
+
+
+def _pin_key(user_id):
+    return f'replica:pin:{user_id}'
+
+
+def pin(user_id):
+    """Mantiene las lecturas del usuario en el primario durante REPLICA_PIN_SECONDS"""
+    cache.set(_pin_key(user_id), True, timeout=settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user_id):
+    return bool(cache.get(_pin_key(user_id)))
+
+
+@contextlib.contextmanager
+def reading_from_replica(user=None):
+    """
+    Dirige a la réplica las lecturas del bloque, salvo que no haya réplica o
+    que `user` haya escrito hace menos de REPLICA_PIN_SECONDS
+    """
+    alias = settings.REPLICA_DATABASE
+    if not alias or (user is not None and user.is_authenticated and is_pinned(user.id)):
+        yield
+        return
+    state = _state.get()
+    token = None
+    if state is None:
+        # Fuera de una petición (comandos, tests): estado propio del bloque
+        state = _RoutingState()
+        token = _state.set(state)
+    previous, state.replica = state.replica, alias
+    try:
+        yield
+    finally:
+        state.replica = previous
+        if token is not None:
+            _state.reset(token)
+
+
+def reads_from_replica(view):
+    """Decorador de vistas función de DRF (debajo de @api_view)"""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with reading_from_replica(request.user):
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaReadMixin:
+    """
+    Lee de la réplica en las acciones de `replica_actions` de un ViewSet.
+    Se activa después de autenticar, así la autenticación lee del primario.
+    """
+    replica_actions = ('list', 'retrieve')
+
+    def dispatch(self, request, *args, **kwargs):
+        with contextlib.ExitStack() as stack:
+            self._replica_stack = stack
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.action in self.replica_actions:
+            self._replica_stack.enter_context(reading_from_replica(request.user))
+
+
+class ReplicaRouter:
+    """Router de DATABASE_ROUTERS: réplica solo para las lecturas marcadas"""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.replica is None or state.wrote:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        # Explícito: sin router, Django escribiría en la base de la que se leyó la instancia
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, settings.REPLICA_DATABASE}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if settings.REPLICA_DATABASE and db == settings.REPLICA_DATABASE:
+            return False
+        return None
+
+
+class ReplicaPinMiddleware:
+    """Registra las escrituras de cada petición y ancla al usuario que escribió"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _state.set(_RoutingState())
+        try:
+            return self.get_response(request)
+        finally:
+            self._finish(request, _state.get())
+            _state.reset(token)
+
+    async def __acall__(self, request):
+        token = _state.set(_RoutingState())
+        try:
+            return await self.get_response(request)
+        finally:
+            state = _state.get()
+            if state.wrote:
+                await sync_to_async(self._finish, thread_sensitive=False)(request, state)
+            _state.reset(token)
+
+    def _finish(self, request, state):
+        if not state.wrote or not settings.REPLICA_DATABASE:
+            return
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            pin(user.id)
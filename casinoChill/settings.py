@@ -58,6 +58,7 @@ INSTALLED_APPS = [
     'backend.apps.transactions',
     'backend.apps.games',
     'backend.apps.memberships',
+    'backend.apps.authentication',
 ]
 
 MIDDLEWARE = [
@@ -67,6 +68,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Ancla al primario las lecturas de quien acaba de escribir (réplica de lectura)
+    'casinoChill.replicas.ReplicaPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -92,14 +95,31 @@ TEMPLATES = [
 WSGI_APPLICATION = 'casinoChill.wsgi.application'
 
 # Database
+# Conexiones a MySQL (casinoChill/mysql_pool: el backend de Django con un pool opcional).
+# Sin pool, cada hilo conserva su conexión DB_CONN_MAX_AGE segundos entre peticiones
+# (0 = una conexión por petición) y la verifica antes de reutilizarla si
+# DB_CONN_HEALTH_CHECKS está activo. Con DB_POOL_MAX_SIZE > 0 cada petición
+# devuelve su conexión al pool del proceso al terminar; las libres se cierran tras
+# DB_POOL_IDLE_TIMEOUT segundos y se comprueban con un ping antes de reutilizarse
+# (DB_POOL_PRE_PING). Una petición espera hasta DB_POOL_TIMEOUT segundos una conexión libre.
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', '0'))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
+        'ENGINE': 'casinoChill.mysql_pool',
         'NAME': os.environ.get('DB_NAME', 'casino_db'),
         'USER': os.environ.get('DB_USER', 'casino_user'),
         'PASSWORD': os.environ.get('DB_PASSWORD', ''),
         'HOST': os.environ.get('DB_HOST', 'db'),
         'PORT': os.environ.get('DB_PORT', '3306'),
+        'CONN_MAX_AGE': 0 if DB_POOL_MAX_SIZE else int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', 'True').lower() == 'true',
+        'POOL': {
+            'MAX_SIZE': DB_POOL_MAX_SIZE,
+            'IDLE_TIMEOUT': int(os.environ.get('DB_POOL_IDLE_TIMEOUT', '300')),
+            'TIMEOUT': int(os.environ.get('DB_POOL_TIMEOUT', '10')),
+            'PRE_PING': os.environ.get('DB_POOL_PRE_PING', 'True').lower() == 'true',
+        },
         'OPTIONS': {
             'charset': 'utf8mb4',
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
@@ -107,6 +127,24 @@ DATABASES = {
     }
 }
 
+# Réplica de lectura para reportes (historiales, resúmenes, estadísticas; ver
+# casinoChill/replicas.py). Sin DB_REPLICA_HOST todo se lee del primario. Tras
+# escribir, las lecturas del usuario siguen en el primario REPLICA_PIN_SECONDS segundos
+REPLICA_DATABASE = 'replica' if os.environ.get('DB_REPLICA_HOST') else ''
+if REPLICA_DATABASE:
+    DATABASES[REPLICA_DATABASE] = {
+        **DATABASES['default'],
+        'NAME': os.environ.get('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'HOST': os.environ['DB_REPLICA_HOST'],
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'USER': os.environ.get('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        # En los tests la réplica es el mismo primario
+        'TEST': {'MIRROR': 'default'},
+    }
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', '5'))
+DATABASE_ROUTERS = ['casinoChill.replicas.ReplicaRouter']
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -142,7 +180,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWT con claims (player_id, is_staff, versión): no lee auth_user por petición
+        'backend.apps.authentication.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -159,8 +198,66 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ),
+    # Paginación por cursor (sin COUNT(*)); ver casinoChill/pagination.py
+    'DEFAULT_PAGINATION_CLASS': 'casinoChill.pagination.DefaultCursorPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', '50')),
 }
 
+# Tamaño máximo de página que puede pedir un cliente con ?page_size= / ?limit=
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', '200'))
+
+# Rondas máximas por petición de juego en lote (auto-spin)
+GAME_BATCH_MAX_ROUNDS = int(os.environ.get('GAME_BATCH_MAX_ROUNDS', '100'))
+
+# Códigos QR renderizados al vuelo: imágenes en el LRU de cada proceso y
+# max-age con el que CDN y terminales pueden cachearlas
+QR_CACHE_MAX_ENTRIES = int(os.environ.get('QR_CACHE_MAX_ENTRIES', '1024'))
+QR_CACHE_MAX_AGE = int(os.environ.get('QR_CACHE_MAX_AGE', str(60 * 60 * 24 * 365)))
+
+# Caché compartida: Redis si está configurado (servicio `redis` de docker-compose),
+# memoria local del proceso en desarrollo
+REDIS_URL = os.environ.get('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Contadores de límites de transacción (ver backend/apps/transactions/limits.py):
+# 'redis' (compartido entre nodos), 'memory' (un solo proceso) o 'database'
+LIMITS_STORE = os.environ.get('LIMITS_STORE', 'redis' if REDIS_URL else 'database')
+LIMITS_REDIS_URL = os.environ.get('LIMITS_REDIS_URL', REDIS_URL)
+# Segundos entre volcados de los contadores a TransactionLimit (0 = solo `flush_limits`)
+LIMITS_FLUSH_INTERVAL = int(os.environ.get('LIMITS_FLUSH_INTERVAL', '2'))
+
+# Notificaciones por WebSocket: pub/sub de Redis entre nodos (vacío = broker en memoria)
+REALTIME_BROKER_URL = os.environ.get('REALTIME_BROKER_URL', REDIS_URL)
+# Mensajes pendientes por conexión antes de pedir al cliente que se resincronice
+REALTIME_QUEUE_SIZE = int(os.environ.get('REALTIME_QUEUE_SIZE', '100'))
+# Segundos entre pings (y revisiones del token) en una conexión sin mensajes
+REALTIME_PING_INTERVAL = int(os.environ.get('REALTIME_PING_INTERVAL', '30'))
+# Aceptar el token en ?token= (queda en los logs de acceso); el subprotocolo 'bearer' siempre se acepta
+REALTIME_QUERY_TOKEN = os.environ.get('REALTIME_QUERY_TOKEN', 'True').lower() == 'true'
+
+# Hilos (y conexiones a la base de datos) por proceso para las vistas async de
+# jugar, saldo y depósito; 0 = hilo compartido de Django (ver casinoChill/async_api.py)
+ASYNC_DB_THREADS = int(os.environ.get('ASYNC_DB_THREADS', '20'))
+
+# Segundos que vive en caché una lectura de saldo/perfil (se invalida en cada cambio)
+PLAYER_CACHE_TTL = int(os.environ.get('PLAYER_CACHE_TTL', '300'))
+
+# Procesos que hashean contraseñas en `manage.py import_players` (vacío = un proceso por núcleo);
+# el endpoint bulk_import hashea en el proceso que atiende la petición
+PLAYER_IMPORT_WORKERS = int(os.environ['PLAYER_IMPORT_WORKERS']) if os.environ.get('PLAYER_IMPORT_WORKERS') else None
+
 # Simple JWT Configuration
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
@@ -176,6 +273,8 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
+    'TOKEN_OBTAIN_SERIALIZER': 'backend.apps.authentication.tokens.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'backend.apps.authentication.tokens.ClaimsTokenRefreshSerializer',
 }
 
 # CORS Configuration - SEGURO
@@ -221,8 +320,37 @@ for directory in [MEDIA_ROOT, STATIC_ROOT]:
         os.makedirs(directory)
 
 AUTHENTICATION_BACKENDS = [
-    # Nuestro backend personalizado para email/username
+    # Nuestro backend personalizado para email/username. Hereda de ModelBackend
+    # (permisos incluidos), así que un login fallido hace un solo hash
     'backend.apps.authentication.backends.EmailOrUsernameModelBackend',
-    # El backend por defecto de Django (como respaldo)
-    'django.contrib.auth.backends.ModelBackend',
-]
\ No newline at end of file
+]
+
+# Perfil de hash de contraseñas: pbkdf2 (por defecto), scrypt o argon2
+# (argon2 requiere argon2-cffi). Los costos se obtienen con
+# `python manage.py calibrate_hasher`; vacíos usan los valores de Django.
+# Los demás hashers siguen en la lista para verificar hashes existentes, que
+# se rehashean con el perfil vigente en el siguiente login correcto.
+def _int_env(name):
+    value = os.environ.get(name, '')
+    return int(value) if value else None
+
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_PBKDF2_ITERATIONS = _int_env('PASSWORD_PBKDF2_ITERATIONS')
+PASSWORD_SCRYPT_WORK_FACTOR = _int_env('PASSWORD_SCRYPT_WORK_FACTOR')
+PASSWORD_SCRYPT_BLOCK_SIZE = _int_env('PASSWORD_SCRYPT_BLOCK_SIZE')
+PASSWORD_SCRYPT_PARALLELISM = _int_env('PASSWORD_SCRYPT_PARALLELISM')
+PASSWORD_ARGON2_TIME_COST = _int_env('PASSWORD_ARGON2_TIME_COST')
+PASSWORD_ARGON2_MEMORY_COST = _int_env('PASSWORD_ARGON2_MEMORY_COST')
+PASSWORD_ARGON2_PARALLELISM = _int_env('PASSWORD_ARGON2_PARALLELISM')
+
+_HASHER_PATHS = {
+    'pbkdf2': 'backend.apps.authentication.hashers.CalibratedPBKDF2PasswordHasher',
+    'scrypt': 'backend.apps.authentication.hashers.CalibratedScryptPasswordHasher',
+    'argon2': 'backend.apps.authentication.hashers.CalibratedArgon2PasswordHasher',
+}
+PASSWORD_HASHERS = [_HASHER_PATHS[PASSWORD_HASHER]] + [
+    path for name, path in _HASHER_PATHS.items() if name != PASSWORD_HASHER
+]
+
+# Segundos que se recuerda un username/email inexistente en el login
+LOGIN_NEGATIVE_CACHE_TTL = int(os.environ.get('LOGIN_NEGATIVE_CACHE_TTL', '30'))
\ No newline at end of file
@@ -0,0 +1,27 @@
+"""
+Utilidades de pruebas compartidas por las apps.
+"""
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryCountMixin:
+    """
+    Verifica que un endpoint emita un número fijo de consultas sin importar
+    cuántas filas devuelva (sin N+1).
+    """
+
+    def assertConstantQueries(self, url, add_rows, expected, sizes=(1, 10)):
+        counts = []
+        created = 0
+        for size in sizes:
+            add_rows(size - created)
+            created = size
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(queries))
+        self.assertEqual(
+            counts, [expected] * len(sizes),
+            f'{url} no emite un número fijo de consultas: {counts}'
+        )
@@ -0,0 +1,242 @@
+import asyncio
+import json
+from unittest import mock
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import parse_http_date_safe
+from rest_framework.test import APITestCase
+from backend.apps.authentication.tokens import ClaimsTokenObtainPairSerializer, revoke_user_tokens
+from backend.apps.games.models import Game
+from backend.apps.players.tests import create_player
+from . import catalog_cache, pagination, realtime
+
+
+class PublishTests(TestCase):
+    def test_publish_waits_for_commit(self):
+        broker = mock.Mock()
+        with mock.patch.object(realtime, 'get_broker', return_value=broker):
+            with self.captureOnCommitCallbacks() as callbacks:
+                realtime.publish(7, 'balance', {'balance': '10.00'})
+                realtime.publish(None, 'balance', {'balance': '10.00'})
+            broker.publish.assert_not_called()
+            self.assertEqual(len(callbacks), 1)
+
+            callbacks[0]()
+        player_id, message = broker.publish.call_args.args
+        self.assertEqual(player_id, 7)
+        self.assertEqual(json.loads(message)['event'], 'balance')
+        self.assertEqual(json.loads(message)['data'], {'balance': '10.00'})
+
+
+class LocalBrokerTests(SimpleTestCase):
+    async def test_delivers_to_player_subscriptions(self):
+        broker = realtime.LocalBroker(queue_size=10)
+        subscription = broker.subscribe(7)
+        other = broker.subscribe(8)
+        self.assertEqual(broker.connections(), 2)
+
+        broker.publish(7, 'hola')
+        self.assertEqual(await asyncio.wait_for(subscription.queue.get(), 1), 'hola')
+        self.assertTrue(other.queue.empty())
+
+        broker.unsubscribe(subscription)
+        broker.publish(7, 'otra')
+        await asyncio.sleep(0)
+        self.assertTrue(subscription.queue.empty())
+        self.assertEqual(broker.connections(), 1)
+
+    async def test_overflow_sends_resync(self):
+        subscription = realtime.Subscription(7, asyncio.get_running_loop(), max_size=2)
+        for message in ('uno', 'dos', 'tres'):
+            subscription.push(message)
+        self.assertEqual(subscription.queue.qsize(), 1)
+        self.assertEqual(json.loads(subscription.queue.get_nowait())['event'], 'resync')
+
+
+@override_settings(REALTIME_PING_INTERVAL=30)
+class WebSocketTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.player = create_player('ws_player')
+        self.token = str(ClaimsTokenObtainPairSerializer.get_token(self.player.user).access_token)
+        broker = realtime.LocalBroker(queue_size=10)
+        patcher = mock.patch.object(realtime, '_broker', broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def connect(self, query_string=b'', subprotocols=()):
+        """Abre y cierra una conexión; devuelve los eventos enviados al cliente"""
+        scope = {
+            'type': 'websocket', 'path': realtime.PLAYER_PATH,
+            'query_string': query_string, 'subprotocols': list(subprotocols),
+        }
+        incoming = [{'type': 'websocket.connect'}, {'type': 'websocket.disconnect', 'code': 1000}]
+        sent = []
+
+        async def receive():
+            return incoming.pop(0)
+
+        async def send(event):
+            sent.append(event)
+
+        async def run():
+            await asyncio.wait_for(realtime.websocket_application(scope, receive, send), 5)
+
+        asyncio.run(run())
+        return sent
+
+    def assertClosedUnauthorized(self, sent):
+        self.assertEqual(sent, [{'type': 'websocket.close', 'code': realtime.CLOSE_UNAUTHORIZED}])
+
+    def test_token_in_subprotocol(self):
+        sent = self.connect(subprotocols=['bearer', self.token])
+        self.assertEqual(sent[0], {'type': 'websocket.accept', 'subprotocol': 'bearer'})
+        self.assertEqual(json.loads(sent[1]['text'])['data'], {'player_id': self.player.id})
+        self.assertEqual(realtime._broker.connections(), 0)
+
+    def test_token_in_query_string(self):
+        sent = self.connect(f'token={self.token}'.encode())
+        self.assertEqual(sent[0], {'type': 'websocket.accept', 'subprotocol': None})
+        with override_settings(REALTIME_QUERY_TOKEN=False):
+            self.assertClosedUnauthorized(self.connect(f'token={self.token}'.encode()))
+
+    def test_bad_token_closes(self):
+        self.assertClosedUnauthorized(self.connect(b'token=basura'))
+        self.assertClosedUnauthorized(self.connect(subprotocols=['bearer', 'basura']))
+        self.assertClosedUnauthorized(self.connect())
+
+    def test_revoked_token_closes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            revoke_user_tokens(self.player.user_id)
+        self.assertClosedUnauthorized(self.connect(subprotocols=['bearer', self.token]))
+
+
+class CatalogCacheTests(APITestCase):
+    url = '/api/games/games/'
+
+    def setUp(self):
+        cache.clear()
+        catalog_cache._local.clear()
+        self.addCleanup(cache.clear)
+        self.addCleanup(catalog_cache._local.clear)
+        for name in ('Blackjack', 'Ruleta'):
+            Game.objects.create(name=name, description='', game_type='Mesa')
+
+    def test_conditional_requests(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 2)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            self.assertEqual(
+                self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"otro", {etag}').status_code, 304
+            )
+            self.assertEqual(self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+            # Datos servidos desde la copia local
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='"otro"').status_code, 200)
+
+    def test_write_invalidates_catalog(self):
+        response = self.client.get(self.url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Game.objects.create(name='Póker', description='', game_type='Cartas')
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.json()), 3)
+        # Last-Modified tiene resolución de segundos: solo puede mantenerse o avanzar
+        self.assertGreaterEqual(
+            parse_http_date_safe(response['Last-Modified']), parse_http_date_safe(last_modified)
+        )
+
+    def test_variant_ignores_unused_params(self):
+        etag = self.client.get(self.url)['ETag']
+        for query in ('?x=1', '?x=2&y=3', '?search=ruleta', '?ordering=desconocido'):
+            self.assertEqual(self.client.get(self.url + query)['ETag'], etag, query)
+
+        response = self.client.get(self.url + '?ordering=-name')
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual([game['name'] for game in response.json()], ['Ruleta', 'Blackjack'])
+        self.assertEqual(self.client.get(self.url + '?x=9&ordering=-name')['ETag'], response['ETag'])
+
+    def test_local_copy_is_bounded(self):
+        for position in range(catalog_cache.MAX_LOCAL_VARIANTS + 5):
+            self.client.get(self.url, {'ordering': 'name' if position % 2 else '-name', 'x': position})
+        with mock.patch.object(catalog_cache, 'MAX_LOCAL_VARIANTS', 2):
+            for ordering in ('name', '-name', 'id', '-id'):
+                self.client.get(self.url, {'ordering': ordering})
+        self.assertEqual(list(catalog_cache._local), ['games'])
+        self.assertEqual(len(catalog_cache._local['games'][1]), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Game.objects.create(name='Póker', description='', game_type='Cartas')
+        self.client.get(self.url)
+        self.assertEqual(len(catalog_cache._local['games'][1]), 1)
+
+
+class PaginationTests(APITestCase):
+    url = '/api/players/players/'
+
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create(username='staff', is_staff=True))
+        for position in range(5):
+            create_player(f'page_player{position}')
+
+    def usernames(self, response):
+        return [player['username'] for player in response.json()['results']]
+
+    def test_cursor_page_by_default(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(set(body), {'next', 'previous', 'results'})
+        self.assertEqual(self.usernames(response), ['page_player4', 'page_player3'])
+        self.assertIn('cursor=', body['next'])
+        self.assertFalse([q['sql'] for q in queries if 'COUNT(' in q['sql'].upper()])
+
+        response = self.client.get(body['next'])
+        self.assertEqual(self.usernames(response), ['page_player2', 'page_player1'])
+
+    def test_page_size_is_capped(self):
+        self.assertEqual(pagination.DefaultCursorPagination.max_page_size, settings.API_MAX_PAGE_SIZE)
+        with mock.patch.object(pagination.DefaultCursorPagination, 'max_page_size', 3):
+            response = self.client.get(self.url, {'page_size': 1000})
+        self.assertEqual(len(response.json()['results']), 3)
+
+        with mock.patch.object(pagination.OffsetPagination, 'max_limit', 3):
+            response = self.client.get(self.url, {'limit': 1000})
+        self.assertEqual(len(response.json()['results']), 3)
+
+    def test_offset_mode(self):
+        response = self.client.get(self.url, {'limit': 2, 'offset': 2})
+        self.assertEqual(response.json()['count'], 5)
+        self.assertEqual(len(response.json()['results']), 2)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, {'limit': 2, 'offset': 2, 'count': 'false'})
+        body = response.json()
+        self.assertEqual(set(body), {'next', 'previous', 'results'})
+        self.assertEqual(len(body['results']), 2)
+        self.assertIn('offset=4', body['next'])
+        self.assertFalse([q['sql'] for q in queries if 'COUNT(' in q['sql'].upper()])
+
+        response = self.client.get(body['next'])
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertIsNone(response.json()['next'])
+
+    def test_staff_transaction_list(self):
+        response = self.client.get('/api/transactions/transactions/')
+        self.assertEqual(set(response.json()), {'next', 'previous', 'results'})
+        response = self.client.get('/api/transactions/transactions/', {'limit': 10, 'count': 'false'})
+        self.assertEqual(response.json(), {'next': None, 'previous': None, 'results': []})
@@ -33,6 +33,7 @@ urlpatterns = [
     path('api/games/', include('backend.apps.games.urls')),
     path('api/auth/', include('backend.apps.authentication.urls')),
     path('api/transactions/', include('backend.apps.transactions.urls')),
+    path('api/db/pool/stats/', views.db_pool_stats, name='db-pool-stats'),
 ]
 
 if settings.DEBUG:
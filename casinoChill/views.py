@@ -1,5 +1,10 @@
+from django.db import connections
 from django.http import JsonResponse
 from django.shortcuts import render
+from rest_framework import permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from . import mysql_pool
 
 def home_view(request):
     """
@@ -21,4 +26,21 @@ def home_view(request):
             "games": "/api/games/"
         }
     }
-    return JsonResponse(api_info)
\ No newline at end of file
+    return JsonResponse(api_info)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def db_pool_stats(request):
+    """
+    Configuración de conexiones y métricas del pool de este proceso (solo admin)
+    """
+    return Response({
+        'databases': {
+            alias: {
+                'conn_max_age': connections[alias].settings_dict['CONN_MAX_AGE'],
+                'conn_health_checks': connections[alias].settings_dict['CONN_HEALTH_CHECKS'],
+            }
+            for alias in connections
+        },
+        'pools': mysql_pool.stats(),
+    })